@@ -157,14 +157,20 @@ class BaseBarFeed(feed.BaseFeed):
 class OptimizerBarFeed(BaseBarFeed):
     """This class is used by the optimizer module. 
     The barfeed is already built on the server side, and the bars are sent back to workers.
+
+    Workers supply an :class:`quantworks.optimizer.indicatorcache.IndicatorCache` that is shared by all the
+    strategy executions, so indicators requested using :meth:`getIndicator` are calculated only once.
     """
-    def __init__(self, frequency, instruments, bars, maxLen=None):
+    def __init__(self, frequency, instruments, bars, maxLen=None, barColumns=None, indicatorCache=None):
         super(OptimizerBarFeed, self).__init__(frequency, maxLen)
         for instrument in instruments:
             self.registerInstrument(instrument)
+        self.__instruments = instruments
         self.__bars = bars
         self.__nextPos = 0
         self.__currDateTime = None
+        self.__barColumns = barColumns
+        self.__indicatorCache = indicatorCache
 
         try:
             self.__barsHaveAdjClose = self.__bars[0][instruments[0]].getAdjClose() is not None
@@ -202,3 +208,43 @@ class OptimizerBarFeed(BaseBarFeed):
 
     def eof(self):
         return self.__nextPos >= len(self.__bars)
+
+    def getIndicatorCache(self):
+        return self.__indicatorCache
+
+    def getIndicator(self, instrument, columns, indicatorClass, *parameters):
+        """Returns a DataSeries with the values of an indicator, that will be filled as bars are dispatched.
+        Values are calculated using the indicator's batch method, or taken from the indicator cache if they were
+        already calculated.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param columns: The column name, or a sequence with the column names, that are fed to indicatorClass.batch.
+            For example: "close" for :class:`quantworks.technical.ma.SMA` or ("high", "low", "close") for
+            :class:`quantworks.technical.atr.ATR`.
+        :type columns: string or tuple.
+        :param indicatorClass: The filter class. For example :class:`quantworks.technical.ma.SMA`.
+        :param parameters: The filter parameters, in the order used by the batch method.
+        :rtype: :class:`quantworks.optimizer.indicatorcache.PrecomputedSeries`, or a tuple of them if the batch method
+            returns more than one series.
+
+        .. note::
+            This must be called before the feed starts dispatching bars.
+        """
+        # Imported here so importing a bar feed doesn't pull in the optimizer package.
+        from quantworks.optimizer import indicatorcache
+
+        if self.__barColumns is None:
+            self.__barColumns = indicatorcache.BarColumns(self.__instruments, self.__bars)
+        if self.__indicatorCache is None:
+            self.__indicatorCache = indicatorcache.IndicatorCache()
+
+        values = self.__indicatorCache.getIndicatorValues(
+            self.__barColumns, instrument, columns, indicatorClass, *parameters
+        )
+        barDs = self[instrument]
+        if isinstance(values, tuple):
+            ret = tuple(indicatorcache.PrecomputedSeries(barDs, v, barDs.getMaxLen()) for v in values)
+        else:
+            ret = indicatorcache.PrecomputedSeries(barDs, values, barDs.getMaxLen())
+        return ret
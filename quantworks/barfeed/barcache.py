@@ -0,0 +1,175 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from quantworks.utils import dt
+
+# File layout:
+# 1. MAGIC.
+# 2. The header length as a little endian uint64.
+# 3. A JSON header with the key, the number of bars and the column names.
+# 4. Padding up to a multiple of 8 bytes.
+# 5. The columns, one after the other: int64 datetimes (nanoseconds since the epoch) followed by float64 values.
+MAGIC = b"QWBARS1\n"
+
+BASE_COLUMNS = ["open", "high", "low", "close", "volume", "adj_close"]
+
+
+class CachedBars(object):
+    """Bars loaded from a cache file. Columns are memory-mapped."""
+
+    def __init__(self, dateTimes, columns, extra):
+        self.dateTimes = dateTimes
+        self.columns = columns
+        self.extra = extra
+
+    def __len__(self):
+        return len(self.dateTimes)
+
+    def haveAdjClose(self):
+        return bool((~np.isnan(self.columns["adj_close"])).any())
+
+
+def get_cache_key(path, parserKey, skipMalformedBars):
+    """Returns the key that identifies the bars parsed from a CSV file."""
+    stat = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "parser": parserKey,
+        "skipMalformedBars": skipMalformedBars,
+    }
+
+
+def get_cache_path(cacheDir, key):
+    """Returns the path to the cache file for a given key.
+    Different files or parser settings map to different cache files, but modifications to a CSV file don't."""
+    name = hashlib.sha1(json.dumps([key["path"], key["parser"], key["skipMalformedBars"]]).encode()).hexdigest()
+    return os.path.join(cacheDir, name + ".bars")
+
+
+def load(cachePath, key):
+    """Loads bars from a cache file.
+
+    :rtype: A :class:`CachedBars` instance, or None if the file doesn't exist or was built with a different key.
+    """
+    try:
+        with open(cachePath, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            headerLen = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+            header = json.loads(f.read(headerLen).decode())
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+    if header["key"] != key:
+        return None
+
+    count = header["count"]
+    offset = len(MAGIC) + 8 + headerLen
+    offset += -offset % 8
+    if count == 0:
+        dateTimes = np.empty(0, dtype=np.int64)
+        columns = {name: np.empty(0) for name in BASE_COLUMNS}
+        extra = {name: np.empty(0) for name in header["extra"]}
+        return CachedBars(dateTimes, columns, extra)
+
+    dateTimes = np.memmap(cachePath, dtype="<i8", mode="r", offset=offset, shape=(count,))
+    offset += count * 8
+    values = {}
+    for name in BASE_COLUMNS + header["extra"]:
+        values[name] = np.memmap(cachePath, dtype="<f8", mode="r", offset=offset, shape=(count,))
+        offset += count * 8
+    columns = {name: values[name] for name in BASE_COLUMNS}
+    extra = {name: values[name] for name in header["extra"]}
+    return CachedBars(dateTimes, columns, extra)
+
+
+def save(cachePath, key, bars):
+    """Saves bars to a cache file.
+
+    :param bars: A list of :class:`quantworks.bar.BasicBar` instances.
+    :rtype: True if the bars were saved, False if they can't be cached (non numeric extra columns).
+    """
+    extraNames = []
+    for bar_ in bars:
+        for name in bar_.getExtraColumns():
+            if name not in extraNames:
+                extraNames.append(name)
+
+    columns = {name: [] for name in BASE_COLUMNS}
+    extra = {name: [] for name in extraNames}
+    dateTimes = []
+    for bar_ in bars:
+        dateTimes.append(dt.datetime_to_epoch_ns(bar_.getDateTime()))
+        columns["open"].append(bar_.getOpen())
+        columns["high"].append(bar_.getHigh())
+        columns["low"].append(bar_.getLow())
+        columns["close"].append(bar_.getClose())
+        columns["volume"].append(bar_.getVolume())
+        adjClose = bar_.getAdjClose()
+        columns["adj_close"].append(np.nan if adjClose is None else adjClose)
+        barExtra = bar_.getExtraColumns()
+        for name in extraNames:
+            value = barExtra.get(name)
+            if not isinstance(value, float):
+                return False
+            extra[name].append(value)
+
+    return save_columns(cachePath, key, dateTimes, columns, extra)
+
+
+def save_columns(cachePath, key, dateTimes, columns, extra):
+    """Saves bars supplied as columns to a cache file.
+
+    :param dateTimes: The bar datetimes as int64 nanoseconds since the epoch.
+    :param columns: A dict with the open, high, low, close, volume and adj_close columns.
+    :param extra: A dict of column name to a sequence of values for extra columns.
+    :rtype: True if the bars were saved, False if they can't be cached (non numeric extra columns).
+    """
+    dateTimes = np.asarray(dateTimes, dtype="<i8")
+    extraNames = list(extra.keys())
+    values = [np.asarray(columns[name], dtype="<f8") for name in BASE_COLUMNS]
+    for name in extraNames:
+        try:
+            values.append(np.asarray(extra[name], dtype="<f8"))
+        except (TypeError, ValueError):
+            return False
+
+    header = json.dumps({"key": key, "count": len(dateTimes), "extra": extraNames}).encode()
+    tmpPath = "%s.%d.tmp" % (cachePath, os.getpid())
+    with open(tmpPath, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array([len(header)], dtype="<u8").tobytes())
+        f.write(header)
+        f.write(b"\0" * (-(len(MAGIC) + 8 + len(header)) % 8))
+        f.write(dateTimes.tobytes())
+        for column in values:
+            f.write(column.tobytes())
+    # Replace the file atomically so concurrent readers never see a partially written file.
+    os.replace(tmpPath, cachePath)
+    return True
@@ -0,0 +1,400 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import abc
+
+import numpy as np
+
+from quantworks import bar
+from quantworks.utils import dt
+
+
+# Marks extra column values that are missing for a given bar.
+_MISSING = object()
+
+# Number of bars that ColumnarBarStore.getBar builds at once.
+BAR_CHUNK_SIZE = 1024
+
+
+def _is_number(value):
+    return isinstance(value, (float, int, np.number)) and not isinstance(value, bool)
+
+
+def _object_array(values):
+    ret = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        ret[i] = value
+    return ret
+
+
+def _to_python(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class BarStore(metaclass=abc.ABCMeta):
+    """Holds the bars for a single instrument, sorted by datetime.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    @abc.abstractmethod
+    def addBars(self, bars):
+        """Adds a sequence of :class:`quantworks.bar.Bar` and keeps everything sorted by datetime."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def addColumns(self, dateTimes, open_, high, low, close, volume, adjClose, frequency, tzInfo=None, extra={}):
+        """Adds bars supplied as columns. dateTimes are nanoseconds since the epoch. Check
+        :meth:`ColumnarBarStore.addColumns` for the details."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def __len__(self):
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def getTimestamps(self):
+        """Returns a numpy.array with the bar datetimes as int64 nanoseconds since the epoch."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def getDateTime(self, pos):
+        """Returns the :class:`datetime.datetime` for the bar at a given position."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def getBar(self, pos):
+        """Returns the :class:`quantworks.bar.Bar` at a given position."""
+        raise NotImplementedError()
+
+
+class ListBarStore(BarStore):
+    """A :class:`BarStore` that holds :class:`quantworks.bar.Bar` instances in a list."""
+
+    def __init__(self):
+        self.__bars = []
+
+    def addBars(self, bars):
+        self.__bars.extend(bars)
+        self.__bars.sort(key=lambda b: b.getDateTime())
+
+    def addColumns(self, dateTimes, open_, high, low, close, volume, adjClose, frequency, tzInfo=None, extra={}):
+        columns = ColumnarBarStore()
+        columns.addColumns(dateTimes, open_, high, low, close, volume, adjClose, frequency, tzInfo, extra)
+        self.addBars(columns.getBars())
+
+    def __len__(self):
+        return len(self.__bars)
+
+    def getTimestamps(self):
+        return np.array([dt.datetime_to_epoch_ns(bar_.getDateTime()) for bar_ in self.__bars], dtype=np.int64)
+
+    def getDateTime(self, pos):
+        return self.__bars[pos].getDateTime()
+
+    def getBar(self, pos):
+        return self.__bars[pos]
+
+
+class ColumnarBarStore(BarStore):
+    """A :class:`BarStore` that holds bar values in NumPy arrays, one per column, and builds
+    :class:`quantworks.bar.BasicBar` instances only when they are requested.
+
+    Datetimes are stored as int64 nanoseconds since the epoch, and prices, volume and adjusted close as float64.
+    A missing adjusted close is stored as NaN.
+
+    :param barClass: The class used to build bars. Must have the same constructor as :class:`quantworks.bar.BasicBar`.
+        If None, the class of the first bars added is used.
+    """
+
+    def __init__(self, barClass=None):
+        self.__barClass = barClass
+        self.__dateTimes = np.empty(0, dtype=np.int64)
+        self.__open = np.empty(0, dtype=np.float64)
+        self.__high = np.empty(0, dtype=np.float64)
+        self.__low = np.empty(0, dtype=np.float64)
+        self.__close = np.empty(0, dtype=np.float64)
+        self.__volume = np.empty(0, dtype=np.float64)
+        self.__adjClose = np.empty(0, dtype=np.float64)
+        self.__frequency = None
+        self.__tzInfo = None
+        self.__naive = None
+        self.__extra = {}
+        # Bars built by getBar, and the position of the first one.
+        self.__chunk = []
+        self.__chunkBegin = 0
+
+    def getBarClass(self):
+        return self.__barClass
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getTzInfo(self):
+        """Returns the tzinfo used to build datetimes, or None if datetimes are naive."""
+        return self.__tzInfo
+
+    def getDateTimes(self):
+        """Returns a numpy.array with the datetimes as int64 nanoseconds since the epoch."""
+        return self.__dateTimes
+
+    def getOpen(self):
+        return self.__open
+
+    def getHigh(self):
+        return self.__high
+
+    def getLow(self):
+        return self.__low
+
+    def getClose(self):
+        return self.__close
+
+    def getVolume(self):
+        return self.__volume
+
+    def getAdjClose(self):
+        return self.__adjClose
+
+    def getExtraColumns(self):
+        """Returns a dict of column name to numpy.array for extra columns."""
+        return self.__extra
+
+    def getNBytes(self):
+        """Returns the number of bytes used by the arrays."""
+        ret = sum(values.nbytes for values in (
+            self.__dateTimes, self.__open, self.__high, self.__low, self.__close, self.__volume, self.__adjClose
+        ))
+        for values in self.__extra.values():
+            ret += values.nbytes
+        return ret
+
+    def addBars(self, bars):
+        bars = list(bars)
+        if len(bars) == 0:
+            return
+
+        if self.__barClass is None and isinstance(bars[0], bar.BasicBar):
+            self.__barClass = type(bars[0])
+        for bar_ in bars:
+            if type(bar_) is not self.__barClass:
+                raise Exception("Columnar storage requires all bars to be of the same BasicBar class")
+
+        frequency = bars[0].getFrequency()
+        if any(bar_.getFrequency() != frequency for bar_ in bars):
+            raise Exception("All bars must have the same frequency")
+
+        tzInfo = None
+        naiveCount = sum(1 for bar_ in bars if dt.datetime_is_naive(bar_.getDateTime()))
+        if naiveCount == 0:
+            tzInfo = bars[0].getDateTime().tzinfo
+        elif naiveCount != len(bars):
+            raise Exception("Can't mix naive and localized datetimes")
+
+        names = []
+        for bar_ in bars:
+            for name in bar_.getExtraColumns():
+                if name not in names:
+                    names.append(name)
+        extra = {}
+        for name in names:
+            extra[name] = [bar_.getExtraColumns().get(name, _MISSING) for bar_ in bars]
+
+        adjClose = [bar_.getAdjClose() for bar_ in bars]
+        self.addColumns(
+            [dt.datetime_to_epoch_ns(bar_.getDateTime()) for bar_ in bars],
+            [bar_.getOpen() for bar_ in bars],
+            [bar_.getHigh() for bar_ in bars],
+            [bar_.getLow() for bar_ in bars],
+            [bar_.getClose() for bar_ in bars],
+            [bar_.getVolume() for bar_ in bars],
+            [np.nan if value is None else value for value in adjClose],
+            frequency,
+            tzInfo,
+            extra
+        )
+
+    def addColumns(self, dateTimes, open_, high, low, close, volume, adjClose, frequency, tzInfo=None, extra={}):
+        """Adds bars supplied as columns and keeps everything sorted by datetime.
+
+        :param dateTimes: The bar datetimes as nanoseconds since the epoch. Naive datetimes are treated as UTC.
+        :param open_: The open prices.
+        :param high: The high prices.
+        :param low: The low prices.
+        :param close: The close prices.
+        :param volume: The volume.
+        :param adjClose: The adjusted close prices, or None. NaN marks a missing value.
+        :param frequency: The bars frequency.
+        :param tzInfo: The tzinfo used to build datetimes, or None to build naive datetimes.
+        :param extra: A dict of column name to a sequence of values for extra columns.
+        """
+
+        dateTimes = np.asarray(dateTimes, dtype=np.int64)
+        count = len(dateTimes)
+        if count == 0:
+            return
+        if self.__barClass is None:
+            self.__barClass = bar.BasicBar
+
+        open_ = np.asarray(open_, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        close = np.asarray(close, dtype=np.float64)
+        volume = np.asarray(volume, dtype=np.float64)
+        if adjClose is None:
+            adjClose = np.full(count, np.nan)
+        else:
+            adjClose = np.asarray(adjClose, dtype=np.float64)
+        for values in (open_, high, low, close, volume, adjClose):
+            if len(values) != count:
+                raise Exception("All columns must have the same length")
+
+        self.__checkPrices(dateTimes, open_, high, low, close, tzInfo)
+
+        # Datetimes and frequency must be consistent with the bars already loaded.
+        naive = tzInfo is None
+        if self.__naive is None:
+            self.__naive = naive
+            self.__tzInfo = tzInfo
+            self.__frequency = frequency
+        elif self.__naive != naive:
+            raise Exception("Can't mix naive and localized datetimes")
+        elif self.__frequency != frequency:
+            raise Exception("All bars must have the same frequency")
+
+        # Extra columns. Those that are not numeric, or are missing for some bars, are stored as objects.
+        oldCount = len(self.__dateTimes)
+        newExtra = {}
+        names = list(self.__extra.keys()) + [name for name in extra.keys() if name not in self.__extra]
+        for name in names:
+            oldValues = self.__extra.get(name)
+            if oldValues is None:
+                oldValues = np.full(oldCount, _MISSING, dtype=object)
+            newValues = extra.get(name)
+            if newValues is None:
+                newValues = np.full(count, _MISSING, dtype=object)
+            elif not isinstance(newValues, np.ndarray) or newValues.dtype != np.float64:
+                newValues = list(newValues)
+                if all(_is_number(value) for value in newValues):
+                    newValues = np.asarray(newValues, dtype=np.float64)
+                else:
+                    newValues = _object_array(newValues)
+            if len(newValues) != count:
+                raise Exception("All columns must have the same length")
+            newExtra[name] = np.concatenate((oldValues, newValues))
+
+        self.__dateTimes = np.concatenate((self.__dateTimes, dateTimes))
+        self.__open = np.concatenate((self.__open, open_))
+        self.__high = np.concatenate((self.__high, high))
+        self.__low = np.concatenate((self.__low, low))
+        self.__close = np.concatenate((self.__close, close))
+        self.__volume = np.concatenate((self.__volume, volume))
+        self.__adjClose = np.concatenate((self.__adjClose, adjClose))
+        self.__extra = newExtra
+        self.__chunk = []
+
+        self.__sort()
+
+    def __checkPrices(self, dateTimes, open_, high, low, close, tzInfo):
+        # Same checks, and error messages, that BasicBar does.
+        for invalid, msg in (
+            (high < low, "high < low"),
+            (high < open_, "high < open"),
+            (high < close, "high < close"),
+            (low > open_, "low > open"),
+            (low > close, "low > close"),
+        ):
+            if invalid.any():
+                pos = int(np.argmax(invalid))
+                raise Exception("%s on %s" % (msg, dt.epoch_ns_to_datetime(dateTimes[pos], tzInfo)))
+
+    def __sort(self):
+        dateTimes = self.__dateTimes
+        if len(dateTimes) < 2 or (dateTimes[1:] >= dateTimes[:-1]).all():
+            return
+
+        # A stable sort keeps bars with the same datetime in insertion order, just like list.sort.
+        order = np.argsort(dateTimes, kind="stable")
+        self.__dateTimes = dateTimes[order]
+        self.__open = self.__open[order]
+        self.__high = self.__high[order]
+        self.__low = self.__low[order]
+        self.__close = self.__close[order]
+        self.__volume = self.__volume[order]
+        self.__adjClose = self.__adjClose[order]
+        for name in self.__extra:
+            self.__extra[name] = self.__extra[name][order]
+
+    def __len__(self):
+        return len(self.__dateTimes)
+
+    def getTimestamps(self):
+        return self.__dateTimes
+
+    def getDateTime(self, pos):
+        offset = pos - self.__chunkBegin
+        if 0 <= offset < len(self.__chunk):
+            return self.__chunk[offset].getDateTime()
+        return dt.epoch_ns_to_datetime(self.__dateTimes[pos], self.__tzInfo)
+
+    def getBar(self, pos):
+        # Bars are built in chunks since building them one at a time from the arrays is a lot slower.
+        offset = pos - self.__chunkBegin
+        if offset < 0 or offset >= len(self.__chunk):
+            if pos < 0:
+                pos += len(self.__dateTimes)
+            if pos < 0 or pos >= len(self.__dateTimes):
+                raise IndexError("bar index out of range")
+            self.__chunkBegin = pos
+            self.__chunk = self.__buildBars(pos, pos + BAR_CHUNK_SIZE)
+            offset = 0
+        return self.__chunk[offset]
+
+    def getBars(self):
+        """Returns a list with every :class:`quantworks.bar.Bar`. This is a lot faster than calling :meth:`getBar`
+        for each position."""
+        return self.__buildBars(0, len(self.__dateTimes))
+
+    def __buildBars(self, begin, end):
+        dateTimes = dt.epoch_ns_to_datetimes(self.__dateTimes[begin:end], self.__tzInfo)
+        adjCloses = [None if value != value else value for value in self.__adjClose[begin:end].tolist()]
+        extraColumns = [
+            (name, [_to_python(value) for value in values[begin:end]]) for name, values in self.__extra.items()
+        ]
+
+        ret = []
+        for i, (dateTime, open_, high, low, close, volume, adjClose) in enumerate(zip(
+            dateTimes, self.__open[begin:end].tolist(), self.__high[begin:end].tolist(),
+            self.__low[begin:end].tolist(), self.__close[begin:end].tolist(), self.__volume[begin:end].tolist(),
+            adjCloses
+        )):
+            extra = {}
+            for name, values in extraColumns:
+                value = values[i]
+                if value is not _MISSING:
+                    extra[name] = value
+            ret.append(self.__barClass(
+                dateTime, open_, high, low, close, volume, adjClose, self.__frequency, extra=extra
+            ))
+        return ret
@@ -21,13 +21,18 @@
 
 import abc
 import datetime
+import heapq
+import os
 
+import numpy as np
 import pytz
 import six
 
 from quantworks.utils import dt
 from quantworks.utils import csvutils
+from quantworks.barfeed import barcache
 from quantworks.barfeed import membf
+from quantworks import barfeed
 from quantworks import bar
 
 
@@ -145,6 +150,10 @@ class BarFeed(membf.BaseMemoryBarFeed):
         self.__barFilter = barFilter
 
     def addBarsFromCSV(self, instrument, path, rowParser, skipMalformedBars=False):
+        self.addBarsFromSequence(instrument, self.loadBarsFromCSV(path, rowParser, skipMalformedBars))
+
+    def loadBarsFromCSV(self, path, rowParser, skipMalformedBars=False):
+        """Parses a CSV file and returns a list with the bars that pass the bar filter."""
         def parse_bar_skip_malformed(row):
             ret = None
             try:
@@ -165,8 +174,7 @@ class BarFeed(membf.BaseMemoryBarFeed):
             bar_ = parse_bar(row)
             if bar_ is not None and (self.__barFilter is None or self.__barFilter.includeBar(bar_)):
                 loadedBars.append(bar_)
-
-        self.addBarsFromSequence(instrument, loadedBars)
+        return loadedBars
 
 
 class GenericRowParser(RowParser):
@@ -253,6 +261,84 @@ class GenericRowParser(RowParser):
             dateTime, open_, high, low, close, volume, adjClose, self.__frequency, extra=extra
         )
 
+    def parseColumns(self, path):
+        """Parses a whole CSV file into columns using NumPy. This is a lot faster than parsing one row at a time with
+        :meth:`parseBar`, but only simple files are supported: no quoted values or empty rows, a datetime format
+        supported by :func:`quantworks.utils.dt.parse_datetimes`, and valid prices.
+
+        :param path: The path to the CSV file.
+        :type path: string.
+        :rtype: A tuple with the datetimes, as int64 nanoseconds since the epoch, a dict with the open, high, low,
+            close, volume and adj_close columns, and a dict with the extra columns. None if the file is not supported,
+            and it should be parsed using :meth:`parseBar` instead.
+        """
+        if self.__dailyBarTime is not None and self.__dailyBarTime.tzinfo is not None:
+            return None
+
+        try:
+            fieldNames, chunks = csvutils.read_columns(path, self.getDelimiter(), self.getFieldNames())
+            priceColNames = [
+                self.__openColName, self.__highColName, self.__lowColName, self.__closeColName, self.__volumeColName
+            ]
+            if len(set(fieldNames)) != len(fieldNames) or \
+                    any(name not in fieldNames for name in [self.__dateTimeColName] + priceColNames):
+                return None
+            extraColNames = [name for name in fieldNames if name not in self.__columnNames.values()]
+
+            chunkColumns = [self.__parseChunk(fieldNames, chunk, priceColNames, extraColNames) for chunk in chunks]
+        except ValueError:
+            return None
+
+        dateTimes = np.concatenate([np.empty(0, dtype=np.int64)] + [chunk[0] for chunk in chunkColumns])
+        columns = {}
+        for name in ["open", "high", "low", "close", "volume", "adj_close"]:
+            columns[name] = np.concatenate([np.empty(0)] + [chunk[1][name] for chunk in chunkColumns])
+        extra = {}
+        for name in extraColNames:
+            values = [chunk[2][name] for chunk in chunkColumns]
+            if all(isinstance(chunkValues, np.ndarray) for chunkValues in values):
+                extra[name] = np.concatenate([np.empty(0)] + values)
+            else:
+                extra[name] = [value for chunkValues in values for value in chunkValues]
+
+        # Bars with invalid prices are left to parseBar, that either fails or skips them.
+        open_, high, low, close = columns["open"], columns["high"], columns["low"], columns["close"]
+        if ((high < low) | (high < open_) | (high < close) | (low > open_) | (low > close)).any():
+            return None
+
+        if self.__dailyBarTime is not None:
+            dayNs = 86400 * 1000000000
+            timeNs = dt.datetime_to_epoch_ns(datetime.datetime.combine(dt.epoch_naive, self.__dailyBarTime))
+            dateTimes = dateTimes - dateTimes % dayNs + timeNs
+        if self.__timezone:
+            dateTimes = dt.localize_epoch_ns(dateTimes, self.__timezone)
+        if not np.isnan(columns["adj_close"]).all():
+            self.__haveAdjClose = True
+        return dateTimes, columns, extra
+
+    def __parseChunk(self, fieldNames, chunk, priceColNames, extraColNames):
+        values = dict(zip(fieldNames, chunk))
+        dateTimes = dt.parse_datetimes(values[self.__dateTimeColName], self.__dateTimeFormat)
+        columns = {}
+        for name, colName in zip(["open", "high", "low", "close", "volume"], priceColNames):
+            columns[name] = np.array(values[colName], dtype=np.float64)
+        adjClose = values.get(self.__adjCloseColName)
+        # Empty values mean that there is no adjusted close.
+        if adjClose is None or not any(adjClose):
+            columns["adj_close"] = np.full(len(dateTimes), np.nan)
+        else:
+            try:
+                columns["adj_close"] = np.array(adjClose, dtype=np.float64)
+            except ValueError:
+                columns["adj_close"] = np.array([value if len(value) else "nan" for value in adjClose], dtype=np.float64)
+        extra = {}
+        for name in extraColNames:
+            try:
+                extra[name] = np.array(values[name], dtype=np.float64)
+            except ValueError:
+                extra[name] = [csvutils.float_or_string(value) for value in values[name]]
+        return dateTimes, columns, extra
+
 
 class GenericBarFeed(BarFeed):
     """A BarFeed that loads bars from CSV files that have the following format:
@@ -277,6 +363,8 @@ class GenericBarFeed(BarFeed):
 
          * If all the instruments loaded are in the same timezone, then the timezone parameter may not be specified.
          * If any of the instruments loaded are in different timezones, then the timezone parameter should be set.
+        * Files with no quoted values and a zero padded datetime format like **%Y-%m-%d %H:%M:%S** are parsed a lot
+          faster, unless a bar filter or a custom bar class is used. Check :meth:`GenericRowParser.parseColumns`.
     """
 
     def __init__(self, frequency, timezone=None, maxLen=None):
@@ -288,6 +376,7 @@ class GenericBarFeed(BarFeed):
         self.__haveAdjClose = False
 
         self.__barClass = bar.BasicBar
+        self.__barCacheDir = None
 
         self.__dateTimeFormat = "%Y-%m-%d %H:%M:%S"
         self.__columnNames = {
@@ -322,6 +411,72 @@ class GenericBarFeed(BarFeed):
     def setBarClass(self, barClass):
         self.__barClass = barClass
 
+    def setBarCacheDir(self, cacheDir):
+        """
+        Enables caching parsed bars in a binary format, so later loads of the same CSV files skip parsing.
+        Cache files are rebuilt when the CSV file (path, modification time or size) or the parsing settings change.
+
+        :param cacheDir: The directory where cache files are stored, or None to disable caching.
+        :type cacheDir: string.
+
+        .. note::
+            * Bars are not cached if a bar filter or a bar class other than :class:`quantworks.bar.BasicBar` is used,
+              or if the bars have extra columns that are not numeric.
+        """
+        self.__barCacheDir = cacheDir
+
+    def getBarCacheDir(self):
+        return self.__barCacheDir
+
+    def __getCacheKey(self, path, timezone, skipMalformedBars):
+        parserKey = {
+            "columnNames": self.__columnNames,
+            "dateTimeFormat": self.__dateTimeFormat,
+            "dailyBarTime": None if self.getDailyBarTime() is None else str(self.getDailyBarTime()),
+            "frequency": self.getFrequency(),
+            "timezone": None if timezone is None else str(timezone),
+        }
+        return barcache.get_cache_key(path, parserKey, skipMalformedBars)
+
+    def __canParseColumns(self):
+        # Columns are turned into BasicBar instances, and bar filters need the bars.
+        return self.getBarFilter() is None and self.__barClass == bar.BasicBar
+
+    def __canCache(self):
+        return self.__barCacheDir is not None and self.__canParseColumns()
+
+    def __loadFromCache(self, instrument, cachePath, cacheKey, timezone):
+        cachedBars = barcache.load(cachePath, cacheKey)
+        if cachedBars is None:
+            return False
+
+        columns = cachedBars.columns
+        self.addBarsFromColumns(
+            instrument, cachedBars.dateTimes, columns["open"], columns["high"], columns["low"], columns["close"],
+            columns["volume"], columns["adj_close"], tzInfo=timezone, extra=cachedBars.extra
+        )
+        self.__checkAdjClose(cachedBars.haveAdjClose())
+        return True
+
+    def __saveToCache(self, bars, cachePath, cacheKey, timezone):
+        # Datetimes are rebuilt using the timezone, so they must be naive if there is no timezone.
+        if timezone is None and not all(dt.datetime_is_naive(bar_.getDateTime()) for bar_ in bars):
+            return
+        if not os.path.exists(self.__barCacheDir):
+            os.makedirs(self.__barCacheDir)
+        barcache.save(cachePath, cacheKey, bars)
+
+    def __saveColumnsToCache(self, columns, cachePath, cacheKey):
+        if not os.path.exists(self.__barCacheDir):
+            os.makedirs(self.__barCacheDir)
+        barcache.save_columns(cachePath, cacheKey, *columns)
+
+    def __checkAdjClose(self, haveAdjClose):
+        if haveAdjClose:
+            self.__haveAdjClose = True
+        elif self.__haveAdjClose:
+            raise Exception("Previous bars had adjusted close and these ones don't have.")
+
     def addBarsFromCSV(self, instrument, path, timezone=None, skipMalformedBars=False):
         """Loads bars for a given instrument from a CSV formatted file.
         The instrument gets registered in the bar feed.
@@ -339,14 +494,216 @@ class GenericBarFeed(BarFeed):
         if timezone is None:
             timezone = self.__timezone
 
+        useCache = self.__canCache()
+        if useCache:
+            cacheKey = self.__getCacheKey(path, timezone, skipMalformedBars)
+            cachePath = barcache.get_cache_path(self.__barCacheDir, cacheKey)
+            if self.__loadFromCache(instrument, cachePath, cacheKey, timezone):
+                return
+
         rowParser = GenericRowParser(
             self.__columnNames, self.__dateTimeFormat, self.getDailyBarTime(), self.getFrequency(),
             timezone, self.__barClass
         )
 
-        super(GenericBarFeed, self).addBarsFromCSV(instrument, path, rowParser, skipMalformedBars=skipMalformedBars)
+        # Simple files are parsed into columns using NumPy, and the rest one row at a time.
+        columns = None
+        if self.__canParseColumns():
+            columns = rowParser.parseColumns(path)
+
+        if columns is not None:
+            dateTimes, values, extra = columns
+            self.addBarsFromColumns(
+                instrument, dateTimes, values["open"], values["high"], values["low"], values["close"],
+                values["volume"], values["adj_close"], tzInfo=timezone, extra=extra
+            )
+            self.__checkAdjClose(rowParser.barsHaveAdjClose())
+            if useCache:
+                self.__saveColumnsToCache(columns, cachePath, cacheKey)
+        else:
+            bars = self.loadBarsFromCSV(path, rowParser, skipMalformedBars=skipMalformedBars)
+            self.addBarsFromSequence(instrument, bars)
+            self.__checkAdjClose(rowParser.barsHaveAdjClose())
+            if useCache:
+                self.__saveToCache(bars, cachePath, cacheKey, timezone)
+
+
+class _CSVBarReader(object):
+    """Reads bars one at a time from a CSV file sorted by datetime."""
+
+    def __init__(self, instrument, path, rowParser, skipMalformedBars):
+        self.__instrument = instrument
+        self.__path = path
+        self.__rowParser = rowParser
+        self.__skipMalformedBars = skipMalformedBars
+        self.__file = None
+        self.__reader = None
+        self.__lastDateTime = None
+
+    def getInstrument(self):
+        return self.__instrument
+
+    def open(self):
+        self.close()
+        self.__file = open(self.__path, "r")
+        self.__reader = csvutils.FastDictReader(
+            self.__file, fieldnames=self.__rowParser.getFieldNames(), delimiter=self.__rowParser.getDelimiter()
+        )
+        self.__lastDateTime = None
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+            self.__reader = None
 
-        if rowParser.barsHaveAdjClose():
-            self.__haveAdjClose = True
-        elif self.__haveAdjClose:
-            raise Exception("Previous bars had adjusted close and these ones don't have.")
+    def readBar(self, barFilter):
+        """Returns the next bar that passes the filter, or None once there are no more bars."""
+        if self.__reader is None:
+            return None
+
+        for row in self.__reader:
+            try:
+                bar_ = self.__rowParser.parseBar(row)
+            except Exception:
+                if self.__skipMalformedBars:
+                    continue
+                raise
+            if bar_ is None or (barFilter is not None and not barFilter.includeBar(bar_)):
+                continue
+            if self.__lastDateTime is not None and bar_.getDateTime() < self.__lastDateTime:
+                raise Exception("Bars in %s are not sorted by datetime. %s is before %s" % (
+                    self.__path, bar_.getDateTime(), self.__lastDateTime
+                ))
+            self.__lastDateTime = bar_.getDateTime()
+            return bar_
+
+        self.close()
+        return None
+
+
+class StreamingBarFeed(barfeed.BaseBarFeed):
+    """A BarFeed that reads bars from CSV files while they get dispatched, instead of loading them into memory.
+    Files are merged by datetime on the fly, so memory usage doesn't grow with the number of bars and dispatching starts
+    right away.
+
+    :param frequency: The frequency of the bars. Check :class:`quantworks.bar.Frequency`.
+    :type frequency: :class:`quantworks.bar.Frequency`
+    :param maxLen: The maximum number of values that the :class:`quantworks.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None or invalid (negative), then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int
+
+    .. note::
+        * Bars in each file **must** be sorted by datetime, in ascending order.
+        * Files are opened, and the first bar from each one is read, the first time bars are needed.
+          Files are closed once they are exhausted, or when the feed is stopped.
+    """
+
+    def __init__(self, frequency, maxLen=None):
+        super(StreamingBarFeed, self).__init__(frequency, maxLen)
+
+        self.__readers = []
+        self.__barFilter = None
+        # A heap with the next bar from each file. None until files are opened.
+        self.__nextBars = None
+        self.__haveAdjClose = False
+        self.__currDateTime = None
+
+    def reset(self):
+        self.__close()
+        self.__nextBars = None
+        self.__currDateTime = None
+        super(StreamingBarFeed, self).reset()
+
+    def getBarFilter(self):
+        return self.__barFilter
+
+    def setBarFilter(self, barFilter):
+        """Sets the filter used to skip bars. This has to be set before bars get read."""
+        self.__barFilter = barFilter
+
+    def addBarsFromCSV(self, instrument, path, rowParser, skipMalformedBars=False):
+        """Adds a CSV file with bars for a given instrument. The file is not read until bars are needed.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param path: The path to the CSV file.
+        :type path: string.
+        :param rowParser: The parser for the rows in the file.
+        :type rowParser: :class:`RowParser`.
+        :param skipMalformedBars: True to skip errors while parsing bars.
+        :type skipMalformedBars: boolean.
+        """
+        if self.__nextBars is not None:
+            raise Exception("Can't add more files once bars were read")
+        self.__readers.append(_CSVBarReader(instrument, path, rowParser, skipMalformedBars))
+        self.registerInstrument(instrument)
+
+    def __getNextBars(self):
+        if self.__nextBars is None:
+            self.__nextBars = []
+            for i, reader in enumerate(self.__readers):
+                reader.open()
+                self.__readNextBar(i)
+            # Bars have adjusted close if the first bar from every file has.
+            self.__haveAdjClose = len(self.__nextBars) > 0 and all(
+                bar_.getAdjClose() is not None for _, _, bar_ in self.__nextBars
+            )
+        return self.__nextBars
+
+    def __readNextBar(self, readerIdx):
+        bar_ = self.__readers[readerIdx].readBar(self.__barFilter)
+        if bar_ is not None:
+            # The reader index breaks ties, so bars never get compared.
+            heapq.heappush(self.__nextBars, (bar_.getDateTime(), readerIdx, bar_))
+
+    def __close(self):
+        for reader in self.__readers:
+            reader.close()
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def barsHaveAdjClose(self):
+        self.__getNextBars()
+        return self.__haveAdjClose
+
+    def start(self):
+        super(StreamingBarFeed, self).start()
+        self.__getNextBars()
+
+    def stop(self):
+        self.__close()
+        self.__nextBars = []
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return len(self.__getNextBars()) == 0
+
+    def peekDateTime(self):
+        nextBars = self.__getNextBars()
+        if len(nextBars) == 0:
+            return None
+        return nextBars[0][0]
+
+    def getNextBars(self):
+        # Return all the bars with the smallest datetime, and read the next bar from those files.
+        smallestDateTime = self.peekDateTime()
+        if smallestDateTime is None:
+            return None
+
+        nextBars = self.__nextBars
+        ret = {}
+        while len(nextBars) and nextBars[0][0] == smallestDateTime:
+            _, readerIdx, bar_ = heapq.heappop(nextBars)
+            instrument = self.__readers[readerIdx].getInstrument()
+            if instrument in ret:
+                raise Exception("Duplicate bars found for %s on %s" % (instrument, smallestDateTime))
+            ret[instrument] = bar_
+            self.__readNextBar(readerIdx)
+
+        self.__currDateTime = smallestDateTime
+        return bar.Bars(ret)
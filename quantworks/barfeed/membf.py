@@ -20,11 +20,12 @@
 """
 
 import datetime
-import six
+
+import numpy as np
 
 from quantworks import barfeed
 from quantworks import bar
-from quantworks import utils
+from quantworks.barfeed import barstore
 
 
 class BaseMemoryBarFeed(barfeed.BaseBarFeed):
@@ -34,6 +35,9 @@ class BaseMemoryBarFeed(barfeed.BaseBarFeed):
     - Aligning them with respect to time.
     Subclasses should:
     - Forward the call to start() if they override it.
+
+    Bars are held in a list of :class:`quantworks.bar.Bar` objects per instrument unless columnar storage is enabled
+    using :meth:`setUseColumnarStorage`.
     """
 
     def __init__(self, frequency, maxLen=None):
@@ -43,12 +47,21 @@ class BaseMemoryBarFeed(barfeed.BaseBarFeed):
         self.__nextPos = {}
         self.__started = False
         self.__currDateTime = None
+        self.__useColumnarStorage = False
+        # Merged timeline. Built when dispatching starts.
+        self.__timelineInstruments = None
+        self.__timelineInstrumentIdxs = None
+        self.__timelinePositions = None
+        self.__timelineGroupStarts = None
+        self.__nextGroup = 0
+        self.__peekedDateTime = None
 
     def reset(self):
         self.__nextPos = {}
         for instrument in self.__bars.keys():
             self.__nextPos.setdefault(instrument, 0)
         self.__currDateTime = None
+        self.__timelineGroupStarts = None
         super(BaseMemoryBarFeed, self).reset()
 
     def getCurrentDateTime(self):
@@ -57,6 +70,7 @@ class BaseMemoryBarFeed(barfeed.BaseBarFeed):
     def start(self):
         super(BaseMemoryBarFeed, self).start()
         self.__started = True
+        self.__buildTimeline()
 
     def stop(self):
         pass
@@ -64,37 +78,124 @@ class BaseMemoryBarFeed(barfeed.BaseBarFeed):
     def join(self):
         pass
 
-    def addBarsFromSequence(self, instrument, bars):
+    def getUseColumnarStorage(self):
+        return self.__useColumnarStorage
+
+    def setUseColumnarStorage(self, useColumnar):
+        """Holds bars in NumPy arrays, one per column, instead of a list of :class:`quantworks.bar.Bar` objects.
+        Bars get built when they are dispatched. This reduces memory usage significantly for large datasets.
+
+        :param useColumnar: True to use columnar storage.
+        :type useColumnar: boolean.
+
+        .. note::
+            * This has to be set before adding bars.
+            * Only :class:`quantworks.bar.BasicBar` instances (or subclasses with the same constructor) are supported.
+        """
+        if len(self.__bars):
+            raise Exception("Can't change the storage once bars were added")
+        self.__useColumnarStorage = useColumnar
+
+    def __getOrCreateStore(self, instrument):
         if self.__started:
             raise Exception("Can't add more bars once you started consuming bars")
 
-        self.__bars.setdefault(instrument, [])
-        self.__nextPos.setdefault(instrument, 0)
+        ret = self.__bars.get(instrument)
+        if ret is None:
+            if self.__useColumnarStorage:
+                ret = barstore.ColumnarBarStore()
+            else:
+                ret = barstore.ListBarStore()
+            self.__bars[instrument] = ret
+            self.__nextPos[instrument] = 0
+        # The timeline needs to be rebuilt to include the new bars.
+        self.__timelineGroupStarts = None
+        return ret
+
+    def getBarStore(self, instrument):
+        """Returns the :class:`quantworks.barfeed.barstore.BarStore` for a given instrument, or None."""
+        return self.__bars.get(instrument)
 
+    def addBarsFromSequence(self, instrument, bars):
         # Add and sort the bars
-        self.__bars[instrument].extend(bars)
-        self.__bars[instrument].sort(key=lambda b: b.getDateTime())
+        self.__getOrCreateStore(instrument).addBars(bars)
+        self.registerInstrument(instrument)
 
+    def addBarsFromColumns(self, instrument, dateTimes, open_, high, low, close, volume, adjClose=None, tzInfo=None, extra={}):
+        """Adds bars supplied as columns (sequences or numpy.array) for a given instrument.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param dateTimes: The bar datetimes as int64 nanoseconds since the epoch. Naive datetimes are treated as UTC.
+        :param open_: The open prices.
+        :param high: The high prices.
+        :param low: The low prices.
+        :param close: The close prices.
+        :param volume: The volume.
+        :param adjClose: The adjusted close prices, or None. NaN marks a missing value.
+        :param tzInfo: The tzinfo used to build datetimes, or None to build naive datetimes.
+        :param extra: A dict of column name to a sequence of values for extra columns.
+        :type extra: dict.
+        """
+        self.__getOrCreateStore(instrument).addColumns(
+            dateTimes, open_, high, low, close, volume, adjClose, self.getFrequency(), tzInfo, extra
+        )
         self.registerInstrument(instrument)
 
-    def eof(self):
-        ret = True
-        # Check if there is at least one more bar to return.
-        for instrument, bars in six.iteritems(self.__bars):
+    def __buildTimeline(self):
+        # Merge the pending bars from every instrument into a single timeline sorted by datetime (and by instrument
+        # registration order for bars with the same datetime). Entries are grouped by distinct datetimes.
+        instruments = list(self.__bars.keys())
+        timestamps = []
+        instrumentIdxs = []
+        positions = []
+        for i, instrument in enumerate(instruments):
+            store = self.__bars[instrument]
             nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars):
-                ret = False
-                break
-        return ret
+            timestamps.append(store.getTimestamps()[nextPos:])
+            instrumentIdxs.append(np.full(len(store) - nextPos, i, dtype=np.int64))
+            positions.append(np.arange(nextPos, len(store), dtype=np.int64))
+
+        if len(instruments):
+            timestamps = np.concatenate(timestamps)
+            instrumentIdxs = np.concatenate(instrumentIdxs)
+            positions = np.concatenate(positions)
+        else:
+            timestamps = instrumentIdxs = positions = np.empty(0, dtype=np.int64)
+
+        # lexsort is stable so bars with the same datetime for the same instrument keep their order.
+        order = np.lexsort((instrumentIdxs, timestamps))
+        timestamps = timestamps[order]
+        groupStarts = [0]
+        if len(timestamps):
+            groupStarts.extend((np.flatnonzero(timestamps[1:] != timestamps[:-1]) + 1).tolist())
+            groupStarts.append(len(timestamps))
+
+        self.__timelineInstruments = instruments
+        self.__timelineInstrumentIdxs = instrumentIdxs[order]
+        self.__timelinePositions = positions[order]
+        self.__timelineGroupStarts = groupStarts
+        self.__nextGroup = 0
+        self.__peekedDateTime = None
+
+    def __getTimeline(self):
+        if self.__timelineGroupStarts is None:
+            self.__buildTimeline()
+        return self.__timelineGroupStarts
+
+    def eof(self):
+        groupCount = len(self.__getTimeline()) - 1
+        return self.__nextGroup >= groupCount
 
     def peekDateTime(self):
-        ret = None
+        if self.eof():
+            return None
 
-        for instrument, bars in six.iteritems(self.__bars):
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars):
-                ret = utils.safe_min(ret, bars[nextPos].getDateTime())
-        return ret
+        if self.__peekedDateTime is None:
+            pos = self.__timelineGroupStarts[self.__nextGroup]
+            instrument = self.__timelineInstruments[self.__timelineInstrumentIdxs[pos]]
+            self.__peekedDateTime = self.__bars[instrument].getDateTime(self.__timelinePositions[pos])
+        return self.__peekedDateTime
 
     def getNextBars(self):
         # All bars must have the same datetime. We will return all the ones with the smallest datetime.
@@ -103,17 +204,20 @@ class BaseMemoryBarFeed(barfeed.BaseBarFeed):
         if smallestDateTime is None:
             return None
 
-        # Make a second pass to get all the bars that had the smallest datetime.
+        begin = self.__timelineGroupStarts[self.__nextGroup]
+        end = self.__timelineGroupStarts[self.__nextGroup + 1]
         ret = {}
-        for instrument, bars in six.iteritems(self.__bars):
-            nextPos = self.__nextPos[instrument]
-            if nextPos < len(bars) and bars[nextPos].getDateTime() == smallestDateTime:
-                ret[instrument] = bars[nextPos]
-                self.__nextPos[instrument] += 1
-
-        if self.__currDateTime == smallestDateTime:
-            raise Exception("Duplicate bars found for %s on %s" % (list(ret.keys()), smallestDateTime))
-
+        for instrumentIdx, pos in zip(
+            self.__timelineInstrumentIdxs[begin:end].tolist(), self.__timelinePositions[begin:end].tolist()
+        ):
+            instrument = self.__timelineInstruments[instrumentIdx]
+            if instrument in ret:
+                raise Exception("Duplicate bars found for %s on %s" % (list(ret.keys()), smallestDateTime))
+            ret[instrument] = self.__bars[instrument].getBar(pos)
+            self.__nextPos[instrument] = pos + 1
+
+        self.__nextGroup += 1
+        self.__peekedDateTime = None
         self.__currDateTime = smallestDateTime
         return bar.Bars(ret)
 
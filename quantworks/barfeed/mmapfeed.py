@@ -0,0 +1,402 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import heapq
+import json
+import os
+
+import numpy as np
+import pytz
+from six.moves.urllib.parse import quote
+
+from quantworks import bar
+from quantworks import barfeed
+from quantworks.barfeed import dbfeed
+from quantworks.utils import dt
+
+# Every table is a directory with one file per column and a JSON metadata file. Datetimes are stored as int64
+# nanoseconds since the epoch in UTC (naive datetimes are treated as UTC), and the rest of the columns as float64.
+# A missing adjusted close is stored as NaN.
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+DATETIME_COLUMN = "datetime"
+COLUMNS = ("open", "high", "low", "close", "volume", "adj_close")
+
+
+def get_table_path(dirPath, instrument, frequency):
+    return os.path.join(dirPath, "%s-%d" % (quote(instrument, safe=""), frequency))
+
+
+def _get_column_path(tablePath, column):
+    return os.path.join(tablePath, column + ".bin")
+
+
+def _read_meta(tablePath):
+    with open(os.path.join(tablePath, META_FILE), "r") as f:
+        ret = json.load(f)
+    if ret["version"] != FORMAT_VERSION:
+        raise Exception("Unsupported format version %s" % ret["version"])
+    return ret
+
+
+def _write_meta(tablePath, meta):
+    # Replace the file atomically. The count in the metadata file is what makes new rows visible.
+    path = os.path.join(tablePath, META_FILE)
+    tmpPath = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmpPath, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmpPath, path)
+
+
+class BarTable(object):
+    """The bars for an instrument and frequency, memory-mapped from disk.
+    Columns are mapped when the table is opened, so only the pages that are accessed get read.
+
+    :param tablePath: The path to the table directory.
+    :type tablePath: string.
+    """
+
+    def __init__(self, tablePath):
+        meta = _read_meta(tablePath)
+        self.__instrument = meta["instrument"]
+        self.__frequency = meta["frequency"]
+        self.__count = meta["count"]
+        self.__naive = meta["naive"]
+        self.__haveAdjClose = meta["haveAdjClose"]
+        self.__dateTimes = self.__mapColumn(tablePath, DATETIME_COLUMN, "<i8")
+        self.__columns = {column: self.__mapColumn(tablePath, column, "<f8") for column in COLUMNS}
+
+    def __mapColumn(self, tablePath, column, dtype):
+        if self.__count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(_get_column_path(tablePath, column), dtype=dtype, mode="r", shape=(self.__count,))
+
+    def __len__(self):
+        return self.__count
+
+    def getInstrument(self):
+        return self.__instrument
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def isNaive(self):
+        """Returns True if the bars were written with naive datetimes."""
+        return self.__naive
+
+    def haveAdjClose(self):
+        return self.__haveAdjClose
+
+    def getDateTimes(self):
+        """Returns a numpy.array with the datetimes as int64 nanoseconds since the epoch."""
+        return self.__dateTimes
+
+    def getColumn(self, column):
+        """Returns a numpy.array with the values for one of the open, high, low, close, volume or adj_close columns."""
+        ret = self.__columns.get(column)
+        if ret is None:
+            raise Exception("Invalid column %s" % column)
+        return ret
+
+    def getRange(self, fromDateTime=None, toDateTime=None):
+        """Returns the positions for the bars between two datetimes, inclusive, using binary search.
+
+        :rtype: A tuple with the begin and end positions.
+        """
+        begin = 0
+        end = self.__count
+        if fromDateTime is not None:
+            begin = int(np.searchsorted(self.__dateTimes, dt.datetime_to_epoch_ns(fromDateTime), side="left"))
+        if toDateTime is not None:
+            end = int(np.searchsorted(self.__dateTimes, dt.datetime_to_epoch_ns(toDateTime), side="right"))
+        return begin, max(begin, end)
+
+    def getTzInfo(self, timezone=None):
+        """Returns the tzinfo used to build datetimes: the timezone if one is given, None if bars were written with
+        naive datetimes, or UTC otherwise."""
+        if timezone is not None:
+            return timezone
+        if self.__naive:
+            return None
+        return pytz.utc
+
+    def getDateTime(self, pos, tzInfo):
+        return dt.epoch_ns_to_datetime(self.__dateTimes[pos], tzInfo)
+
+    def getBar(self, pos, tzInfo):
+        adjClose = self.__columns["adj_close"][pos].item()
+        if adjClose != adjClose:
+            adjClose = None
+        return bar.BasicBar(
+            self.getDateTime(pos, tzInfo),
+            self.__columns["open"][pos].item(),
+            self.__columns["high"][pos].item(),
+            self.__columns["low"][pos].item(),
+            self.__columns["close"][pos].item(),
+            self.__columns["volume"][pos].item(),
+            adjClose,
+            self.__frequency
+        )
+
+
+class Database(dbfeed.Database):
+    """A directory with one memory-mapped :class:`BarTable` per instrument and frequency.
+
+    Bars are buffered in memory when they are added, and appended to the column files when the buffer for a table
+    reaches flushSize bars or when :meth:`flush` is called.
+
+    :param dirPath: The path to the directory. It gets created if it doesn't exist.
+    :type dirPath: string.
+    :param flushSize: The maximum number of bars to buffer for a table.
+    :type flushSize: int.
+
+    .. note::
+        * Bars for an instrument and frequency must be added in ascending datetime order.
+        * Extra columns are not stored.
+    """
+
+    def __init__(self, dirPath, flushSize=100000):
+        if not os.path.exists(dirPath):
+            os.makedirs(dirPath)
+        self.__dirPath = dirPath
+        self.__flushSize = flushSize
+        # (instrument, frequency) -> list of bars waiting to be written.
+        self.__pending = {}
+        # (instrument, frequency) -> metadata for tables that were written to.
+        self.__meta = {}
+
+    def getDirPath(self):
+        return self.__dirPath
+
+    def __getMeta(self, instrument, frequency):
+        key = (instrument, frequency)
+        ret = self.__meta.get(key)
+        if ret is None:
+            tablePath = get_table_path(self.__dirPath, instrument, frequency)
+            if os.path.exists(os.path.join(tablePath, META_FILE)):
+                ret = _read_meta(tablePath)
+            else:
+                ret = {
+                    "version": FORMAT_VERSION,
+                    "instrument": instrument,
+                    "frequency": frequency,
+                    "count": 0,
+                    "naive": None,
+                    "haveAdjClose": True,
+                    "lastDateTime": None,
+                }
+            self.__meta[key] = ret
+        return ret
+
+    def addBar(self, instrument, bar, frequency):
+        key = (instrument, frequency)
+        pending = self.__pending.setdefault(key, [])
+        pending.append(bar)
+        if len(pending) >= self.__flushSize:
+            self.__flushTable(instrument, frequency)
+
+    def addBarsFromFeed(self, feed):
+        super(Database, self).addBarsFromFeed(feed)
+        self.flush()
+
+    def flush(self):
+        """Writes the buffered bars to disk."""
+        for instrument, frequency in list(self.__pending.keys()):
+            self.__flushTable(instrument, frequency)
+
+    def __flushTable(self, instrument, frequency):
+        bars = self.__pending.pop((instrument, frequency), [])
+        if len(bars) == 0:
+            return
+
+        meta = self.__getMeta(instrument, frequency)
+        dateTimes = np.array([dt.datetime_to_epoch_ns(bar_.getDateTime()) for bar_ in bars], dtype="<i8")
+        naive = dt.datetime_is_naive(bars[0].getDateTime())
+        if any(dt.datetime_is_naive(bar_.getDateTime()) != naive for bar_ in bars) or \
+                meta["naive"] not in (None, naive):
+            raise Exception("Can't mix naive and localized datetimes")
+        if (dateTimes[1:] <= dateTimes[:-1]).any() or \
+                (meta["lastDateTime"] is not None and dateTimes[0] <= meta["lastDateTime"]):
+            raise Exception("Bars for %s must be added in ascending datetime order" % instrument)
+
+        adjClose = np.array([bar_.getAdjClose() for bar_ in bars], dtype=np.float64)
+        columns = {
+            DATETIME_COLUMN: dateTimes,
+            "open": np.array([bar_.getOpen() for bar_ in bars], dtype="<f8"),
+            "high": np.array([bar_.getHigh() for bar_ in bars], dtype="<f8"),
+            "low": np.array([bar_.getLow() for bar_ in bars], dtype="<f8"),
+            "close": np.array([bar_.getClose() for bar_ in bars], dtype="<f8"),
+            "volume": np.array([bar_.getVolume() for bar_ in bars], dtype="<f8"),
+            "adj_close": adjClose.astype("<f8"),
+        }
+
+        tablePath = get_table_path(self.__dirPath, instrument, frequency)
+        if not os.path.exists(tablePath):
+            os.makedirs(tablePath)
+        for column, values in columns.items():
+            path = _get_column_path(tablePath, column)
+            # Drop anything past the rows in the metadata, that may have been left by an interrupted write.
+            if os.path.exists(path):
+                os.truncate(path, meta["count"] * 8)
+            with open(path, "ab") as f:
+                f.write(values.tobytes())
+
+        meta["count"] += len(bars)
+        meta["naive"] = naive
+        meta["haveAdjClose"] = meta["haveAdjClose"] and not np.isnan(adjClose).any()
+        meta["lastDateTime"] = int(dateTimes[-1])
+        _write_meta(tablePath, meta)
+
+    def getTable(self, instrument, frequency):
+        """Returns the :class:`BarTable` for an instrument and frequency, or None if there are no bars.
+        Buffered bars are not included until they are flushed."""
+        tablePath = get_table_path(self.__dirPath, instrument, frequency)
+        if not os.path.exists(os.path.join(tablePath, META_FILE)):
+            return None
+        return BarTable(tablePath)
+
+    def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
+        self.flush()
+        table = self.getTable(instrument, frequency)
+        if table is None:
+            return []
+        begin, end = table.getRange(fromDateTime, toDateTime)
+        tzInfo = table.getTzInfo(timezone)
+        return [table.getBar(pos, tzInfo) for pos in range(begin, end)]
+
+
+class Feed(barfeed.BaseBarFeed):
+    """A BarFeed that dispatches bars straight from the memory-mapped tables in a :class:`Database` directory.
+    Bars are not loaded into memory, so opening a table is fast no matter how many bars it has, and only the pages
+    for the bars that get dispatched are read.
+
+    :param dirPath: The path to the database directory.
+    :type dirPath: string.
+    :param frequency: The bars frequency.
+    :type frequency: :class:`quantworks.bar.Frequency`
+    :param maxLen: The maximum length of the :class:`quantworks.dataseries.bards.BarDataSeries`,
+        see :class:`quantworks.barfeed.BaseBarFeed`.
+    :type maxLen: int
+    """
+
+    def __init__(self, dirPath, frequency, maxLen=None):
+        super(Feed, self).__init__(frequency, maxLen)
+
+        self.__db = Database(dirPath)
+        # One [instrument, table, begin, end, tzInfo] entry per call to loadBars.
+        self.__sources = []
+        self.__positions = []
+        # A heap with the next datetime and source index for each source that has bars left.
+        self.__nextDateTimes = None
+        self.__currDateTime = None
+
+    def getDatabase(self):
+        return self.__db
+
+    def reset(self):
+        self.__nextDateTimes = None
+        self.__currDateTime = None
+        super(Feed, self).reset()
+
+    def loadBars(self, instrument, timezone=None, fromDateTime=None, toDateTime=None):
+        """Loads the bars for an instrument, optionally between two datetimes (inclusive).
+        Only the datetime column is read to find the range, using binary search.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param timezone: The timezone to use for the bars. If None, bars will have naive datetimes if they were written
+            with naive datetimes, and UTC datetimes otherwise.
+        :type timezone: A pytz timezone.
+        :param fromDateTime: The first datetime to load, or None.
+        :type fromDateTime: datetime.datetime.
+        :param toDateTime: The last datetime to load, or None.
+        :type toDateTime: datetime.datetime.
+        """
+        if self.__nextDateTimes is not None:
+            raise Exception("Can't load more bars once bars were dispatched")
+
+        table = self.__db.getTable(instrument, self.getFrequency())
+        if table is not None:
+            begin, end = table.getRange(fromDateTime, toDateTime)
+            self.__sources.append((instrument, table, begin, end, table.getTzInfo(timezone)))
+        self.registerInstrument(instrument)
+
+    def __getNextDateTimes(self):
+        if self.__nextDateTimes is None:
+            self.__positions = [source[2] for source in self.__sources]
+            self.__nextDateTimes = []
+            for i in range(len(self.__sources)):
+                self.__pushNextDateTime(i)
+        return self.__nextDateTimes
+
+    def __pushNextDateTime(self, sourceIdx):
+        _, table, _, end, _ = self.__sources[sourceIdx]
+        pos = self.__positions[sourceIdx]
+        if pos < end:
+            heapq.heappush(self.__nextDateTimes, (int(table.getDateTimes()[pos]), sourceIdx))
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def barsHaveAdjClose(self):
+        return len(self.__sources) > 0 and all(source[1].haveAdjClose() for source in self.__sources)
+
+    def start(self):
+        super(Feed, self).start()
+        self.__getNextDateTimes()
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return len(self.__getNextDateTimes()) == 0
+
+    def peekDateTime(self):
+        nextDateTimes = self.__getNextDateTimes()
+        if len(nextDateTimes) == 0:
+            return None
+        _, sourceIdx = nextDateTimes[0]
+        _, table, _, _, tzInfo = self.__sources[sourceIdx]
+        return table.getDateTime(self.__positions[sourceIdx], tzInfo)
+
+    def getNextBars(self):
+        # Return all the bars with the smallest datetime.
+        smallestDateTime = self.peekDateTime()
+        if smallestDateTime is None:
+            return None
+
+        nextDateTimes = self.__nextDateTimes
+        smallestTimestamp = nextDateTimes[0][0]
+        ret = {}
+        while len(nextDateTimes) and nextDateTimes[0][0] == smallestTimestamp:
+            _, sourceIdx = heapq.heappop(nextDateTimes)
+            instrument, table, _, _, tzInfo = self.__sources[sourceIdx]
+            if instrument in ret:
+                raise Exception("Duplicate bars found for %s on %s" % (instrument, smallestDateTime))
+            ret[instrument] = table.getBar(self.__positions[sourceIdx], tzInfo)
+            self.__positions[sourceIdx] += 1
+            self.__pushNextDateTime(sourceIdx)
+
+        self.__currDateTime = smallestDateTime
+        return bar.Bars(ret)
@@ -22,16 +22,42 @@
 from quantworks.barfeed import dbfeed
 from quantworks.barfeed import membf
 from quantworks import bar
+from quantworks import barfeed
 from quantworks.utils import dt
+import quantworks.logger
 
+import contextlib
 import sqlite3
 import os
+import time
+
+
+logger = quantworks.logger.getLogger(__name__)
+
+# The number of rows written on each transaction by the bulk methods.
+BATCH_SIZE = 10000
+# The number of rows fetched at once when streaming bars.
+FETCH_SIZE = 1000
+
+_BAR_COLUMNS = ["instrument_id", "frequency", "timestamp", "open", "high", "low", "close", "volume", "adj_close"]
 
 
 def normalize_instrument(instrument):
     return instrument.upper()
 
 
+def _get_upsert_sql():
+    sql = "insert into bar (%s) values (%s)" % (", ".join(_BAR_COLUMNS), ", ".join(["?"] * len(_BAR_COLUMNS)))
+    # UPSERT is available since SQLite 3.24. Replacing the row is equivalent since every column gets written.
+    if sqlite3.sqlite_version_info >= (3, 24, 0):
+        sql += " on conflict (instrument_id, frequency, timestamp) do update set %s" % ", ".join(
+            "%s = excluded.%s" % (column, column) for column in _BAR_COLUMNS[3:]
+        )
+    else:
+        sql = sql.replace("insert into", "insert or replace into", 1)
+    return sql
+
+
 class Database(dbfeed.Database):
     
     """SQLite DB on filesystem. Timestamps are stored in UTC.
@@ -42,6 +68,7 @@ class Database(dbfeed.Database):
     
     def __init__(self, dbFilePath):
         self.__instrumentIds = {}
+        self.__upsertSql = _get_upsert_sql()
 
         # If the file doesn't exist, we'll create it and initialize it.
         initialize = False
@@ -99,20 +126,114 @@ class Database(dbfeed.Database):
             ", adj_close real"
             ", primary key (instrument_id, frequency, timestamp))")
 
-    def addBar(self, instrument, bar, frequency):
-        instrument = normalize_instrument(instrument)
-        instrumentId = self.__getOrCreateInstrument(instrument)
+    def createIndexes(self):
+        """Creates the indexes used to stream bars for many instruments ordered by datetime, if they don't exist.
+        They are not created with the schema since keeping them up to date slows down bulk inserts, so call this once
+        after importing bars. :class:`StreamingFeed` calls it when it is created."""
+        self.__connection.execute(
+            "create index if not exists bar_frequency_timestamp on bar (frequency, timestamp, instrument_id)"
+        )
+
+    def __getRow(self, instrument, bar, frequency):
+        instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
         timeStamp = dt.datetime_to_timestamp(bar.getDateTime())
+        return (
+            instrumentId, frequency, timeStamp, bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(),
+            bar.getVolume(), bar.getAdjClose()
+        )
+
+    def __writeRows(self, rows):
+        # A single transaction for all the rows.
+        self.__connection.execute("begin")
+        try:
+            self.__connection.executemany(self.__upsertSql, rows)
+        except Exception:
+            self.__connection.execute("rollback")
+            raise
+        self.__connection.execute("commit")
+
+    def __writeBatches(self, rows, batchSize):
+        # Write rows from an iterable in batches, and return the number of rows written.
+        ret = 0
+        begin = time.time()
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batchSize:
+                self.__writeRows(batch)
+                ret += len(batch)
+                batch = []
+        if len(batch):
+            self.__writeRows(batch)
+            ret += len(batch)
+
+        elapsed = time.time() - begin
+        logger.info("%d rows written in %.2f seconds (%.0f rows/second)" % (ret, elapsed, ret / max(elapsed, 1e-9)))
+        return ret
+
+    def addBar(self, instrument, bar, frequency):
+        self.__connection.execute(self.__upsertSql, self.__getRow(instrument, bar, frequency))
+
+    def addBars(self, bars, frequency):
+        self.__writeRows([self.__getRow(instrument, bar, frequency) for instrument, bar in bars.items()])
+
+    def addBarsFromSequence(self, instrument, bars, frequency, batchSize=BATCH_SIZE):
+        """Writes a sequence of bars for an instrument using one transaction per batch of rows.
 
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param bars: The bars to write.
+        :type bars: A sequence of :class:`quantworks.bar.Bar`.
+        :param frequency: The bars frequency.
+        :type frequency: :class:`quantworks.bar.Frequency`
+        :param batchSize: The number of rows written on each transaction.
+        :type batchSize: int.
+        :rtype: The number of rows written.
+        """
+        return self.__writeBatches((self.__getRow(instrument, bar, frequency) for bar in bars), batchSize)
+
+    def addBarsFromFeed(self, feed, batchSize=BATCH_SIZE):
+        """Writes every bar from a feed using one transaction per batch of rows.
+        Existing bars for the same instrument, frequency and datetime are replaced.
+
+        :param feed: The feed to read bars from.
+        :type feed: :class:`quantworks.barfeed.BaseBarFeed`.
+        :param batchSize: The number of rows written on each transaction.
+        :type batchSize: int.
+        :rtype: The number of rows written.
+        """
+        frequency = feed.getFrequency()
+
+        def get_rows():
+            for dateTime, bars in feed:
+                if bars:
+                    for instrument, bar in bars.items():
+                        yield self.__getRow(instrument, bar, frequency)
+
+        return self.__writeBatches(get_rows(), batchSize)
+
+    @contextlib.contextmanager
+    def importSession(self, synchronous="OFF", journalMode="MEMORY"):
+        """A context manager that relaxes durability for bulk imports, and restores the previous settings on exit.
+        If the process crashes during the session the database may get corrupted, so this is meant for imports that
+        can be repeated. Call :meth:`createIndexes` once the import is done.
+
+        :param synchronous: The value for the synchronous pragma, or None to leave it unchanged.
+        :type synchronous: string.
+        :param journalMode: The value for the journal_mode pragma, or None to leave it unchanged.
+        :type journalMode: string.
+        """
+        prevSynchronous = self.__connection.execute("pragma synchronous").fetchone()[0]
+        prevJournalMode = self.__connection.execute("pragma journal_mode").fetchone()[0]
+        if synchronous is not None:
+            self.__connection.execute("pragma synchronous = %s" % synchronous)
+        if journalMode is not None:
+            self.__connection.execute("pragma journal_mode = %s" % journalMode)
         try:
-            sql = "insert into bar (instrument_id, frequency, timestamp, open, high, low, close, volume, adj_close) values (?, ?, ?, ?, ?, ?, ?, ?, ?)"
-            params = [instrumentId, frequency, timeStamp, bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose()]
-            self.__connection.execute(sql, params)
-        except sqlite3.IntegrityError:
-            sql = "update bar set open = ?, high = ?, low = ?, close = ?, volume = ?, adj_close = ?" \
-                " where instrument_id = ? and frequency = ? and timestamp = ?"
-            params = [bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose(), instrumentId, frequency, timeStamp]
-            self.__connection.execute(sql, params)
+            yield self
+        finally:
+            self.__connection.execute("pragma synchronous = %s" % prevSynchronous)
+            self.__connection.execute("pragma journal_mode = %s" % prevJournalMode)
 
     def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
         instrument = normalize_instrument(instrument)
@@ -133,13 +254,80 @@ class Database(dbfeed.Database):
         cursor.execute(sql, args)
         ret = []
         for row in cursor:
-            dateTime = dt.timestamp_to_datetime(row[0])
-            if timezone:
-                dateTime = dt.localize(dateTime, timezone)
+            dateTime = self.__toDateTime(row[0], timezone)
             ret.append(bar.BasicBar(dateTime, row[1], row[2], row[3], row[4], row[5], row[6], row[7]))
         cursor.close()
         return ret
 
+    def __toDateTime(self, timestamp, timezone):
+        ret = dt.timestamp_to_datetime(timestamp)
+        if timezone:
+            ret = dt.localize(ret, timezone)
+        return ret
+
+    def iterBars(self, instruments, frequency, timezone=None, fromDateTime=None, toDateTime=None, fetchSize=FETCH_SIZE):
+        """Returns a generator that yields (instrument, bar) tuples for many instruments, ordered by datetime and
+        instrument. A single query is used, and rows are fetched fetchSize at a time while the generator is consumed.
+
+        :param instruments: Instrument identifiers, or None for all the instruments.
+        :type instruments: list.
+        :param frequency: The bars frequency.
+        :type frequency: :class:`quantworks.bar.Frequency`
+        :param timezone: The timezone to use to localize bars. If None, bars are in UTC.
+        :type timezone: A pytz timezone.
+        :param fromDateTime: The first datetime to return, or None.
+        :type fromDateTime: datetime.datetime.
+        :param toDateTime: The last datetime to return, or None.
+        :type toDateTime: datetime.datetime.
+        :param fetchSize: The number of rows to fetch at once.
+        :type fetchSize: int.
+        """
+        sql = "select bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.adj_close, bar.frequency" \
+            ", bar.instrument_id from bar where bar.frequency = ?"
+        args = [frequency]
+
+        if instruments is None:
+            instrumentNames = dict(
+                (instrumentId, name) for instrumentId, name in self.__connection.execute(
+                    "select instrument_id, name from instrument"
+                )
+            )
+        else:
+            instrumentNames = {}
+            for instrument in instruments:
+                instrumentId = self.__findInstrumentId(normalize_instrument(instrument))
+                if instrumentId is not None:
+                    instrumentNames[instrumentId] = instrument
+            # Ids are integers from the database, so they are inlined to avoid the limit on the number of variables.
+            sql += " and bar.instrument_id in (%s)" % ", ".join(str(instrumentId) for instrumentId in instrumentNames)
+
+        if fromDateTime is not None:
+            sql += " and bar.timestamp >= ?"
+            args.append(dt.datetime_to_timestamp(fromDateTime))
+        if toDateTime is not None:
+            sql += " and bar.timestamp <= ?"
+            args.append(dt.datetime_to_timestamp(toDateTime))
+        sql += " order by bar.timestamp asc, bar.instrument_id asc"
+
+        cursor = self.__connection.cursor()
+        try:
+            cursor.execute(sql, args)
+            # Rows for the same timestamp are consecutive, so they share the datetime.
+            timestamp = None
+            dateTime = None
+            rows = cursor.fetchmany(fetchSize)
+            while len(rows):
+                for row in rows:
+                    if row[0] != timestamp:
+                        timestamp = row[0]
+                        dateTime = self.__toDateTime(timestamp, timezone)
+                    yield instrumentNames[row[8]], bar.BasicBar(
+                        dateTime, row[1], row[2], row[3], row[4], row[5], row[6], row[7]
+                    )
+                rows = cursor.fetchmany(fetchSize)
+        finally:
+            cursor.close()
+
     def disconnect(self):
         self.__connection.close()
         self.__connection = None
@@ -171,3 +359,120 @@ class Feed(membf.BaseMemoryBarFeed):
     def loadBars(self, instrument, timezone=None, fromDateTime=None, toDateTime=None):
         bars = self.__db.getBars(instrument, self.getFrequency(), timezone, fromDateTime, toDateTime)
         self.addBarsFromSequence(instrument, bars)
+
+
+class StreamingFeed(barfeed.BaseBarFeed):
+
+    """A sqlite-database-backed feed that streams bars for many instruments from a single query ordered by datetime,
+    instead of loading them into memory. Dispatching starts right away, and memory usage doesn't grow with the number
+    of bars.
+
+    :param dbFilePath: the sqlite file path
+    :type dbFilePath: :class:`pathlib.Path` or path-like object
+    :param frequency: the bar frequency
+    :type frequency: :class:`quantworks.bar.Frequency`
+    :param maxLen: the maximum length of the bar dataseries, see :class:`quantworks.barfeed.BaseBarFeed`
+    :type maxLen: int
+    :param fetchSize: the number of rows to fetch at once
+    :type fetchSize: int
+
+    .. note::
+        The index needed to stream bars ordered by datetime gets created if it doesn't exist.
+    """
+
+    def __init__(self, dbFilePath, frequency, maxLen=None, fetchSize=FETCH_SIZE):
+        super(StreamingFeed, self).__init__(frequency, maxLen)
+
+        self.__db = Database(dbFilePath)
+        self.__db.createIndexes()
+        self.__fetchSize = fetchSize
+        self.__query = None
+        self.__rows = None
+        self.__nextRow = None
+        self.__currDateTime = None
+
+    def getDatabase(self):
+        return self.__db
+
+    def reset(self):
+        self.__close()
+        self.__currDateTime = None
+        super(StreamingFeed, self).reset()
+
+    def loadBars(self, instruments, timezone=None, fromDateTime=None, toDateTime=None):
+        """Sets the instruments to stream bars for. Rows are not fetched until bars are needed.
+
+        :param instruments: Instrument identifiers.
+        :type instruments: list.
+        :param timezone: The timezone to use to localize bars. If None, bars are in UTC.
+        :type timezone: A pytz timezone.
+        :param fromDateTime: The first datetime to load, or None.
+        :type fromDateTime: datetime.datetime.
+        :param toDateTime: The last datetime to load, or None.
+        :type toDateTime: datetime.datetime.
+        """
+        if self.__rows is not None:
+            raise Exception("Can't load bars once bars were read")
+        self.__query = (list(instruments), timezone, fromDateTime, toDateTime)
+        for instrument in instruments:
+            self.registerInstrument(instrument)
+
+    def __getNextRow(self):
+        # Start the query the first time a row is needed, and keep the next row around.
+        if self.__rows is None:
+            if self.__query is None:
+                self.__rows = iter([])
+            else:
+                instruments, timezone, fromDateTime, toDateTime = self.__query
+                self.__rows = self.__db.iterBars(
+                    instruments, self.getFrequency(), timezone, fromDateTime, toDateTime, self.__fetchSize
+                )
+            self.__nextRow = next(self.__rows, None)
+        return self.__nextRow
+
+    def __close(self):
+        if self.__rows is not None and hasattr(self.__rows, "close"):
+            self.__rows.close()
+        self.__rows = None
+        self.__nextRow = None
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def barsHaveAdjClose(self):
+        return True
+
+    def start(self):
+        super(StreamingFeed, self).start()
+        self.__getNextRow()
+
+    def stop(self):
+        self.__close()
+        self.__rows = iter([])
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return self.__getNextRow() is None
+
+    def peekDateTime(self):
+        nextRow = self.__getNextRow()
+        if nextRow is None:
+            return None
+        return nextRow[1].getDateTime()
+
+    def getNextBars(self):
+        # Return all the bars with the smallest datetime.
+        smallestDateTime = self.peekDateTime()
+        if smallestDateTime is None:
+            return None
+
+        ret = {}
+        while self.__nextRow is not None and self.__nextRow[1].getDateTime() == smallestDateTime:
+            instrument, bar_ = self.__nextRow
+            ret[instrument] = bar_
+            self.__nextRow = next(self.__rows, None)
+
+        self.__currDateTime = smallestDateTime
+        return bar.Bars(ret)
@@ -92,6 +92,15 @@ class Order(object):
          * Order.Action.SELL_SHORT
     """
 
+    # Lots of orders may get created while backtesting, so slots are used for the order attributes.
+    # __dict__ is only allocated if some other attribute gets set, so orders still support custom attributes
+    # (like order.tag = ...) and weak references.
+    __slots__ = (
+        "__id", "__type", "__action", "__instrument", "__quantity", "__instrumentTraits", "__filled",
+        "__avgFillPrice", "__executionInfo", "__goodTillCanceled", "__commissions", "__allOrNone", "__state",
+        "__submitDateTime", "__dict__", "__weakref__",
+    )
+
     class Action(object):
         BUY = 1
         BUY_TO_COVER = 2
@@ -369,6 +378,8 @@ class MarketOrder(Order):
         This is a base class and should not be used directly.
     """
 
+    __slots__ = ("__onClose",)
+
     def __init__(self, action, instrument, quantity, onClose, instrumentTraits):
         super(MarketOrder, self).__init__(Order.Type.MARKET, action, instrument, quantity, instrumentTraits)
         self.__onClose = onClose
@@ -386,6 +397,8 @@ class LimitOrder(Order):
         This is a base class and should not be used directly.
     """
 
+    __slots__ = ("__limitPrice",)
+
     def __init__(self, action, instrument, limitPrice, quantity, instrumentTraits):
         super(LimitOrder, self).__init__(Order.Type.LIMIT, action, instrument, quantity, instrumentTraits)
         self.__limitPrice = limitPrice
@@ -403,6 +416,8 @@ class StopOrder(Order):
         This is a base class and should not be used directly.
     """
 
+    __slots__ = ("__stopPrice",)
+
     def __init__(self, action, instrument, stopPrice, quantity, instrumentTraits):
         super(StopOrder, self).__init__(Order.Type.STOP, action, instrument, quantity, instrumentTraits)
         self.__stopPrice = stopPrice
@@ -420,6 +435,8 @@ class StopLimitOrder(Order):
         This is a base class and should not be used directly.
     """
 
+    __slots__ = ("__stopPrice", "__limitPrice")
+
     def __init__(self, action, instrument, stopPrice, limitPrice, quantity, instrumentTraits):
         super(StopLimitOrder, self).__init__(Order.Type.STOP_LIMIT, action, instrument, quantity, instrumentTraits)
         self.__stopPrice = stopPrice
@@ -436,6 +453,9 @@ class StopLimitOrder(Order):
 
 class OrderExecutionInfo(object):
     """Execution information for an order."""
+
+    __slots__ = ("__price", "__quantity", "__commission", "__dateTime")
+
     def __init__(self, price, quantity, commission, dateTime):
         self.__price = price
         self.__quantity = quantity
@@ -470,6 +490,8 @@ class OrderEvent(object):
         PARTIALLY_FILLED = 4  # Order has been partially filled.
         FILLED = 5  # Order has been completely filled.
 
+    __slots__ = ("__order", "__eventType", "__eventInfo")
+
     def __init__(self, order, eventyType, eventInfo):
         self.__order = order
         self.__eventType = eventyType
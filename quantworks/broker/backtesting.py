@@ -20,6 +20,7 @@
 """
 
 import abc
+import bisect
 
 import six
 
@@ -98,7 +99,15 @@ class TradePercentage(Commission):
 ######################################################################
 # Orders
 
+def _get_private_slots(cls, *names):
+    # Private attribute names are mangled with the name of the class, and slots for them need the mangled names.
+    return tuple("_%s__%s" % (cls.__name__.lstrip("_"), name) for name in names)
+
+
 class BacktestingOrder(object):
+    # Only one base class can have non-empty slots, so concrete orders have to include _SLOTS in theirs.
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         self.__accepted = None
 
@@ -114,7 +123,12 @@ class BacktestingOrder(object):
         raise NotImplementedError()
 
 
+BacktestingOrder._SLOTS = _get_private_slots(BacktestingOrder, "accepted")
+
+
 class MarketOrder(broker.MarketOrder, BacktestingOrder):
+    __slots__ = BacktestingOrder._SLOTS
+
     def __init__(self, action, instrument, quantity, onClose, instrumentTraits):
         super(MarketOrder, self).__init__(action, instrument, quantity, onClose, instrumentTraits)
 
@@ -123,6 +137,8 @@ class MarketOrder(broker.MarketOrder, BacktestingOrder):
 
 
 class LimitOrder(broker.LimitOrder, BacktestingOrder):
+    __slots__ = BacktestingOrder._SLOTS
+
     def __init__(self, action, instrument, limitPrice, quantity, instrumentTraits):
         super(LimitOrder, self).__init__(action, instrument, limitPrice, quantity, instrumentTraits)
 
@@ -131,6 +147,8 @@ class LimitOrder(broker.LimitOrder, BacktestingOrder):
 
 
 class StopOrder(broker.StopOrder, BacktestingOrder):
+    __slots__ = BacktestingOrder._SLOTS + ("__stopHit",)
+
     def __init__(self, action, instrument, stopPrice, quantity, instrumentTraits):
         super(StopOrder, self).__init__(action, instrument, stopPrice, quantity, instrumentTraits)
         self.__stopHit = False
@@ -148,6 +166,8 @@ class StopOrder(broker.StopOrder, BacktestingOrder):
 # http://www.sec.gov/answers/stoplim.htm
 # http://www.interactivebrokers.com/en/trading/orders/stopLimit.php
 class StopLimitOrder(broker.StopLimitOrder, BacktestingOrder):
+    __slots__ = BacktestingOrder._SLOTS + ("__stopHit",)
+
     def __init__(self, action, instrument, stopPrice, limitPrice, quantity, instrumentTraits):
         super(StopLimitOrder, self).__init__(action, instrument, stopPrice, limitPrice, quantity, instrumentTraits)
         self.__stopHit = False  # Set to true when the limit order is activated (stop price is hit)
@@ -166,6 +186,81 @@ class StopLimitOrder(broker.StopLimitOrder, BacktestingOrder):
         return broker_.getFillStrategy().fillStopLimitOrder(broker_, self, bar_)
 
 
+######################################################################
+# Active orders
+
+class _InstrumentOrders(object):
+    # The active orders for an instrument. Orders that can only be filled once the price reaches a trigger price can
+    # be kept in books sorted by that price, so bars only visit the ones they can trigger.
+
+    def __init__(self):
+        self.__orders = {}  # Order id -> order, in submission order.
+        self.__unbooked = {}  # Order id -> order, for orders that need to be processed on every bar.
+        self.__triggers = {}  # Order id -> (triggeredByLow, price), for booked orders.
+        # Sorted (price, order id) tuples for orders triggered when the bar's low is <= the price.
+        self.__lowBook = []
+        # Sorted (price, order id) tuples for orders triggered when the bar's high is >= the price.
+        self.__highBook = []
+
+    def __len__(self):
+        return len(self.__orders)
+
+    def __getBook(self, triggeredByLow):
+        if triggeredByLow:
+            return self.__lowBook
+        else:
+            return self.__highBook
+
+    def __file(self, order, trigger):
+        if trigger is None:
+            self.__unbooked[order.getId()] = order
+        else:
+            triggeredByLow, price = trigger
+            bisect.insort(self.__getBook(triggeredByLow), (price, order.getId()))
+            self.__triggers[order.getId()] = trigger
+
+    def __unfile(self, order):
+        trigger = self.__triggers.pop(order.getId(), None)
+        if trigger is None:
+            del self.__unbooked[order.getId()]
+        else:
+            triggeredByLow, price = trigger
+            book = self.__getBook(triggeredByLow)
+            key = (price, order.getId())
+            pos = bisect.bisect_left(book, key)
+            assert(book[pos] == key)
+            del book[pos]
+
+    def getOrders(self):
+        return list(self.__orders.values())
+
+    def add(self, order, trigger):
+        # trigger is None or a (triggeredByLow, price) tuple.
+        self.__orders[order.getId()] = order
+        self.__file(order, trigger)
+
+    def remove(self, order):
+        del self.__orders[order.getId()]
+        self.__unfile(order)
+
+    def update(self, order, trigger):
+        if self.__triggers.get(order.getId()) != trigger:
+            self.__unfile(order)
+            self.__file(order, trigger)
+
+    def getOrdersToProcess(self, low, high):
+        # Returns unbooked orders and booked orders triggered by a bar with the given low and high, in no particular
+        # order.
+        ret = list(self.__unbooked.values())
+        if len(self.__lowBook):
+            for price, orderId in self.__lowBook[bisect.bisect_left(self.__lowBook, (low,)):]:
+                ret.append(self.__orders[orderId])
+        if len(self.__highBook):
+            for price, orderId in self.__highBook[:bisect.bisect_right(self.__highBook, (high, float("inf")))]:
+                ret.append(self.__orders[orderId])
+        return ret
+
+
 ######################################################################
 # Broker
 
@@ -193,7 +288,12 @@ class Broker(broker.Broker):
             self.__commission = commission
         self.__shares = {}
         self.__instrumentPrice = {}  # Used by setShares
+        # Positions are marked to market as bars arrive and fills take place, so equity doesn't need to be recalculated.
+        self.__positionValues = {}  # Instrument -> shares * price
+        self.__positionsValue = 0
+        self.__positionUpdates = 0
         self.__activeOrders = {}
+        self.__activeOrdersByInstrument = {}  # Instrument -> _InstrumentOrders
         self.__useAdjustedValues = False
         self.__fillStrategy = fillstrategy.DefaultStrategy()
         self.__logger = logger.getLogger(Broker.LOGGER_NAME)
@@ -220,11 +320,37 @@ class Broker(broker.Broker):
         assert(order.getId() not in self.__activeOrders)
         assert(order.getId() is not None)
         self.__activeOrders[order.getId()] = order
+        instrumentOrders = self.__activeOrdersByInstrument.get(order.getInstrument())
+        if instrumentOrders is None:
+            instrumentOrders = _InstrumentOrders()
+            self.__activeOrdersByInstrument[order.getInstrument()] = instrumentOrders
+        instrumentOrders.add(order, self.__getTrigger(order))
 
     def _unregisterOrder(self, order):
         assert(order.getId() in self.__activeOrders)
         assert(order.getId() is not None)
         del self.__activeOrders[order.getId()]
+        instrumentOrders = self.__activeOrdersByInstrument[order.getInstrument()]
+        instrumentOrders.remove(order)
+        if len(instrumentOrders) == 0:
+            del self.__activeOrdersByInstrument[order.getInstrument()]
+
+    def __getTrigger(self, order):
+        # Returns (triggeredByLow, price) for resting orders that can only be filled once the price reaches a trigger
+        # price, or None if the order needs to be processed on every bar (to get accepted, expire, etc.).
+        if not (order.isAccepted() or order.isPartiallyFilled()) or not order.getGoodTillCanceled():
+            return None
+
+        orderType = order.getType()
+        if orderType == broker.Order.Type.LIMIT or (
+            orderType == broker.Order.Type.STOP_LIMIT and order.getStopHit()
+        ):
+            # Buy limits trigger when the price goes down to the limit price, and sell limits when it goes up.
+            return (order.isBuy(), order.getLimitPrice())
+        elif orderType in (broker.Order.Type.STOP, broker.Order.Type.STOP_LIMIT) and not order.getStopHit():
+            # Buy stops trigger when the price goes up to the stop price, and sell stops when it goes down.
+            return (not order.isBuy(), order.getStopPrice())
+        return None
 
     def getLogger(self):
         return self.__logger
@@ -282,7 +408,8 @@ class Broker(broker.Broker):
         if instrument is None:
             ret = list(self.__activeOrders.values())
         else:
-            ret = [order for order in self.__activeOrders.values() if order.getInstrument() == instrument]
+            instrumentOrders = self.__activeOrdersByInstrument.get(instrument)
+            ret = [] if instrumentOrders is None else instrumentOrders.getOrders()
         return ret
 
     def _getCurrentDateTime(self):
@@ -306,6 +433,7 @@ class Broker(broker.Broker):
         assert not self.__started, "Can't setShares once the strategy started executing"
         self.__shares[instrument] = quantity
         self.__instrumentPrice[instrument] = price
+        self.__markPosition(instrument, self._getPriceForInstrument(instrument))
 
     def getPositions(self):
         return self.__shares
@@ -326,15 +454,40 @@ class Broker(broker.Broker):
 
         return ret
 
+    def __markPosition(self, instrument, price):
+        # Update the value for an instrument's position, and the value for all positions, using the given price.
+        prevValue = self.__positionValues.pop(instrument, 0)
+        shares = self.__shares.get(instrument, 0)
+        value = 0
+        if shares != 0:
+            assert price is not None, "Price for %s is missing" % instrument
+            value = price * shares
+            self.__positionValues[instrument] = value
+        self.__positionsValue += value - prevValue
+
+        # Sum all the values once in a while so rounding errors don't pile up. This is amortized O(1).
+        self.__positionUpdates += 1
+        if self.__positionUpdates > 100 * (len(self.__positionValues) + 1):
+            self.__positionsValue = sum(self.__positionValues.values())
+            self.__positionUpdates = 0
+
+    def __markToMarket(self, bars):
+        # Only positions for instruments with a bar in this event change value.
+        instruments = bars.getInstruments()
+        if len(instruments) > len(self.__shares):
+            instruments = [instrument for instrument in self.__shares if instrument in bars]
+        for instrument in instruments:
+            if instrument in self.__shares:
+                self.__markPosition(instrument, bars[instrument].getPrice())
+
     def getEquity(self):
-        """Returns the portfolio value (cash + shares * price)."""
+        """Returns the portfolio value (cash + shares * price).
 
-        ret = self.getCash()
-        for instrument, shares in six.iteritems(self.__shares):
-            instrumentPrice = self._getPriceForInstrument(instrument)
-            assert instrumentPrice is not None, "Price for %s is missing" % instrument
-            ret += instrumentPrice * shares
-        return ret
+        .. note::
+            Positions are valued as bars arrive and orders get filled, so this doesn't depend on the number of
+            positions.
+        """
+        return self.getCash() + self.__positionsValue
 
     # Tries to commit an order execution.
     def commitOrderExecution(self, order, dateTime, fillInfo):
@@ -373,6 +526,7 @@ class Broker(broker.Broker):
                 del self.__shares[order.getInstrument()]
             else:
                 self.__shares[order.getInstrument()] = updatedShares
+            self.__markPosition(order.getInstrument(), self._getPriceForInstrument(order.getInstrument()))
 
             # Let the strategy know that the order was filled.
             self.__fillStrategy.onOrderFilled(self, order)
@@ -467,17 +621,48 @@ class Broker(broker.Broker):
                 assert(order.isCanceled())
                 assert(order not in self.__activeOrders)
 
+    def __getOrdersToProcess(self, bars):
+        # Only orders for instruments with a bar in this event need processing. Go through the smallest of both sets
+        # of instruments.
+        instruments = bars.getInstruments()
+        if len(instruments) <= len(self.__activeOrdersByInstrument):
+            instruments = [instrument for instrument in instruments if instrument in self.__activeOrdersByInstrument]
+        else:
+            instruments = [instrument for instrument in self.__activeOrdersByInstrument if instrument in bars]
+
+        # Resting limit and stop orders that the bar can't trigger can be skipped if the fill strategy won't fill them.
+        useBooks = self.__fillStrategy.fillsOnlyTouchedOrders()
+        ret = []
+        for instrument in instruments:
+            instrumentOrders = self.__activeOrdersByInstrument[instrument]
+            if useBooks:
+                bar_ = bars[instrument]
+                ret.extend(instrumentOrders.getOrdersToProcess(
+                    bar_.getLow(self.__useAdjustedValues), bar_.getHigh(self.__useAdjustedValues)
+                ))
+            else:
+                ret.extend(instrumentOrders.getOrders())
+        # Process orders in submission order, as if every active order was checked.
+        ret.sort(key=lambda order: order.getId())
+        return ret
+
     def onBars(self, dateTime, bars):
+        # Mark positions to market before processing orders.
+        self.__markToMarket(bars)
+
         # Let the fill strategy know that new bars are being processed.
         self.__fillStrategy.onBars(self, bars)
 
         # This is to froze the orders that will be processed in this event, to avoid new getting orders introduced
         # and processed on this very same event.
-        ordersToProcess = list(self.__activeOrders.values())
+        ordersToProcess = self.__getOrdersToProcess(bars)
 
         for order in ordersToProcess:
             # This may trigger orders to be added/removed from __activeOrders.
             self.__onBarsImpl(order, bars)
+            # Orders may need to move in or out of the trigger books after getting accepted or hitting the stop price.
+            if order.getId() in self.__activeOrders:
+                self.__activeOrdersByInstrument[order.getInstrument()].update(order, self.__getTrigger(order))
 
     def start(self):
         super(Broker, self).start()
@@ -94,6 +94,8 @@ def get_stop_price_trigger(action, stopPrice, useAdjustedValues, bar):
 
 
 class FillInfo(object):
+    __slots__ = ("__price", "__quantity")
+
     def __init__(self, price, quantity):
         self.__price = price
         self.__quantity = quantity
@@ -131,6 +133,23 @@ class FillStrategy(object):
         """
         pass
 
+    def fillsOnlyTouchedOrders(self):
+        """
+        Override (optional) to return True if limit and stop orders that are accepted and good till canceled are left
+        untouched on bars that don't reach their limit or stop price, like :class:`DefaultStrategy` does. This allows
+        the broker to skip those orders instead of processing every active order on every bar.
+
+        A buy limit order or a sell stop order is reached if the bar's low is <= its price, and a sell limit order or a
+        buy stop order is reached if the bar's high is >= its price. Stop limit orders use the stop price until it gets
+        hit, and the limit price after that.
+
+        :class:`DefaultStrategy` returns True unless a subclass overrides how limit, stop or stop limit orders get
+        filled.
+
+        :rtype: boolean.
+        """
+        return False
+
     @abc.abstractmethod
     def fillMarketOrder(self, broker_, order, bar):
         """Override to return the fill price and quantity for a market order or None if the order can't be filled
@@ -253,6 +272,14 @@ class DefaultStrategy(FillStrategy):
 
         self.__volumeLeft = volumeLeft
 
+    def fillsOnlyTouchedOrders(self):
+        # Subclasses that override how limit and stop orders get filled may fill orders that the bar didn't reach, so
+        # they have to override this method to opt in.
+        cls = type(self)
+        return cls.fillLimitOrder is DefaultStrategy.fillLimitOrder and \
+            cls.fillStopOrder is DefaultStrategy.fillStopOrder and \
+            cls.fillStopLimitOrder is DefaultStrategy.fillStopLimitOrder
+
     def getVolumeLeft(self):
         return self.__volumeLeft
 
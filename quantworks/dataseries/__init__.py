@@ -21,11 +21,13 @@
 
 import abc
 
+import numpy as np
 import six
 from six.moves import xrange
 
 from quantworks import observer
 from quantworks.utils import collections
+from quantworks.utils import dt
 
 DEFAULT_MAX_LEN = 1024
 
@@ -149,3 +151,186 @@ class SequenceDataSeries(DataSeries):
 
     def getDateTimes(self):
         return self.__dateTimes.data()
+
+
+# Used to store None datetimes in NumericSequenceDataSeries.
+NO_DATETIME = np.iinfo(np.int64).min
+
+
+def get_timestamp(dateTime):
+    """Converts a datetime, or None, to the int64 timestamp used by :class:`NumericSequenceDataSeries`."""
+    if dateTime is None:
+        return NO_DATETIME
+    return dt.datetime_to_epoch_ns(dateTime)
+
+
+def _get_buffer_len(maxLen):
+    # Some room is left after the last value so values are only moved to the beginning of the buffer every once in a
+    # while, instead of on every append.
+    return maxLen + max(maxLen // 16, 1)
+
+
+class NumericSequenceDataSeries(DataSeries):
+    """A DataSeries that holds numeric values in a NumPy array, and datetimes as int64 nanoseconds since the epoch.
+
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param dtype: The data-type for the values. Either float or int.
+    :type dtype: data-type.
+    :param nanAsNone: True to return NaN values as None. Only valid with a float dtype.
+    :type nanAsNone: boolean.
+
+    .. note::
+        * With a float dtype, None values are stored as NaN.
+        * Values are returned as Python numbers. Use :meth:`asarray` to get the values as a numpy.array.
+        * Datetimes are converted back from the timestamps, so they are truncated to microseconds and all of them
+          use the timezone of the last one appended.
+    """
+
+    def __init__(self, maxLen=None, dtype=np.float64, nanAsNone=False):
+        super(NumericSequenceDataSeries, self).__init__()
+        maxLen = get_checked_max_len(maxLen)
+        isFloat = np.issubdtype(np.dtype(dtype), np.floating)
+        assert isFloat or not nanAsNone, "nanAsNone is only supported with a float dtype"
+
+        self.__newValueEvent = observer.Event()
+        self.__isFloat = isFloat
+        self.__nanAsNone = nanAsNone
+        self.__maxLen = maxLen
+        # Values and timestamps are stored in values[begin:end] and timestamps[begin:end].
+        self.__values = np.empty(_get_buffer_len(maxLen), dtype=dtype)
+        self.__timestamps = np.empty(_get_buffer_len(maxLen), dtype=np.int64)
+        self.__begin = 0
+        self.__end = 0
+        self.__lastTimestamp = NO_DATETIME
+        self.__tzInfo = None
+
+    def __toPython(self, value):
+        ret = value.item()
+        if self.__nanAsNone and ret != ret:
+            ret = None
+        return ret
+
+    def __len__(self):
+        return self.__end - self.__begin
+
+    def __getitem__(self, key):
+        if key.__class__ is int:
+            length = self.__end - self.__begin
+            if key < 0:
+                key += length
+            if key < 0 or key >= length:
+                raise IndexError("Index out of range")
+            return self.__toPython(self.__values[self.__begin + key])
+        elif isinstance(key, slice):
+            ret = self.asarray()[key].tolist()
+            if self.__nanAsNone:
+                ret = [None if value != value else value for value in ret]
+            return ret
+        return self.__toPython(self.asarray()[key])
+
+    def setMaxLen(self, maxLen):
+        """Sets the maximum number of values to hold and resizes accordingly if necessary."""
+        assert maxLen > 0, "Invalid maximum length"
+
+        count = min(maxLen, len(self))
+        values = np.empty(_get_buffer_len(maxLen), dtype=self.__values.dtype)
+        values[:count] = self.__values[self.__end - count:self.__end]
+        timestamps = np.empty(_get_buffer_len(maxLen), dtype=np.int64)
+        timestamps[:count] = self.__timestamps[self.__end - count:self.__end]
+
+        self.__values = values
+        self.__timestamps = timestamps
+        self.__maxLen = maxLen
+        self.__begin = 0
+        self.__end = count
+
+    def getMaxLen(self):
+        """Returns the maximum number of values to hold."""
+        return self.__maxLen
+
+    # Event handler receives:
+    # 1: Dataseries generating the event
+    # 2: The datetime for the new value
+    # 3: The new value
+    def getNewValueEvent(self):
+        return self.__newValueEvent
+
+    def getValueAbsolute(self, pos):
+        ret = None
+        if pos >= 0 and pos < len(self):
+            ret = self.__toPython(self.__values[self.__begin + pos])
+        return ret
+
+    def append(self, value):
+        """Appends a value."""
+        self.appendWithTimestamp(None, NO_DATETIME, value)
+
+    def appendWithDateTime(self, dateTime, value):
+        """
+        Appends a value with an associated datetime.
+
+        .. note::
+            If dateTime is not None, it must be greater than the last one.
+        """
+
+        self.appendWithTimestamp(dateTime, get_timestamp(dateTime), value)
+
+    def appendWithTimestamp(self, dateTime, timestamp, value):
+        """
+        Same as :meth:`appendWithDateTime`, but with the datetime already converted using
+        :func:`get_timestamp`. This is useful to convert the datetime only once when appending it to many
+        dataseries.
+        """
+
+        if timestamp != NO_DATETIME:
+            if timestamp <= self.__lastTimestamp:
+                raise Exception("Invalid datetime. It must be bigger than that last one")
+            self.__tzInfo = dateTime.tzinfo
+        self.__lastTimestamp = timestamp
+
+        storedValue = value
+        if value is None:
+            if not self.__isFloat:
+                raise Exception("None values are only supported with a float dtype")
+            storedValue = np.nan
+
+        end = self.__end
+        if end == len(self.__values):
+            # Move the values to the beginning of the buffer to make room.
+            count = end - self.__begin
+            self.__values[:count] = self.__values[self.__begin:end]
+            self.__timestamps[:count] = self.__timestamps[self.__begin:end]
+            self.__begin = 0
+            end = count
+        self.__values[end] = storedValue
+        self.__timestamps[end] = timestamp
+        self.__end = end + 1
+        if self.__end - self.__begin > self.__maxLen:
+            self.__begin += 1
+
+        self.__newValueEvent.emit(self, dateTime, value)
+
+    def getDateTimes(self):
+        timestamps = self.getTimestamps()
+        missing = timestamps == NO_DATETIME
+        if not missing.any():
+            return dt.epoch_ns_to_datetimes(timestamps, self.__tzInfo)
+
+        ret = [None] * len(timestamps)
+        positions = np.flatnonzero(~missing).tolist()
+        for pos, dateTime in zip(positions, dt.epoch_ns_to_datetimes(timestamps[~missing], self.__tzInfo)):
+            ret[pos] = dateTime
+        return ret
+
+    def asarray(self):
+        """Returns a numpy.array with the values. This is a view, not a copy, so it should not be modified and it
+        is only valid until the next value is appended."""
+        return self.__values[self.__begin:self.__end]
+
+    def getTimestamps(self):
+        """Returns a numpy.array with the datetimes as int64 nanoseconds since the epoch. This is a view, not a copy,
+        so it should not be modified and it is only valid until the next value is appended."""
+        return self.__timestamps[self.__begin:self.__end]
@@ -35,12 +35,13 @@ class BarDataSeries(dataseries.SequenceDataSeries):
 
     def __init__(self, maxLen=None):
         super(BarDataSeries, self).__init__(maxLen)
-        self.__openDS = dataseries.SequenceDataSeries(maxLen)
-        self.__closeDS = dataseries.SequenceDataSeries(maxLen)
-        self.__highDS = dataseries.SequenceDataSeries(maxLen)
-        self.__lowDS = dataseries.SequenceDataSeries(maxLen)
-        self.__volumeDS = dataseries.SequenceDataSeries(maxLen)
-        self.__adjCloseDS = dataseries.SequenceDataSeries(maxLen)
+        self.__openDS = dataseries.NumericSequenceDataSeries(maxLen)
+        self.__closeDS = dataseries.NumericSequenceDataSeries(maxLen)
+        self.__highDS = dataseries.NumericSequenceDataSeries(maxLen)
+        self.__lowDS = dataseries.NumericSequenceDataSeries(maxLen)
+        self.__volumeDS = dataseries.NumericSequenceDataSeries(maxLen)
+        # A missing adjusted close is None, just like in the bars.
+        self.__adjCloseDS = dataseries.NumericSequenceDataSeries(maxLen, nanAsNone=True)
         self.__extraDS = {}
         self.__useAdjustedValues = False
 
@@ -64,12 +65,14 @@ class BarDataSeries(dataseries.SequenceDataSeries):
 
         super(BarDataSeries, self).appendWithDateTime(dateTime, bar)
 
-        self.__openDS.appendWithDateTime(dateTime, bar.getOpen())
-        self.__closeDS.appendWithDateTime(dateTime, bar.getClose())
-        self.__highDS.appendWithDateTime(dateTime, bar.getHigh())
-        self.__lowDS.appendWithDateTime(dateTime, bar.getLow())
-        self.__volumeDS.appendWithDateTime(dateTime, bar.getVolume())
-        self.__adjCloseDS.appendWithDateTime(dateTime, bar.getAdjClose())
+        # Convert the datetime only once for all the numeric dataseries.
+        timestamp = dataseries.get_timestamp(dateTime)
+        self.__openDS.appendWithTimestamp(dateTime, timestamp, bar.getOpen())
+        self.__closeDS.appendWithTimestamp(dateTime, timestamp, bar.getClose())
+        self.__highDS.appendWithTimestamp(dateTime, timestamp, bar.getHigh())
+        self.__lowDS.appendWithTimestamp(dateTime, timestamp, bar.getLow())
+        self.__volumeDS.appendWithTimestamp(dateTime, timestamp, bar.getVolume())
+        self.__adjCloseDS.appendWithTimestamp(dateTime, timestamp, bar.getAdjClose())
 
         # Process extra columns.
         for name, value in six.iteritems(bar.getExtraColumns()):
@@ -19,6 +19,9 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import heapq
+import bisect
+
 from quantworks import utils
 from quantworks import observer
 from quantworks import dispatchprio
@@ -26,13 +29,26 @@ from quantworks import dispatchprio
 
 class Dispatcher(object):
     """Responsible for dispatching events from multiple subjects, synchronizing them if necessary.
+
+    :param useHeapScheduling: True to keep non-realtime subjects in a priority queue keyed by their next datetime
+        instead of scanning every subject on each iteration.
+    :type useHeapScheduling: boolean.
+
+    .. note::
+        When heap scheduling is enabled, the datetime returned by a non-realtime subject's peekDateTime() is expected
+        to remain the same until that subject gets dispatched.
     """
-    def __init__(self):
+    def __init__(self, useHeapScheduling=False):
         self.__subjects = []
         self.__stop = False
         self.__startEvent = observer.Event()
         self.__idleEvent = observer.Event()
         self.__currDateTime = None
+        self.__useHeapScheduling = useHeapScheduling
+        # Heap scheduling state.
+        self.__scheduled = []  # Heap of (datetime, position, subject) for non-realtime subjects.
+        self.__realtime = []  # Sorted list of (position, subject) for realtime subjects.
+        self.__scheduleStale = True
 
     def getCurrentDateTime(self):
         """Returns the current event datetime. It may be None for events from realtime subjects.
@@ -48,6 +64,13 @@ class Dispatcher(object):
     def stop(self):
         self.__stop = True
 
+    def getUseHeapScheduling(self):
+        return self.__useHeapScheduling
+
+    def setUseHeapScheduling(self, useHeapScheduling):
+        self.__useHeapScheduling = useHeapScheduling
+        self.__scheduleStale = True
+
     def getSubjects(self):
         return self.__subjects
 
@@ -70,6 +93,8 @@ class Dispatcher(object):
                 pos += 1
             self.__subjects.insert(pos, subject)
 
+        # Positions changed so the schedule needs to be rebuilt.
+        self.__scheduleStale = True
         subject.onDispatcherRegistered(self)
 
     def __dispatchSubject(self, subject, currEventDateTime):
@@ -103,6 +128,74 @@ class Dispatcher(object):
                     eventsDispatched = True
         return eof, eventsDispatched
 
+    def __schedule(self, pos, subject):
+        """Puts a subject either in the heap, if it has a datetime for the next event, or in the realtime list.
+        Returns False if the subject hit eof.
+        """
+        if subject.eof():
+            return False
+        dateTime = subject.peekDateTime()
+        if dateTime is None:
+            bisect.insort(self.__realtime, (pos, subject))
+        else:
+            heapq.heappush(self.__scheduled, (dateTime, pos, subject))
+        return True
+
+    def __buildSchedule(self):
+        self.__scheduled = []
+        self.__realtime = []
+        for pos, subject in enumerate(self.__subjects):
+            # Subjects that are initially at eof are kept in the realtime list since they may get events later on.
+            if not self.__schedule(pos, subject):
+                self.__realtime.append((pos, subject))
+        self.__scheduleStale = False
+
+    def __dispatchScheduled(self):
+        """Same as __dispatch but using the heap instead of scanning every subject.
+        """
+        if self.__scheduleStale:
+            self.__buildSchedule()
+
+        eof = True
+        eventsDispatched = False
+
+        # Realtime subjects that now have a datetime for the next event get moved to the heap.
+        realtime = []
+        for pos, subject in self.__realtime:
+            if not subject.eof():
+                eof = False
+                dateTime = subject.peekDateTime()
+                if dateTime is not None:
+                    heapq.heappush(self.__scheduled, (dateTime, pos, subject))
+                    continue
+            realtime.append((pos, subject))
+        self.__realtime = realtime
+
+        # Pop the subjects with the lowest datetime.
+        smallestDateTime = None
+        due = []
+        if len(self.__scheduled):
+            eof = False
+            smallestDateTime = self.__scheduled[0][0]
+            while len(self.__scheduled) and self.__scheduled[0][0] == smallestDateTime:
+                _, pos, subject = heapq.heappop(self.__scheduled)
+                due.append((pos, subject))
+
+        # Dispatch realtime subjects and those subjects with the lowest datetime, respecting priorities.
+        if not eof:
+            self.__currDateTime = smallestDateTime
+
+            for pos, subject in heapq.merge(realtime, due):
+                if self.__dispatchSubject(subject, smallestDateTime):
+                    eventsDispatched = True
+
+            # Reschedule the subjects that were due. Those that hit eof are kept in the realtime list, just like in
+            # __buildSchedule, since they may get events later on.
+            for pos, subject in due:
+                if not self.__schedule(pos, subject):
+                    bisect.insort(self.__realtime, (pos, subject))
+        return eof, eventsDispatched
+
     def run(self):
         """Start all subjects, run start event, then dispatch all subjects repeatedly until 
         all eof. Emits idleEvent if no events dispatched in an interation.
@@ -112,9 +205,13 @@ class Dispatcher(object):
                 subject.start()
 
             self.__startEvent.emit()
+            self.__scheduleStale = True
 
             while not self.__stop:
-                eof, eventsDispatched = self.__dispatch()
+                if self.__useHeapScheduling:
+                    eof, eventsDispatched = self.__dispatchScheduled()
+                else:
+                    eof, eventsDispatched = self.__dispatch()
                 if eof:
                     self.__stop = True
                 elif not eventsDispatched:
@@ -122,6 +219,8 @@ class Dispatcher(object):
         finally:
             # There are no more events.
             self.__currDateTime = None
+            self.__scheduled = []
+            self.__realtime = []
 
             for subject in self.__subjects:
                 subject.stop()
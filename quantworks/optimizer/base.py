@@ -19,10 +19,13 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import heapq
 import threading
 
 import six
 
+from quantworks.optimizer import resultsfile
+
 
 class Parameters(object):
     def __init__(self, *args, **kwargs):
@@ -73,13 +76,27 @@ class ParameterSource(object):
 class ResultSinc(object):
     """
     Sinc for backtest results. This class is thread safe.
+
+    :param topK: The number of best results to keep, or None to keep only the best one.
+    :type topK: int
+    :param resultsPath: A path to a file where every result will be appended, or None.
+        Use :func:`quantworks.optimizer.resultsfile.read_results` to load them.
+    :type resultsPath: string
     """
-    def __init__(self):
+    def __init__(self, topK=None, resultsPath=None):
+        assert topK is None or topK > 0, "Invalid topK"
         self.__lock = threading.Lock()
         self.__bestResult = None
         self.__bestParameters = None
-
-    def push(self, result, parameters):
+        self.__topK = topK
+        # Min-heap with the best results. Among equal results, the first ones pushed are kept.
+        self.__topResults = []
+        self.__resultCount = 0
+        self.__resultsWriter = None
+        if resultsPath is not None:
+            self.__resultsWriter = resultsfile.ResultsWriter(resultsPath)
+
+    def push(self, result, parameters, runtime=None):
         """
         Push strategy results obtained by running the strategy with the given parameters.
 
@@ -87,9 +104,20 @@ class ResultSinc(object):
         :type result: float
         :param parameters: The parameters that yield the given result.
         :type parameters: Parameters
+        :param runtime: The number of seconds it took to run the strategy, if available.
+        :type runtime: float
         """
         with self.__lock:
+            self.__resultCount += 1
+            if self.__resultsWriter is not None:
+                self.__resultsWriter.append(parameters.args, result, runtime)
             self.onNewResult(result, parameters)
+            if result is not None and self.__topK is not None:
+                entry = (result, -self.__resultCount, parameters)
+                if len(self.__topResults) < self.__topK:
+                    heapq.heappush(self.__topResults, entry)
+                elif entry[:2] > self.__topResults[0][:2]:
+                    heapq.heapreplace(self.__topResults, entry)
             if result is not None and (self.__bestResult is None or result > self.__bestResult):
                 self.__bestResult = result
                 self.__bestParameters = parameters
@@ -100,6 +128,36 @@ class ResultSinc(object):
             ret = self.__bestResult, self.__bestParameters
         return ret
 
+    def getTopResults(self):
+        """
+        Returns a list of (result, parameters) tuples with the best results, sorted from best to worst.
+        If topK was not set, only the best result is returned.
+        """
+        with self.__lock:
+            if self.__topK is None:
+                ret = [] if self.__bestResult is None else [(self.__bestResult, self.__bestParameters)]
+            else:
+                ret = [(result, parameters) for result, _, parameters in sorted(self.__topResults, reverse=True)]
+        return ret
+
+    def getResultCount(self):
+        """Returns the number of results pushed, including those that were None."""
+        with self.__lock:
+            return self.__resultCount
+
+    def flush(self):
+        """Writes buffered results to the results file."""
+        with self.__lock:
+            if self.__resultsWriter is not None:
+                self.__resultsWriter.flush()
+
+    def close(self):
+        """Writes buffered results and closes the results file."""
+        with self.__lock:
+            if self.__resultsWriter is not None:
+                self.__resultsWriter.close()
+                self.__resultsWriter = None
+
     def onNewResult(self, result, parameters):
         pass
 
@@ -0,0 +1,230 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import collections
+import hashlib
+
+import numpy as np
+
+from quantworks import dataseries
+
+
+# Column name -> function to get the value from a bar.
+COLUMNS = {
+    "open": lambda bar: bar.getOpen(),
+    "high": lambda bar: bar.getHigh(),
+    "low": lambda bar: bar.getLow(),
+    "close": lambda bar: bar.getClose(),
+    "volume": lambda bar: bar.getVolume(),
+    "adj_open": lambda bar: bar.getOpen(True),
+    "adj_high": lambda bar: bar.getHigh(True),
+    "adj_low": lambda bar: bar.getLow(True),
+    "adj_close": lambda bar: bar.getAdjClose(),
+}
+
+
+def fingerprint(values):
+    """Returns a string that identifies the contents of a numpy.array."""
+    values = np.ascontiguousarray(values)
+    ret = hashlib.sha1(str(values.dtype).encode())
+    ret.update(values.data)
+    return ret.hexdigest()
+
+
+def _freeze(value):
+    # Turns lists (like WMA weights) into tuples so they can be used as part of a key.
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    elif isinstance(value, np.ndarray):
+        return tuple(value.tolist())
+    return value
+
+
+class BarColumns(object):
+    """Columnar view of the bars supplied to a worker.
+
+    Values for each instrument and column are extracted only once, together with their fingerprint.
+
+    :param instruments: The instruments.
+    :type instruments: list.
+    :param bars: A sequence of :class:`quantworks.bar.Bars`, sorted by datetime.
+    :type bars: list.
+
+    .. note::
+        Values for an instrument are aligned with the values in the feed's
+        :class:`quantworks.dataseries.bards.BarDataSeries` for that instrument.
+    """
+
+    def __init__(self, instruments, bars):
+        self.__instruments = instruments
+        self.__bars = bars
+        self.__values = {}
+        self.__fingerprints = {}
+
+    def getInstruments(self):
+        return self.__instruments
+
+    def getValues(self, instrument, column):
+        """Returns a numpy.array with the values for a given instrument and column.
+        Missing values are set to NaN.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param column: The column name. One of open, high, low, close, volume, adj_open, adj_high, adj_low, adj_close.
+        :type column: string.
+        """
+        key = (instrument, column)
+        ret = self.__values.get(key)
+        if ret is None:
+            if column not in COLUMNS:
+                raise Exception("Invalid column %s" % column)
+            ret = self.loadValues(instrument, column)
+            ret.setflags(write=False)
+            self.__values[key] = ret
+        return ret
+
+    def loadValues(self, instrument, column):
+        """Override to change how values are extracted from the bars."""
+        getter = COLUMNS[column]
+        values = [getter(bars[instrument]) for bars in self.__bars if instrument in bars]
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    def getFingerprint(self, instrument, column):
+        """Returns a string that identifies the values for a given instrument and column."""
+        key = (instrument, column)
+        ret = self.__fingerprints.get(key)
+        if ret is None:
+            ret = fingerprint(self.getValues(instrument, column))
+            self.__fingerprints[key] = ret
+        return ret
+
+
+class IndicatorCache(object):
+    """Cache for indicator values calculated with the batch API of the :mod:`quantworks.technical` filters.
+
+    Entries are keyed by instrument, source columns, indicator class, parameters and data fingerprint.
+    Once full, the least recently used entries are evicted.
+
+    :param maxSize: The maximum number of indicators to hold.
+    :type maxSize: int.
+    """
+
+    def __init__(self, maxSize=128):
+        assert maxSize > 0, "Invalid cache size"
+        self.__maxSize = maxSize
+        self.__entries = collections.OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def getMaxSize(self):
+        return self.__maxSize
+
+    def getHits(self):
+        """Returns the number of lookups that were served from the cache."""
+        return self.__hits
+
+    def getMisses(self):
+        """Returns the number of lookups that required calculating the indicator."""
+        return self.__misses
+
+    def clear(self):
+        self.__entries.clear()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key, calculate):
+        """Returns the value for a key, calling calculate() to build it if not found.
+
+        :param key: A hashable key.
+        :param calculate: A function with no arguments that calculates the value.
+        """
+        try:
+            ret = self.__entries[key]
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+        except KeyError:
+            self.__misses += 1
+            ret = calculate()
+            self.__entries[key] = ret
+            if len(self.__entries) > self.__maxSize:
+                self.__entries.popitem(last=False)
+        return ret
+
+    def getIndicatorValues(self, barColumns, instrument, columns, indicatorClass, *parameters):
+        """Returns the values for an indicator, calculating them with indicatorClass.batch if they were not cached.
+
+        :param barColumns: The source of values.
+        :type barColumns: :class:`BarColumns`.
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param columns: The column name, or a sequence with the column names, that are fed to indicatorClass.batch.
+        :type columns: string or tuple.
+        :param indicatorClass: The filter class. Must have a batch static method.
+        :param parameters: The filter parameters, in the order used by the batch method.
+        :rtype: Whatever indicatorClass.batch returns.
+        """
+        if not isinstance(columns, (list, tuple)):
+            columns = (columns,)
+        columns = tuple(columns)
+        dataFingerprint = tuple(barColumns.getFingerprint(instrument, column) for column in columns)
+        key = (instrument, columns, indicatorClass, _freeze(parameters), dataFingerprint)
+
+        def calculate():
+            values = [barColumns.getValues(instrument, column) for column in columns]
+            return indicatorClass.batch(*(values + list(parameters)))
+
+        return self.get(key, calculate)
+
+
+class PrecomputedSeries(dataseries.SequenceDataSeries):
+    """A DataSeries that replays precomputed values as new values are added to another DataSeries.
+
+    :param dataSeries: The DataSeries that drives the replay.
+    :type dataSeries: :class:`quantworks.dataseries.DataSeries`.
+    :param values: The precomputed values, aligned with the values that will be added to dataSeries.
+        NaN values are replayed as None.
+    :type values: numpy.array.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        This should be built before values are added to dataSeries.
+    """
+
+    def __init__(self, dataSeries, values, maxLen=None):
+        super(PrecomputedSeries, self).__init__(maxLen)
+        self.__values = values
+        self.__nextPos = 0
+        dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
+
+    def __onNewValue(self, dataSeries, dateTime, value):
+        newValue = self.__values[self.__nextPos]
+        self.__nextPos += 1
+        if isinstance(newValue, np.generic):
+            newValue = newValue.item()
+        if isinstance(newValue, float) and np.isnan(newValue):
+            newValue = None
+        self.appendWithDateTime(dateTime, newValue)
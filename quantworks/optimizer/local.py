@@ -21,19 +21,35 @@
 
 import logging
 import multiprocessing
+from concurrent import futures
 import os
 import random
 import socket
 import threading
 import time
 
+import quantworks.logger
 from quantworks.optimizer import base
+from quantworks.optimizer import indicatorcache
 from quantworks.optimizer import server
+from quantworks.optimizer import sharedbars
 from quantworks.optimizer import worker
 from quantworks.optimizer import xmlrpcserver
 
 logger = logging.getLogger(__name__)
 
+# State for process pool workers. Initialized once in each worker process.
+_poolWorker = None
+
+
+class Backend(object):
+    """Mechanisms used by :func:`run` to distribute strategy executions among workers."""
+
+    #: Workers get bars and parameters from an XML-RPC server running in this process.
+    XMLRPC = "xmlrpc"
+    #: Workers are processes in a :class:`concurrent.futures.ProcessPoolExecutor`.
+    PROCESS_POOL = "process_pool"
+
 
 class ServerThread(threading.Thread):
     def __init__(self, server):
@@ -47,9 +63,7 @@ class ServerThread(threading.Thread):
 def worker_process(strategyClass, port, logLevel):
     class Worker(worker.Worker):
         def runStrategy(self, barFeed, *args, **kwargs):
-            strat = strategyClass(barFeed, *args, **kwargs)
-            strat.run()
-            return strat.getResult()
+            return worker.run_strategy(strategyClass, barFeed, *args, **kwargs)
 
     # Create a worker and run it.
     try:
@@ -61,6 +75,45 @@ def worker_process(strategyClass, port, logLevel):
         w.getLogger().exception("Failed to run worker: %s" % (e))
 
 
+class PoolWorker(object):
+    def __init__(self, strategyClass, barsFreq, instruments, bars, sharedBarsDescriptor, logLevel):
+        self.__strategyClass = strategyClass
+        self.__barsFreq = barsFreq
+        self.__logger = quantworks.logger.getLogger("worker-%s" % (os.getpid()))
+        self.__logger.setLevel(logLevel)
+        if sharedBarsDescriptor is not None:
+            # The segment is released when the process exits.
+            bars = sharedbars.SharedBars.attach(sharedBarsDescriptor)
+            instruments = bars.getInstruments()
+            self.__barColumns = sharedbars.SharedBarColumns(bars)
+        else:
+            self.__barColumns = indicatorcache.BarColumns(instruments, bars)
+        self.__instruments = instruments
+        self.__bars = bars
+        self.__indicatorCache = indicatorcache.IndicatorCache()
+
+    def runStrategy(self, barFeed, *args, **kwargs):
+        return worker.run_strategy(self.__strategyClass, barFeed, *args, **kwargs)
+
+    def runBatch(self, parametersBatch):
+        return [
+            worker.run_parameters(
+                self.runStrategy, parameters, self.__barsFreq, self.__instruments, self.__bars, self.__barColumns,
+                self.__indicatorCache, self.__logger
+            )
+            for parameters in parametersBatch
+        ]
+
+
+def pool_worker_init(*args):
+    global _poolWorker
+    _poolWorker = PoolWorker(*args)
+
+
+def pool_worker_run(parametersBatch):
+    return _poolWorker.runBatch(parametersBatch)
+
+
 def find_port():
     while True:
         ret = random.randint(1025, 65536)
@@ -82,7 +135,10 @@ def stop_process(p):
         p.join(timeout)
 
 
-def run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=None, logLevel=logging.ERROR, resultSinc=None):
+def run_impl(
+    strategyClass, barFeed, strategyParameters, batchSize, workerCount=None, logLevel=logging.ERROR, resultSinc=None,
+    useSharedMemory=True
+):
     if workerCount is None:
         workerCount = min((1, multiprocessing.cpu_count() - 1))
     assert workerCount > 0, "No workers"
@@ -101,7 +157,10 @@ def run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=
 
     # Create and start the server.
     logger.info("Starting server on port %s" % port)
-    srv = xmlrpcserver.Server(paramSource, resultSinc, barFeed, "localhost", port, autoStop=False, batchSize=batchSize)
+    srv = xmlrpcserver.Server(
+        paramSource, resultSinc, barFeed, "localhost", port, autoStop=False, batchSize=batchSize,
+        useSharedMemory=useSharedMemory and sharedbars.is_supported()
+    )
     serverThread = ServerThread(srv)
     serverThread.start()
     logger.info("Waiting for the server to be ready")
@@ -131,6 +190,7 @@ def run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=
         logger.info("Stopping server")
         srv.stop()
         serverThread.join()
+        resultSinc.flush()
 
         bestResult, bestParameters = resultSinc.getBest()
         if bestResult is not None:
@@ -139,7 +199,69 @@ def run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=
     return ret
 
 
-def run(strategyClass, barFeed, strategyParameters, workerCount=None, logLevel=logging.ERROR, batchSize=200):
+def run_pool_impl(
+    strategyClass, barFeed, strategyParameters, batchSize, workerCount=None, logLevel=logging.ERROR, resultSinc=None,
+    useSharedMemory=True
+):
+    if workerCount is None:
+        workerCount = multiprocessing.cpu_count()
+    assert workerCount > 0, "No workers"
+    assert batchSize > 0, "Invalid batch size"
+
+    paramSource = base.ParameterSource(strategyParameters)
+    if resultSinc is None:
+        resultSinc = base.ResultSinc()
+
+    logger.info("Loading bars")
+    loadedBars = [bars for dateTime, bars in barFeed]
+    instruments = barFeed.getRegisteredInstruments()
+    barsFreq = barFeed.getFrequency()
+    sharedBars = None
+    if useSharedMemory and sharedbars.is_supported():
+        try:
+            sharedBars = sharedbars.SharedBars.publish(instruments, loadedBars, barsFreq)
+        except Exception as e:
+            logger.info("Bars can't be shared: %s" % e)
+
+    # Bars are handed to each worker process once, when it starts. With the fork start method they are inherited.
+    if sharedBars is not None:
+        initArgs = (strategyClass, barsFreq, None, None, sharedBars.getDescriptor(), logLevel)
+    else:
+        initArgs = (strategyClass, barsFreq, instruments, loadedBars, None, logLevel)
+
+    try:
+        logger.info("Starting %s workers" % workerCount)
+        with futures.ProcessPoolExecutor(workerCount, initializer=pool_worker_init, initargs=initArgs) as executor:
+            # Keep a bounded number of batches in flight, and push results as soon as each batch completes.
+            pending = set()
+            while True:
+                while len(pending) < workerCount * 2:
+                    parametersBatch = [p.args for p in paramSource.getNext(batchSize)]
+                    if len(parametersBatch) == 0:
+                        break
+                    pending.add(executor.submit(pool_worker_run, parametersBatch))
+                if len(pending) == 0:
+                    break
+                done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    for parameters, result, runtime in future.result():
+                        resultSinc.push(result, base.Parameters(*parameters), runtime)
+    finally:
+        if sharedBars is not None:
+            sharedBars.close()
+        resultSinc.flush()
+
+    ret = None
+    bestResult, bestParameters = resultSinc.getBest()
+    if bestResult is not None:
+        ret = server.Results(bestParameters.args, bestResult)
+    return ret
+
+
+def run(
+    strategyClass, barFeed, strategyParameters, workerCount=None, logLevel=logging.ERROR, batchSize=200,
+    useSharedMemory=True, backend=Backend.XMLRPC, resultSinc=None
+):
     """Executes many instances of a strategy in parallel and finds the parameters that yield the best results.
 
     :param strategyClass: The strategy class.
@@ -152,7 +274,27 @@ def run(strategyClass, barFeed, strategyParameters, workerCount=None, logLevel=l
     :param logLevel: The log level. Defaults to **logging.ERROR**.
     :param batchSize: The number of strategy executions that are delivered to each worker.
     :type batchSize: int.
+    :param useSharedMemory: True to publish the bars once in a shared memory segment that workers attach to,
+        instead of sending a copy to each worker. Only available on Python 3.8+, and for bars without extra columns.
+        If bars can't be shared, they are sent to each worker.
+    :type useSharedMemory: boolean.
+    :param backend: The mechanism used to distribute strategy executions. :attr:`Backend.PROCESS_POOL` avoids the
+        XML-RPC round trips, which is faster for short strategies.
+    :type backend: A :class:`Backend` constant.
+    :param resultSinc: The sinc where results are pushed. Use it to keep more than the best result.
+        If None, a :class:`quantworks.optimizer.base.ResultSinc` is used.
+    :type resultSinc: :class:`quantworks.optimizer.base.ResultSinc`.
     :rtype: A :class:`Results` instance with the best results found.
     """
 
-    return run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=workerCount, logLevel=logLevel)
+    if backend == Backend.XMLRPC:
+        impl = run_impl
+    elif backend == Backend.PROCESS_POOL:
+        impl = run_pool_impl
+    else:
+        raise Exception("Invalid backend %s" % backend)
+
+    return impl(
+        strategyClass, barFeed, strategyParameters, batchSize, workerCount=workerCount, logLevel=logLevel,
+        resultSinc=resultSinc, useSharedMemory=useSharedMemory
+    )
@@ -0,0 +1,133 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import numpy as np
+
+
+# File layout: a sequence of chunks, each one written as consecutive arrays using numpy.save:
+# 1. A header with the number of rows and the number of parameters.
+# 2. Results (NaN for None).
+# 3. Runtimes in seconds (NaN if not available).
+# 4. One array per parameter position.
+
+
+def _to_array(values):
+    ret = np.array(values)
+    # Strings, mixed types or values numpy can't handle are stored as objects.
+    if ret.dtype.kind not in "biuf" or ret.ndim != 1:
+        ret = np.empty(len(values), dtype=object)
+        ret[:] = values
+    return ret
+
+
+class ResultsWriter(object):
+    """Appends strategy results to a file in chunks of columns, so results are not held in memory.
+
+    :param path: The path to the file. Results are appended if the file exists.
+    :type path: string.
+    :param chunkSize: The number of results to buffer before writing them to disk.
+    :type chunkSize: int.
+    """
+
+    def __init__(self, path, chunkSize=10000):
+        assert chunkSize > 0, "Invalid chunk size"
+        self.__file = open(path, "ab")
+        self.__chunkSize = chunkSize
+        self.__parameters = []
+        self.__results = []
+        self.__runtimes = []
+
+    def append(self, parameters, result, runtime=None):
+        """Appends a result.
+
+        :param parameters: The parameter values.
+        :type parameters: tuple.
+        :param result: The result obtained by running the strategy with the given parameters.
+        :type result: float.
+        :param runtime: The number of seconds it took to run the strategy.
+        :type runtime: float.
+        """
+        self.__parameters.append(tuple(parameters))
+        self.__results.append(np.nan if result is None else result)
+        self.__runtimes.append(np.nan if runtime is None else runtime)
+        if len(self.__results) >= self.__chunkSize:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered results to disk."""
+        if len(self.__results) == 0:
+            return
+
+        paramCount = len(self.__parameters[0])
+        if any(len(parameters) != paramCount for parameters in self.__parameters):
+            raise Exception("All parameters must have the same length")
+
+        np.save(self.__file, np.array([len(self.__results), paramCount], dtype=np.int64))
+        np.save(self.__file, np.array(self.__results, dtype=np.float64))
+        np.save(self.__file, np.array(self.__runtimes, dtype=np.float64))
+        for i in range(paramCount):
+            np.save(self.__file, _to_array([parameters[i] for parameters in self.__parameters]), allow_pickle=True)
+        self.__file.flush()
+
+        self.__parameters = []
+        self.__results = []
+        self.__runtimes = []
+
+    def close(self):
+        self.flush()
+        self.__file.close()
+
+
+def read_results(path):
+    """Loads results written by a :class:`ResultsWriter`.
+
+    :param path: The path to the file.
+    :type path: string.
+    :rtype: A tuple with a list with one numpy.array per parameter position, a numpy.array with the results and a
+        numpy.array with the runtimes. Missing results and runtimes are NaN.
+    """
+
+    parameters = []
+    results = []
+    runtimes = []
+    with open(path, "rb") as f:
+        while True:
+            try:
+                rowCount, paramCount = np.load(f)
+            except (EOFError, ValueError):
+                # ValueError is raised by older numpy versions when there is nothing left to read.
+                break
+            results.append(np.load(f))
+            runtimes.append(np.load(f))
+            chunkParameters = [np.load(f, allow_pickle=True) for i in range(paramCount)]
+            if len(parameters) == 0:
+                parameters = [[] for i in range(paramCount)]
+            elif len(parameters) != paramCount:
+                raise Exception("All parameters must have the same length")
+            for i in range(paramCount):
+                parameters[i].append(chunkParameters[i])
+
+    ret = (
+        [np.concatenate(values) for values in parameters],
+        np.concatenate(results) if len(results) else np.empty(0),
+        np.concatenate(runtimes) if len(runtimes) else np.empty(0)
+    )
+    return ret
@@ -41,7 +41,7 @@ class Results(object):
         return self.__result
 
 
-def serve(barFeed, strategyParameters, address, port, batchSize=200):
+def serve(barFeed, strategyParameters, address, port, batchSize=200, resultSinc=None):
     """Executes a server that will provide bars and strategy parameters for workers to use.
 
     :param barFeed: The bar feed that each worker will use to backtest the strategy.
@@ -53,15 +53,20 @@ def serve(barFeed, strategyParameters, address, port, batchSize=200):
     :type port: int.
     :param batchSize: The number of strategy executions that are delivered to each worker.
     :type batchSize: int.
+    :param resultSinc: The sinc where results are pushed. Use it to keep more than the best result.
+        If None, a :class:`quantworks.optimizer.base.ResultSinc` is used.
+    :type resultSinc: :class:`quantworks.optimizer.base.ResultSinc`.
     :rtype: A :class:`Results` instance with the best results found or None if no results were obtained.
     """
 
     paramSource = base.ParameterSource(strategyParameters)
-    resultSinc = base.ResultSinc()
+    if resultSinc is None:
+        resultSinc = base.ResultSinc()
     s = xmlrpcserver.Server(paramSource, resultSinc, barFeed, address, port, batchSize=batchSize)
     logger.info("Starting server")
     s.serve()
     logger.info("Server finished")
+    resultSinc.flush()
 
     ret = None
     bestResult, bestParameters = resultSinc.getBest()
@@ -0,0 +1,238 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import numpy as np
+
+from quantworks import bar
+from quantworks.optimizer import indicatorcache
+from quantworks.utils import dt
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Shared memory is only available on Python 3.8+.
+    shared_memory = None
+
+
+# Float columns stored in the segment, in order.
+FLOAT_COLUMNS = ("open", "high", "low", "close", "volume", "adj_close")
+
+
+def is_supported():
+    """Returns True if bars can be shared using shared memory."""
+    return shared_memory is not None
+
+
+class Descriptor(object):
+    """Describes the contents of a shared memory segment with bars. This is what gets sent to workers."""
+
+    def __init__(self, name, instruments, frequency, barClass, tzInfo, groupCount, rowCount):
+        self.name = name
+        self.instruments = instruments
+        self.frequency = frequency
+        self.barClass = barClass
+        self.tzInfo = tzInfo
+        self.groupCount = groupCount
+        self.rowCount = rowCount
+
+    def getSize(self):
+        # Group starts and datetimes, one instrument index per row and the float columns.
+        return ((self.groupCount + 1) + self.groupCount + self.rowCount * (1 + len(FLOAT_COLUMNS))) * 8
+
+
+class SharedBars(object):
+    """A sequence of :class:`quantworks.bar.Bars` stored in columnar format in a shared memory segment.
+
+    Bars are published once by the server using :meth:`publish`, and workers :meth:`attach` to the segment without
+    copying or unpickling the data. :class:`quantworks.bar.Bars` instances are built only when they are requested.
+
+    .. note::
+        Bars with extra columns are not supported.
+    """
+
+    def __init__(self, shm, descriptor, owner):
+        self.__shm = shm
+        self.__descriptor = descriptor
+        self.__owner = owner
+        self.__lastPos = None
+        self.__lastBars = None
+
+        # Map the arrays into the segment.
+        groupCount = descriptor.groupCount
+        rowCount = descriptor.rowCount
+        offset = 0
+        self.__groupStarts = np.ndarray(groupCount + 1, dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += (groupCount + 1) * 8
+        self.__dateTimes = np.ndarray(groupCount, dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += groupCount * 8
+        self.__instrumentIdxs = np.ndarray(rowCount, dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += rowCount * 8
+        self.__columns = {}
+        for column in FLOAT_COLUMNS:
+            self.__columns[column] = np.ndarray(rowCount, dtype=np.float64, buffer=shm.buf, offset=offset)
+            offset += rowCount * 8
+
+    @staticmethod
+    def publish(instruments, barsSeq, frequency):
+        """Copies bars into a new shared memory segment.
+
+        :param instruments: The instruments.
+        :type instruments: list.
+        :param barsSeq: A sequence of :class:`quantworks.bar.Bars`, sorted by datetime.
+        :param frequency: The bars frequency.
+        :rtype: A :class:`SharedBars` instance that owns the segment.
+        """
+        if not is_supported():
+            raise Exception("Shared memory is not supported")
+
+        instrumentIdx = {instrument: i for i, instrument in enumerate(instruments)}
+        groupStarts = [0]
+        dateTimes = []
+        instrumentIdxs = []
+        values = []
+        barClass = None
+        tzInfo = None
+        for bars in barsSeq:
+            dateTimes.append(dt.datetime_to_epoch_ns(bars.getDateTime()))
+            for instrument in bars.getInstruments():
+                bar_ = bars[instrument]
+                if barClass is None:
+                    barClass = type(bar_)
+                    tzInfo = bar_.getDateTime().tzinfo
+                elif type(bar_) != barClass:
+                    raise Exception("All bars must be of the same type")
+                if len(bar_.getExtraColumns()):
+                    raise Exception("Extra columns are not supported")
+                adjClose = bar_.getAdjClose()
+                instrumentIdxs.append(instrumentIdx[instrument])
+                values.append((
+                    bar_.getOpen(), bar_.getHigh(), bar_.getLow(), bar_.getClose(), bar_.getVolume(),
+                    np.nan if adjClose is None else adjClose
+                ))
+            groupStarts.append(len(instrumentIdxs))
+
+        descriptor = Descriptor(
+            None, list(instruments), frequency, barClass, tzInfo, len(dateTimes), len(instrumentIdxs)
+        )
+        # Zero sized segments are not allowed.
+        shm = shared_memory.SharedMemory(create=True, size=max(descriptor.getSize(), 8))
+        descriptor.name = shm.name
+        ret = SharedBars(shm, descriptor, True)
+        ret.__groupStarts[:] = groupStarts
+        ret.__dateTimes[:] = dateTimes
+        ret.__instrumentIdxs[:] = instrumentIdxs
+        values = np.array(values, dtype=np.float64).reshape(len(instrumentIdxs), len(FLOAT_COLUMNS))
+        for i, column in enumerate(FLOAT_COLUMNS):
+            ret.__columns[column][:] = values[:, i]
+        return ret
+
+    @staticmethod
+    def attach(descriptor):
+        """Attaches to a segment published by another process.
+
+        :param descriptor: The descriptor returned by :meth:`getDescriptor` in the publishing process.
+        :type descriptor: :class:`Descriptor`.
+        """
+        if not is_supported():
+            raise Exception("Shared memory is not supported")
+        return SharedBars(shared_memory.SharedMemory(name=descriptor.name), descriptor, False)
+
+    def getDescriptor(self):
+        return self.__descriptor
+
+    def getInstruments(self):
+        return self.__descriptor.instruments
+
+    def getFrequency(self):
+        return self.__descriptor.frequency
+
+    def __len__(self):
+        return self.__descriptor.groupCount
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield self[pos]
+
+    def __getitem__(self, pos):
+        if pos < 0:
+            pos += len(self)
+        if pos < 0 or pos >= len(self):
+            raise IndexError("Index out of range")
+
+        # The feed usually asks for the same position twice, first to peek the datetime and then to get the bars.
+        if pos != self.__lastPos:
+            self.__lastBars = self.__buildBars(pos)
+            self.__lastPos = pos
+        return self.__lastBars
+
+    def __buildBars(self, pos):
+        descriptor = self.__descriptor
+        begin = self.__groupStarts[pos]
+        end = self.__groupStarts[pos + 1]
+        dateTime = dt.epoch_ns_to_datetime(self.__dateTimes[pos], descriptor.tzInfo)
+        instrumentIdxs = self.__instrumentIdxs[begin:end].tolist()
+        columns = [self.__columns[column][begin:end].tolist() for column in FLOAT_COLUMNS]
+        barDict = {}
+        for i, instrumentIdx in enumerate(instrumentIdxs):
+            open_, high, low, close, volume, adjClose = [values[i] for values in columns]
+            if adjClose != adjClose:
+                adjClose = None
+            barDict[descriptor.instruments[instrumentIdx]] = descriptor.barClass(
+                dateTime, open_, high, low, close, volume, adjClose, descriptor.frequency
+            )
+        return bar.Bars(barDict)
+
+    def getValues(self, instrument, column):
+        """Returns a numpy.array with the values for one of the float columns of an instrument."""
+        mask = self.__instrumentIdxs == self.__descriptor.instruments.index(instrument)
+        return self.__columns[column][mask]
+
+    def close(self):
+        """Releases the segment. The owner also destroys it."""
+        self.__groupStarts = None
+        self.__dateTimes = None
+        self.__instrumentIdxs = None
+        self.__columns = {}
+        self.__lastBars = None
+        self.__shm.close()
+        if self.__owner:
+            self.__shm.unlink()
+
+
+class SharedBarColumns(indicatorcache.BarColumns):
+    """:class:`quantworks.optimizer.indicatorcache.BarColumns` that takes values straight from :class:`SharedBars`."""
+
+    def __init__(self, sharedBars):
+        super(SharedBarColumns, self).__init__(sharedBars.getInstruments(), sharedBars)
+        self.__sharedBars = sharedBars
+
+    def loadValues(self, instrument, column):
+        if column in FLOAT_COLUMNS:
+            ret = self.__sharedBars.getValues(instrument, column)
+        else:
+            # Adjusted open, high and low.
+            adjClose = self.__sharedBars.getValues(instrument, "adj_close")
+            # Fail just like bar.BasicBar does instead of returning NaN values.
+            if np.isnan(adjClose).any():
+                raise Exception("Adjusted close is missing")
+            close = self.__sharedBars.getValues(instrument, "close")
+            ret = adjClose * self.__sharedBars.getValues(instrument, column[4:]) / close
+        return ret
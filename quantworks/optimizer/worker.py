@@ -21,6 +21,7 @@
 
 import socket
 import multiprocessing
+import time
 import retrying
 
 from xmlrpc import client as xmlrpc_client
@@ -28,7 +29,9 @@ from xmlrpc import client as xmlrpc_client
 import quantworks.logger
 from quantworks.bar import Frequency
 from quantworks import barfeed
+from quantworks.optimizer import indicatorcache
 from quantworks.optimizer import serialization
+from quantworks.optimizer import sharedbars
 
 wait_exponential_multiplier = 500
 wait_exponential_max = 10000
@@ -49,10 +52,40 @@ def retry_on_network_error(function, *args, **kwargs):
     return function(*args, **kwargs)
 
 
+def run_strategy(strategyClass, barFeed, *args, **kwargs):
+    """Runs a strategy and returns its result."""
+    strat = strategyClass(barFeed, *args, **kwargs)
+    strat.run()
+    return strat.getResult()
+
+
+def run_parameters(runStrategy, parameters, barsFreq, instruments, bars, barColumns, indicatorCache, logger):
+    """Wraps the bars into a feed and runs the strategy with a set of parameters.
+    This is shared by every optimizer backend.
+
+    :param runStrategy: A function that receives the feed and the parameters, runs the strategy and returns the result.
+    :param parameters: The parameters for the strategy.
+    :param indicatorCache: The :class:`quantworks.optimizer.indicatorcache.IndicatorCache` shared among executions.
+    :param logger: The logger to use.
+    :rtype: A (parameters, result, runtime) tuple. The result is None if the strategy failed.
+    """
+    feed = barfeed.OptimizerBarFeed(barsFreq, instruments, bars, barColumns=barColumns, indicatorCache=indicatorCache)
+    logger.info("Running strategy with parameters %s" % (str(parameters)))
+    result = None
+    begin = time.time()
+    try:
+        result = runStrategy(feed, *parameters)
+    except Exception as e:
+        logger.exception("Error running strategy with parameters %s: %s" % (str(parameters), e))
+    logger.info("Result %s" % result)
+    return (parameters, result, time.time() - begin)
+
+
 class Worker(object):
-    def __init__(self, address, port, workerName=None):
+    def __init__(self, address, port, workerName=None, indicatorCacheSize=128):
         url = "http://%s:%s/QuantWorksRPC" % (address, port)
         self.__logger = quantworks.logger.getLogger(workerName)
+        self.__indicatorCache = indicatorcache.IndicatorCache(indicatorCacheSize)
         self.__server = xmlrpc_client.ServerProxy(url, allow_none=True)
         print("server methods:", self.__server.system.listMethods())
         if workerName is None:
@@ -63,11 +96,19 @@ class Worker(object):
     def getLogger(self):
         return self.__logger
 
+    def getIndicatorCache(self):
+        return self.__indicatorCache
+
     def getInstrumentsAndBars(self):
         ret = retry_on_network_error(self.__server.getInstrumentsAndBars)
         ret = serialization.loads(ret)
         return ret
 
+    def getSharedBars(self):
+        ret = retry_on_network_error(self.__server.getSharedBars)
+        ret = serialization.loads(ret)
+        return ret
+
     def getBarsFrequency(self):
         ret = retry_on_network_error(self.__server.getBarsFrequency)
         ret = serialization.loads(ret)
@@ -78,36 +119,30 @@ class Worker(object):
         ret = serialization.loads(ret)
         return ret
 
-    def pushJobResults(self, jobId, result, parameters):
+    def pushJobResults(self, jobId, results):
+        """Pushes the results for every set of parameters in a job.
+
+        :param jobId: The job id.
+        :param results: A list of (parameters, result, runtime) tuples.
+        """
         jobId = serialization.dumps(jobId)
-        result = serialization.dumps(result)
-        parameters = serialization.dumps(parameters)
+        results = serialization.dumps(results)
         workerName = serialization.dumps(self.__workerName)
-        retry_on_network_error(self.__server.pushJobResults, jobId, result, parameters, workerName)
+        retry_on_network_error(self.__server.pushJobResults, jobId, results, workerName)
 
-    def __processJob(self, job, barsFreq, instruments, bars):
-        bestResult = None
+    def __processJob(self, job, barsFreq, instruments, bars, barColumns):
+        results = []
         parameters = job.getNextParameters()
-        bestParams = parameters
         while parameters is not None:
-            # Wrap the bars into a feed.
-            feed = barfeed.OptimizerBarFeed(barsFreq, instruments, bars)
-            # Run the strategy.
-            self.getLogger().info("Running strategy with parameters %s" % (str(parameters)))
-            result = None
-            try:
-                result = self.runStrategy(feed, *parameters)
-            except Exception as e:
-                self.getLogger().exception("Error running strategy with parameters %s: %s" % (str(parameters), e))
-            self.getLogger().info("Result %s" % result)
-            if bestResult is None or result > bestResult:
-                bestResult = result
-                bestParams = parameters
+            results.append(run_parameters(
+                self.runStrategy, parameters, barsFreq, instruments, bars, barColumns, self.__indicatorCache,
+                self.getLogger()
+            ))
             # Run with the next set of parameters.
             parameters = job.getNextParameters()
 
-        assert(bestParams is not None)
-        self.pushJobResults(job.getId(), bestResult, bestParams)
+        assert(len(results) > 0)
+        self.pushJobResults(job.getId(), results)
 
     # Run the strategy and return the result.
     def runStrategy(self, feed, parameters):
@@ -116,16 +151,33 @@ class Worker(object):
     def run(self):
         try:
             self.getLogger().info("Started running")
-            # Get the instruments and bars.
-            instruments, bars = self.getInstrumentsAndBars()
+            # Get the instruments and bars, attaching to the shared memory segment if the server published one.
+            sharedBarsDescriptor = self.getSharedBars()
+            if sharedBarsDescriptor is not None:
+                sharedBars = sharedbars.SharedBars.attach(sharedBarsDescriptor)
+                instruments = sharedBars.getInstruments()
+                bars = sharedBars
+                barColumns = sharedbars.SharedBarColumns(sharedBars)
+            else:
+                sharedBars = None
+                instruments, bars = self.getInstrumentsAndBars()
+                barColumns = indicatorcache.BarColumns(instruments, bars)
             barsFreq = self.getBarsFrequency()
 
             # Process jobs
-            job = self.getNextJob()
-            while job is not None:
-                self.__processJob(job, barsFreq, instruments, bars)
+            try:
                 job = self.getNextJob()
-            self.getLogger().info("Finished running")
+                while job is not None:
+                    self.__processJob(job, barsFreq, instruments, bars, barColumns)
+                    job = self.getNextJob()
+            finally:
+                if sharedBars is not None:
+                    sharedBars.close()
+            self.getLogger().info(
+                "Finished running. Indicator cache hits: %d. Misses: %d." % (
+                    self.__indicatorCache.getHits(), self.__indicatorCache.getMisses()
+                )
+            )
         except Exception as e:
             self.getLogger().exception("Finished running with errors: %s" % (e))
 
@@ -133,9 +185,7 @@ class Worker(object):
 def worker_process(strategyClass, address, port, workerName):
     class MyWorker(Worker):
         def runStrategy(self, barFeed, *args, **kwargs):
-            strat = strategyClass(barFeed, *args, **kwargs)
-            strat.run()
-            return strat.getResult()
+            return run_strategy(strategyClass, barFeed, *args, **kwargs)
 
     # Create a worker and run it.
     w = MyWorker(address, port, workerName)
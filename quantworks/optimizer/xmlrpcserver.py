@@ -27,6 +27,7 @@ from xmlrpc import server as xmlrpc_server
 import quantworks.logger
 from quantworks.optimizer import base
 from quantworks.optimizer import serialization
+from quantworks.optimizer import sharedbars
 
 
 logger = quantworks.logger.getLogger(__name__)
@@ -66,7 +67,9 @@ class RequestHandler(xmlrpc_server.SimpleXMLRPCRequestHandler):
 
 
 class Server(xmlrpc_server.SimpleXMLRPCServer):
-    def __init__(self, paramSource, resultSinc, barFeed, address, port, autoStop=True, batchSize=200):
+    def __init__(
+        self, paramSource, resultSinc, barFeed, address, port, autoStop=True, batchSize=200, useSharedMemory=False
+    ):
         assert batchSize > 0, "Invalid batch size"
 
         xmlrpc_server.SimpleXMLRPCServer.__init__(
@@ -81,6 +84,8 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
         self.__resultSinc = resultSinc
         self.__barFeed = barFeed
         self.__instrumentsAndBars = None  # Serialized instruments and bars for faster retrieval.
+        self.__useSharedMemory = useSharedMemory
+        self.__sharedBars = None
         self.__barsFreq = None
         self.__activeJobs = {}
         self.__lock = threading.Lock()
@@ -95,6 +100,7 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
         self.register_introspection_functions()
         self.register_function(self.getInstrumentsAndBars, 'getInstrumentsAndBars')
         self.register_function(self.getBarsFrequency, 'getBarsFrequency')
+        self.register_function(self.getSharedBars, 'getSharedBars')
         self.register_function(self.getNextJob, 'getNextJob')
         self.register_function(self.pushJobResults, 'pushJobResults')
 
@@ -105,6 +111,13 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
     def getBarsFrequency(self):
         return serialization.dumps(self.__barsFreq)
 
+    def getSharedBars(self):
+        # Workers running on the same host can attach to the bars instead of downloading them.
+        ret = None
+        if self.__sharedBars is not None:
+            ret = self.__sharedBars.getDescriptor()
+        return serialization.dumps(ret)
+
     def getNextJob(self):
         ret = None
 
@@ -129,10 +142,9 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
 
         return jobsPending or activeJobs
 
-    def pushJobResults(self, jobId, result, parameters, workerName):
+    def pushJobResults(self, jobId, results, workerName):
         jobId = serialization.loads(jobId)
-        result = serialization.loads(result)
-        parameters = serialization.loads(parameters)
+        results = serialization.loads(results)
 
         # Remove the job mapping.
         with self.__lock:
@@ -142,11 +154,13 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
                 # The job's results were already submitted.
                 return
 
-            if self.__bestResult is None or result > self.__bestResult:
-                logger.info("Best result so far %s with parameters %s" % (result, parameters))
-                self.__bestResult = result
+            for parameters, result, runtime in results:
+                if result is not None and (self.__bestResult is None or result > self.__bestResult):
+                    logger.info("Best result so far %s with parameters %s" % (result, parameters))
+                    self.__bestResult = result
 
-        self.__resultSinc.push(result, base.Parameters(*parameters))
+        for parameters, result, runtime in results:
+            self.__resultSinc.push(result, base.Parameters(*parameters), runtime)
 
     def waitServing(self, timeout=None):
         return self.__startedServingEvent.wait(timeout)
@@ -162,8 +176,14 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
             for dateTime, bars in self.__barFeed:
                 loadedBars.append(bars)
             instruments = self.__barFeed.getRegisteredInstruments()
-            self.__instrumentsAndBars = serialization.dumps((instruments, loadedBars))
             self.__barsFreq = self.__barFeed.getFrequency()
+            if self.__useSharedMemory:
+                try:
+                    self.__sharedBars = sharedbars.SharedBars.publish(instruments, loadedBars, self.__barsFreq)
+                except Exception as e:
+                    logger.info("Bars can't be shared: %s" % e)
+            if self.__sharedBars is None:
+                self.__instrumentsAndBars = serialization.dumps((instruments, loadedBars))
 
             if self.__autoStopThread:
                 self.__autoStopThread.start()
@@ -177,3 +197,5 @@ class Server(xmlrpc_server.SimpleXMLRPCServer):
                 self.__autoStopThread.join()
         finally:
             self.__forcedStop = True
+            if self.__sharedBars is not None:
+                self.__sharedBars.close()
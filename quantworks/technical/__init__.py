@@ -19,10 +19,71 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import numpy as np
+
 from quantworks.utils import collections
 from quantworks import dataseries
 
 
+# Maximum number of elements materialized at once when applying a function to sliding windows in batch mode.
+BATCH_CHUNK_SIZE = 2**20
+
+
+def batch_input(values):
+    """Returns values as a float64 numpy.array, with None values converted to NaN."""
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        return np.asarray(values, dtype=np.float64)
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def sliding_windows(values, windowSize):
+    """Returns a read-only 2-D view over values with one row per window. No data is copied."""
+    values = np.ascontiguousarray(values)
+    count = max(len(values) - windowSize + 1, 0)
+    stride = values.strides[0]
+    return np.lib.stride_tricks.as_strided(values, shape=(count, windowSize), strides=(stride, stride), writeable=False)
+
+
+def apply_to_windows(windowSize, func, *arrays):
+    """Applies func to the sliding windows of one or more arrays of the same length.
+
+    func receives one 2-D view per array (one row per window) and must return one value per row.
+    The windows are processed in chunks to bound the size of the temporaries func may create.
+    The first windowSize - 1 values in the result are NaN.
+    """
+    size = len(arrays[0])
+    ret = np.full(size, np.nan)
+    windows = [sliding_windows(values, windowSize) for values in arrays]
+    step = max(1, BATCH_CHUNK_SIZE // windowSize)
+    for begin in range(0, len(windows[0]), step):
+        chunk = [w[begin:begin + step] for w in windows]
+        ret[windowSize - 1 + begin:windowSize - 1 + begin + len(chunk[0])] = func(*chunk)
+    return ret
+
+
+def batch_skip_none(func, values, *arrays):
+    """Calculates a batch of values the way an :class:`EventWindow` with skipNone=True would.
+
+    NaN values (None in the event path) are not fed to func, and since the window doesn't change,
+    the value calculated for the previous position is repeated.
+
+    :param func: Function that calculates the output for an array without missing values.
+    :param values: The input values.
+    :param arrays: Additional arrays aligned with values that should be filtered the same way.
+    """
+    valid = ~np.isnan(values)
+    if valid.all():
+        return func(values, *arrays)
+
+    compressed = func(values[valid], *[a[valid] for a in arrays])
+    # Index of the last valid input at or before each position.
+    lastValid = np.cumsum(valid) - 1
+    ret = np.full(len(values), np.nan)
+    mask = lastValid >= 0
+    ret[mask] = compressed[lastValid[mask]]
+    return ret
+
+
 class EventWindow(object):
     """An EventWindow class is responsible for making calculation over a moving window of values.
 
@@ -68,6 +129,10 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
     """An EventBasedFilter class is responsible for capturing new values in a :class:`quantworks.dataseries.DataSeries`
     and using an :class:`EventWindow` to calculate new values.
 
+    Most filters also provide a **batch** static method that calculates the whole output series from a numpy.array
+    in one vectorized pass. Batch results have the same length as the input and use NaN where the filter would
+    return None.
+
     :param dataSeries: The DataSeries instance being filtered.
     :type dataSeries: :class:`quantworks.dataseries.DataSeries`.
     :param eventWindow: The EventWindow instance to use to calculate new values.
@@ -19,8 +19,27 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import numpy as np
+
 from quantworks import technical
 from quantworks.dataseries import bards
+from quantworks.technical import rsi
+
+
+def _true_range(high, low, close):
+    ret = high - low
+    prevClose = close[:-1]
+    ret[1:] = np.maximum(np.maximum(ret[1:], np.abs(high[1:] - prevClose)), np.abs(low[1:] - prevClose))
+    return ret
+
+
+def _atr(high, low, close, period):
+    ret = np.full(len(high), np.nan)
+    if len(high) >= period:
+        trueRange = _true_range(high, low, close)
+        ret[period - 1] = trueRange[:period].mean()
+        ret[period:] = rsi.wilder_smoothing(ret[period - 1], trueRange[period:], period)
+    return ret
 
 
 # This event window will calculate and hold true-range values.
@@ -79,3 +98,20 @@ class ATR(technical.EventBasedFilter):
             raise Exception("barDataSeries must be a dataseries.bards.BarDataSeries instance")
 
         super(ATR, self).__init__(barDataSeries, ATREventWindow(period, useAdjustedValues), maxLen)
+
+    @staticmethod
+    def batch(high, low, close, period):
+        """Calculates the ATR for all the bars at once.
+
+        :param high: The high values. Use the adjusted values to get the same results as using useAdjustedValues=True.
+        :type high: numpy.array or list.
+        :param low: The low values.
+        :type low: numpy.array or list.
+        :param close: The close values.
+        :type close: numpy.array or list.
+        :param period: The average period. Must be > 1.
+        :type period: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(period > 1)
+        return _atr(technical.batch_input(high), technical.batch_input(low), technical.batch_input(close), period)
@@ -20,10 +20,18 @@
 """
 
 from quantworks import dataseries
-from quantworks.technical import ma
+from quantworks import technical
 from quantworks.technical import stats
 
 
+class MiddleBandEventWindow(stats.RollingMomentsEventWindow):
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = self.getMean()
+        return ret
+
+
 class BollingerBands(object):
     """Bollinger Bands filter as described in http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:bollinger_bands.
 
@@ -40,12 +48,13 @@ class BollingerBands(object):
     """
 
     def __init__(self, dataSeries, period, numStdDev, maxLen=None):
-        self.__sma = ma.SMA(dataSeries, period, maxLen=maxLen)
-        self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen)
+        # The middle band and the standard deviation are calculated from the same window.
+        self.__eventWindow = MiddleBandEventWindow(period)
+        self.__middleBand = technical.EventBasedFilter(dataSeries, self.__eventWindow, maxLen)
         self.__upperBand = dataseries.SequenceDataSeries(maxLen)
         self.__lowerBand = dataseries.SequenceDataSeries(maxLen)
         self.__numStdDev = numStdDev
-        # It is important to subscribe after sma and stddev since we'll use those values.
+        # It is important to subscribe after the middle band since we'll use the window it updates.
         dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
 
     def __onNewValue(self, dataSeries, dateTime, value):
@@ -53,11 +62,11 @@ class BollingerBands(object):
         lowerValue = None
 
         if value is not None:
-            sma = self.__sma[-1]
-            if sma is not None:
-                stdDev = self.__stdDev[-1]
-                upperValue = sma + stdDev * self.__numStdDev
-                lowerValue = sma + stdDev * self.__numStdDev * -1
+            middle = self.__middleBand[-1]
+            if middle is not None:
+                stdDev = self.__eventWindow.getStdDev()
+                upperValue = middle + stdDev * self.__numStdDev
+                lowerValue = middle + stdDev * self.__numStdDev * -1
 
         self.__upperBand.appendWithDateTime(dateTime, upperValue)
         self.__lowerBand.appendWithDateTime(dateTime, lowerValue)
@@ -72,7 +81,7 @@ class BollingerBands(object):
         """
         Returns the middle band as a :class:`quantworks.dataseries.DataSeries`.
         """
-        return self.__sma
+        return self.__middleBand
 
     def getLowerBand(self):
         """
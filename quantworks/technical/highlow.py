@@ -20,21 +20,30 @@
 """
 
 from quantworks import technical
+from quantworks.utils import collections
+
+
+def _high_low(values, period, useMin):
+    if useMin:
+        return technical.apply_to_windows(period, lambda windows: windows.min(axis=1), values)
+    else:
+        return technical.apply_to_windows(period, lambda windows: windows.max(axis=1), values)
 
 
 class HighLowEventWindow(technical.EventWindow):
     def __init__(self, windowSize, useMin):
         super(HighLowEventWindow, self).__init__(windowSize)
-        self.__useMin = useMin
+        self.__extremum = collections.RollingExtremum(windowSize, useMin)
+
+    def onNewValue(self, dateTime, value):
+        super(HighLowEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__extremum.append(value)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            if self.__useMin:
-                ret = values.min()
-            else:
-                ret = values.max()
+            ret = self.__extremum.getValue()
         return ret
 
 
@@ -54,6 +63,19 @@ class High(technical.EventBasedFilter):
     def __init__(self, dataSeries, period, maxLen=None):
         super(High, self).__init__(dataSeries, HighLowEventWindow(period, False), maxLen)
 
+    @staticmethod
+    def batch(values, period):
+        """Calculates the highest value for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param period: The number of values to use to calculate the highest value.
+        :type period: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(period > 0)
+        return technical.batch_skip_none(lambda v: _high_low(v, period, False), technical.batch_input(values))
+
 
 class Low(technical.EventBasedFilter):
     """This filter calculates the lowest value.
@@ -70,3 +92,16 @@ class Low(technical.EventBasedFilter):
 
     def __init__(self, dataSeries, period, maxLen=None):
         super(Low, self).__init__(dataSeries, HighLowEventWindow(period, True), maxLen)
+
+    @staticmethod
+    def batch(values, period):
+        """Calculates the lowest value for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param period: The number of values to use to calculate the lowest value.
+        :type period: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(period > 0)
+        return technical.batch_skip_none(lambda v: _high_low(v, period, True), technical.batch_input(values))
@@ -19,47 +19,191 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import math
+
 import numpy as np
 
 from quantworks import technical
 
 
-# Code Tom Starke for the Hurst Exponent.
+def _lagged_differences(values, lags):
+    # Returns a 2-D array with values[j + lag] - values[j] for every position j (rows) and lag (columns), built from a
+    # strided view over the values. Positions where j + lag falls past the end are NaN.
+    maxLag = lags[-1]
+    padded = np.concatenate([values, np.full(maxLag, np.nan)])
+    windows = technical.sliding_windows(padded, maxLag + 1)[:len(values)]
+    return windows[:, lags] - windows[:, :1]
+
+
+def _moments(diffs, counts):
+    # Returns the mean and the sum of the squared differences from the mean for the first counts[i] values in
+    # every column.
+    valid = np.arange(len(diffs))[:, np.newaxis] < counts
+    means = np.where(valid, diffs, 0).sum(axis=0) / counts
+    m2 = (np.where(valid, diffs - means, 0) ** 2).sum(axis=0)
+    return means, m2
+
+
+def _log_slopes(lags):
+    # Returns the weights that give the slope of the linear fit to the double-log graph when multiplied by log10(tau).
+    x = np.log10(lags)
+    xDev = x - x.mean()
+    return xDev / xDev.dot(xDev)
+
+
+def _fit(slopeWeights, logTau):
+    # Returns the hurst exponent for every row in logTau. Just like with np.polyfit, the result is NaN if any tau is
+    # NaN or 0, which happens when a lag has less than 2 differences in the window or when they are all the same.
+    ret = logTau.dot(slopeWeights) * 2
+    return np.where(np.isfinite(logTau).all(axis=-1), ret, np.nan)
+
+
+# Based on Tom Starke's code for the Hurst Exponent.
 def hurst_exp(p, minLags, maxLags):
-    tau = []
-    lagvec = []
-
-    #  Step through the different lags
-    for lag in range(minLags, maxLags):
-        #  produce price difference with lag
-        pp = np.subtract(p[lag:], p[:-lag])
-        #  Write the different lags into a vector
-        lagvec.append(lag)
-        #  Calculate the variance of the differnce vector
-        tau.append(np.sqrt(np.std(pp)))
-    # linear fit to double-log graph (gives power)
-    m = np.polyfit(np.log10(lagvec), np.log10(tau), 1)
-    # calculate hurst
-    hurst = m[0]*2
-    return hurst
+    lags = np.arange(minLags, maxLags)
+    counts = len(p) - lags
+    # Lags with less than 2 differences end up with a 0 or NaN tau and the result is NaN.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        #  Calculate the variance of the price differences for all lags at once.
+        means, m2 = _moments(_lagged_differences(np.asarray(p, dtype=float), lags), counts)
+        # tau = sqrt(std), so log10(tau) = log10(variance) / 4.
+        logTau = np.log10(m2 / counts) / 4
+    # linear fit to double-log graph (gives power) and calculate hurst
+    return _fit(_log_slopes(lags), logTau)[()]
+
+
+def _windowed_moments(diffs, counts, windowCount):
+    # Returns the variance of the values in every column for windowCount windows, where the window j for column i
+    # has the values in rows j to j + counts[i].
+    # Prefix sums are calculated over blocks of counts.max() rows and shifted by the first value in the block so they
+    # don't grow large, which means that every window is split in at most two parts that get merged using Chan's
+    # formula.
+    blockSize = counts.max()
+    blockCount = -(-len(diffs) // blockSize)
+    padded = np.zeros((blockCount * blockSize, diffs.shape[1]))
+    padded[:len(diffs)] = diffs
+    blocks = padded.reshape(blockCount, blockSize, diffs.shape[1])
+    shifts = blocks[:, 0]
+    blocks = blocks - shifts[:, np.newaxis]
+    columns = np.arange(diffs.shape[1])
+    sums = np.zeros((blockCount, blockSize + 1, diffs.shape[1]))
+    np.cumsum(blocks, axis=1, out=sums[:, 1:])
+    sqSums = np.zeros((blockCount, blockSize + 1, diffs.shape[1]))
+    np.cumsum(blocks ** 2, axis=1, out=sqSums[:, 1:])
+
+    def part(block, begin, count):
+        # Returns the mean and the sum of the squared differences from the mean for a part of a window
+        # that is inside a block.
+        lo = begin - block * blockSize
+        hi = lo + count
+        s1 = sums[block, hi, columns] - sums[block, lo, columns]
+        s2 = sqSums[block, hi, columns] - sqSums[block, lo, columns]
+        count = np.maximum(count, 1)
+        return shifts[block, columns] + s1 / count, s2 - s1 * s1 / count
+
+    begin = np.arange(windowCount)[:, np.newaxis]
+    end = begin + counts
+    lastBlock = (end - 1) // blockSize
+    split = np.maximum(begin, lastBlock * blockSize)
+    # The first part is empty when the window is inside a single block.
+    count1 = split - begin
+    count2 = end - split
+    mean1, m2 = part(begin // blockSize, begin, count1)
+    mean2, m2Last = part(lastBlock, split, count2)
+    m2 += m2Last + (mean2 - mean1) ** 2 * count1 * count2 / counts
+    return np.maximum(m2, 0) / counts
+
+
+def _hurst_exp(values, period, minLags, maxLags):
+    windowCount = len(values) - period + 1
+    ret = np.full(len(values), np.nan)
+    if windowCount <= 0:
+        return ret
+
+    lags = np.arange(minLags, maxLags)
+    counts = period - lags
+    # Just like with the filter, there is no value if a lag has less than 2 differences in the window.
+    if counts.min() < 2:
+        return ret
+
+    logTau = np.empty((windowCount, len(lags)))
+    step = max(1, technical.BATCH_CHUNK_SIZE // len(lags))
+    for begin in range(0, windowCount, step):
+        end = min(begin + step, windowCount)
+        diffs = _lagged_differences(values[begin:end + period - 1], lags)
+        with np.errstate(divide="ignore"):
+            logTau[begin:end] = np.log10(_windowed_moments(diffs, counts, end - begin)) / 4
+
+    ret[period - 1:] = _fit(_log_slopes(lags), logTau)
+    return ret
 
 
 class HurstExponentEventWindow(technical.EventWindow):
+    """Keeps the mean and the variance of the lagged differences in the window up to date as values get in and out of
+    it, so calculating the hurst exponent costs O(lags) instead of O(lags * period).
+
+    The moments are calculated from scratch every period updates (or when non finite values get in or out of the
+    window) so rounding errors don't pile up.
+    """
+
     def __init__(self, period, minLags, maxLags, logValues=True):
         super(HurstExponentEventWindow, self).__init__(period)
         self.__minLags = minLags
         self.__maxLags = maxLags
         self.__logValues = logValues
+        self.__lags = np.arange(minLags, maxLags)
+        self.__counts = period - self.__lags
+        self.__slopeWeights = _log_slopes(self.__lags)
+        # Every lag has at least 2 differences in the window only if period > maxLags. Otherwise there is no value, and
+        # hurst_exp takes care of that.
+        self.__incremental = period > maxLags
+        self.__means = None
+        self.__m2 = None
+        self.__updates = 0
+
+    def __reanchor(self):
+        self.__means, self.__m2 = _moments(_lagged_differences(self.getValues(), self.__lags), self.__counts)
+        self.__updates = 0
 
     def onNewValue(self, dateTime, value):
         if value is not None and self.__logValues:
             value = np.log10(value)
+        if value is None or not self.__incremental:
+            super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
+            return
+
+        oldValue = None
+        if self.windowFull():
+            # The differences with the oldest value are leaving the window.
+            values = self.getValues()
+            oldValue = float(values[0])
+            oldDiffs = values[self.__lags] - oldValue
         super(HurstExponentEventWindow, self).onNewValue(dateTime, value)
+        if not self.windowFull():
+            return
+
+        self.__updates += 1
+        if self.__means is None or self.__updates >= self.getWindowSize() or not math.isfinite(value) or (
+            oldValue is not None and not math.isfinite(oldValue)
+        ):
+            self.__reanchor()
+        else:
+            # The differences with the new value replace the ones with the oldest value.
+            newDiffs = value - self.getValues()[-1 - self.__lags]
+            delta = newDiffs - oldDiffs
+            prevMeans = self.__means
+            self.__means = prevMeans + delta / self.__counts
+            self.__m2 = np.maximum(self.__m2 + delta * (newDiffs - self.__means + oldDiffs - prevMeans), 0)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
+            if self.__incremental:
+                with np.errstate(divide="ignore"):
+                    logTau = np.log10(self.__m2 / self.__counts) / 4
+                ret = _fit(self.__slopeWeights, logTau)[()]
+            else:
+                ret = hurst_exp(self.getValues(), self.__minLags, self.__maxLags)
         return ret
 
 
@@ -90,3 +234,24 @@ class HurstExponent(technical.EventBasedFilter):
             HurstExponentEventWindow(period, minLags, maxLags, logValues),
             maxLen
         )
+
+    @staticmethod
+    def batch(values, period, minLags=2, maxLags=20, logValues=True):
+        """Calculates the hurst exponent for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :rtype: numpy.array with NaN where the filter would return None.
+
+        The rest of the parameters are the same ones used to build the filter.
+        """
+        assert period > 0, "period must be > 0"
+        assert minLags >= 2, "minLags must be >= 2"
+        assert maxLags > minLags, "maxLags must be > minLags"
+
+        def hurst(values):
+            if logValues:
+                values = np.log10(values)
+            return _hurst_exp(values, period, minLags, maxLags)
+
+        return technical.batch_skip_none(hurst, technical.batch_input(values))
@@ -19,42 +19,176 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import math
+
 from quantworks import technical
 from quantworks.utils import collections
 from quantworks.utils import dt
 
 import numpy as np
-from scipy import stats
 
 
 # Using scipy.stats.linregress instead of numpy.linalg.lstsq because of this:
 # http://stackoverflow.com/questions/20736255/numpy-linalg-lstsq-with-big-values
 def lsreg(x, y):
+    from scipy import stats
+
     x = np.asarray(x)
     y = np.asarray(y)
     res = stats.linregress(x, y)
     return res[0], res[1]
 
 
+class RollingLeastSquares(object):
+    """A least-squares regression line over a sliding window of (x, y) points, that is updated in O(1) as points get
+    in and out of the window using running sums of x, y, x*y and x*x.
+
+    The sums are taken relative to an anchor point, and are calculated from scratch every windowSize updates (or when
+    non finite values get in or out of the window), so big x values like timestamps don't cause a loss of precision,
+    and rounding errors don't pile up.
+
+    :param windowSize: The number of points to use to calculate the regression. Must be greater than 1.
+    :type windowSize: int.
+    """
+
+    def __init__(self, windowSize):
+        assert(windowSize > 1)
+        self.__windowSize = windowSize
+        self.__x = collections.NumPyDeque(windowSize)
+        self.__y = collections.NumPyDeque(windowSize)
+        self.__x0 = 0.0
+        self.__y0 = 0.0
+        self.__sumX = 0.0
+        self.__sumY = 0.0
+        self.__sumXY = 0.0
+        self.__sumXX = 0.0
+        self.__updates = 0
+
+    def __len__(self):
+        return len(self.__x)
+
+    def getWindowSize(self):
+        return self.__windowSize
+
+    def __reanchor(self):
+        x = self.__x.data()
+        y = self.__y.data()
+        self.__x0 = float(x[0])
+        self.__y0 = float(y[0])
+        x = x - self.__x0
+        y = y - self.__y0
+        self.__sumX = float(x.sum())
+        self.__sumY = float(y.sum())
+        self.__sumXY = float((x * y).sum())
+        self.__sumXX = float((x * x).sum())
+        self.__updates = 0
+
+    def append(self, x, y):
+        """Adds a point, dropping the oldest one if the window is full."""
+        x = float(x)
+        y = float(y)
+        oldX = None
+        oldY = None
+        if len(self.__x) == self.__windowSize:
+            oldX = float(self.__x[0]) - self.__x0
+            oldY = float(self.__y[0]) - self.__y0
+        self.__x.append(x)
+        self.__y.append(y)
+
+        self.__updates += 1
+        if self.__updates >= self.__windowSize or not math.isfinite(x) or not math.isfinite(y) or (
+            oldX is not None and not (math.isfinite(oldX) and math.isfinite(oldY))
+        ):
+            self.__reanchor()
+        else:
+            x -= self.__x0
+            y -= self.__y0
+            if oldX is not None:
+                self.__sumX -= oldX
+                self.__sumY -= oldY
+                self.__sumXY -= oldX * oldY
+                self.__sumXX -= oldX * oldX
+            self.__sumX += x
+            self.__sumY += y
+            self.__sumXY += x * y
+            self.__sumXX += x * x
+
+    def __getMeansAndSlope(self):
+        # Returns the means of x and y relative to the anchor, and the slope.
+        count = len(self.__x)
+        # Both are count ** 2 times the variance of x and the covariance of x and y.
+        varX = count * self.__sumXX - self.__sumX * self.__sumX
+        covXY = count * self.__sumXY - self.__sumX * self.__sumY
+        if varX > 0:
+            slope = covXY / varX
+        else:
+            slope = float("nan")
+        return self.__sumX / count, self.__sumY / count, slope
+
+    def getSlope(self):
+        """Returns the slope of the regression line, or None if there are less than 2 points."""
+        ret = None
+        if len(self.__x) > 1:
+            ret = self.__getMeansAndSlope()[2]
+        return ret
+
+    def getValueAt(self, x):
+        """Returns the value of the regression line at x, or None if there are less than 2 points."""
+        ret = None
+        if len(self.__x) > 1:
+            meanX, meanY, slope = self.__getMeansAndSlope()
+            # Evaluating the line relative to the means avoids losing precision with big x values.
+            ret = self.__y0 + meanY + slope * (x - self.__x0 - meanX)
+        return ret
+
+    def getLastX(self):
+        """Returns the last x value added, or None if the window is empty."""
+        ret = None
+        if len(self.__x):
+            ret = float(self.__x[-1])
+        return ret
+
+
+def _window_slopes(x, y):
+    # Slope of the least-squares regression line for every row. x is either one row for all of them, or one per row.
+    xDev = x - x.mean(axis=-1, keepdims=True)
+    yDev = y - y.mean(axis=-1, keepdims=True)
+    return (xDev * yDev).sum(axis=-1) / (xDev * xDev).sum(axis=-1)
+
+
+def _lsreg_last(timestamps, values, windowSize):
+    def last_value(x, y):
+        # Evaluating the line relative to the mean avoids losing precision with big timestamps.
+        slope = _window_slopes(x, y)
+        return y.mean(axis=-1) + slope * (x[:, -1] - x.mean(axis=-1))
+
+    return technical.apply_to_windows(windowSize, last_value, timestamps, values)
+
+
+def _slope(values, period):
+    x = np.arange(period, dtype=np.float64)
+    return technical.apply_to_windows(period, lambda y: _window_slopes(x, y), values)
+
+
 class LeastSquaresRegressionWindow(technical.EventWindow):
     def __init__(self, windowSize):
         assert(windowSize > 1)
         super(LeastSquaresRegressionWindow, self).__init__(windowSize)
-        self._timestamps = collections.NumPyDeque(windowSize)
+        self.__regression = RollingLeastSquares(windowSize)
 
     def onNewValue(self, dateTime, value):
         technical.EventWindow.onNewValue(self, dateTime, value)
         if value is not None:
             timestamp = dt.datetime_to_timestamp(dateTime)
-            if len(self._timestamps):
-                assert(timestamp > self._timestamps[-1])
-            self._timestamps.append(timestamp)
+            lastTimestamp = self.__regression.getLastX()
+            if lastTimestamp is not None:
+                assert(timestamp > lastTimestamp)
+            self.__regression.append(timestamp, value)
 
     def __getValueAtImpl(self, timestamp):
         ret = None
         if self.windowFull():
-            a, b = lsreg(self._timestamps.data(), self.getValues())
-            ret = a * timestamp + b
+            ret = self.__regression.getValueAt(timestamp)
         return ret
 
     def getValueAt(self, dateTime):
@@ -63,7 +197,7 @@ class LeastSquaresRegressionWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.__getValueAtImpl(self._timestamps.data()[-1])
+            ret = self.__getValueAtImpl(self.__regression.getLastX())
         return ret
 
 
@@ -91,17 +225,42 @@ class LeastSquaresRegression(technical.EventBasedFilter):
         """
         return self.getEventWindow().getValueAt(dateTime)
 
+    @staticmethod
+    def batch(values, timestamps, windowSize):
+        """Calculates the regression values for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param timestamps: The timestamps (seconds since the epoch, like :func:`quantworks.utils.dt.datetime_to_timestamp`)
+            for each value.
+        :type timestamps: numpy.array or list.
+        :param windowSize: The number of values to use to calculate the regression.
+        :type windowSize: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(windowSize > 1)
+        return technical.batch_skip_none(
+            lambda v, t: _lsreg_last(t, v, windowSize), technical.batch_input(values), technical.batch_input(timestamps)
+        )
+
 
 class SlopeEventWindow(technical.EventWindow):
     def __init__(self, windowSize):
         super(SlopeEventWindow, self).__init__(windowSize)
-        self.__x = np.asarray(range(windowSize))
+        self.__regression = RollingLeastSquares(windowSize)
+        # The position of each value is used as x. The slope doesn't change if positions don't start at 0.
+        self.__nextX = 0
+
+    def onNewValue(self, dateTime, value):
+        super(SlopeEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__regression.append(self.__nextX, value)
+            self.__nextX += 1
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            y = self.getValues()
-            ret = lsreg(self.__x, y)[0]
+            ret = self.__regression.getSlope()
         return ret
 
 
@@ -124,6 +283,18 @@ class Slope(technical.EventBasedFilter):
     def __init__(self, dataSeries, period, maxLen=None):
         super(Slope, self).__init__(dataSeries, SlopeEventWindow(period), maxLen)
 
+    @staticmethod
+    def batch(values, period):
+        """Calculates the slope for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param period: The number of values to use to calculate the slope.
+        :type period: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        return technical.batch_skip_none(lambda v: _slope(v, period), technical.batch_input(values))
+
 
 class TrendEventWindow(SlopeEventWindow):
     def __init__(self, windowSize, positiveThreshold, negativeThreshold):
@@ -149,3 +320,17 @@ class TrendEventWindow(SlopeEventWindow):
 class Trend(technical.EventBasedFilter):
     def __init__(self, dataSeries, trendDays, positiveThreshold=0, negativeThreshold=0, maxLen=None):
         super(Trend, self).__init__(dataSeries, TrendEventWindow(trendDays, positiveThreshold, negativeThreshold), maxLen)
+
+    @staticmethod
+    def batch(values, trendDays, positiveThreshold=0, negativeThreshold=0):
+        """Calculates the trend for all the values at once.
+
+        :rtype: numpy.array of objects with True, False or None, just like the filter values.
+        """
+        if negativeThreshold > positiveThreshold:
+            raise Exception("Invalid thresholds")
+        slopes = Slope.batch(values, trendDays)
+        ret = np.full(len(slopes), None, dtype=object)
+        ret[slopes > positiveThreshold] = True
+        ret[slopes < negativeThreshold] = False
+        return ret
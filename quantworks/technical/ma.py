@@ -20,6 +20,8 @@
 """
 
 import numpy as np
+from scipy import signal
+
 from quantworks import technical
 
 
@@ -40,6 +42,40 @@ from quantworks import technical
 # avg1 = avg0 - x
 # avg1 = avg0 + d/3 - a/3
 
+
+def _sma(values, period):
+    ret = np.full(len(values), np.nan)
+    if len(values) >= period:
+        # Rolling sums using a cumulative sum. Values are shifted to keep the cumulative sum small.
+        shift = values[0]
+        cumsum = np.cumsum(values - shift)
+        sums = cumsum[period - 1:].copy()
+        sums[1:] -= cumsum[:-period]
+        ret[period - 1:] = sums / float(period) + shift
+    return ret
+
+
+def _ema(values, period):
+    ret = np.full(len(values), np.nan)
+    if len(values) >= period:
+        multiplier = 2.0 / (period + 1)
+        # The first value is the SMA and the rest are calculated using the recurrence
+        # ema[i] = multiplier * values[i] + (1 - multiplier) * ema[i-1]
+        first = values[:period].mean()
+        b = [multiplier]
+        a = [1, multiplier - 1]
+        zi = signal.lfiltic(b, a, [first])
+        ret[period - 1] = first
+        ret[period:] = signal.lfilter(b, a, values[period:], zi=zi)[0]
+    return ret
+
+
+def _wma(values, weights):
+    windowSize = len(weights)
+    weightSum = float(weights.sum())
+    return technical.apply_to_windows(windowSize, lambda windows: windows.dot(weights) / weightSum, values)
+
+
 class SMAEventWindow(technical.EventWindow):
     def __init__(self, period):
         assert(period > 0)
@@ -79,6 +115,19 @@ class SMA(technical.EventBasedFilter):
     def __init__(self, dataSeries, period, maxLen=None):
         super(SMA, self).__init__(dataSeries, SMAEventWindow(period), maxLen)
 
+    @staticmethod
+    def batch(values, period):
+        """Calculates the SMA for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param period: The number of values to use to calculate the SMA.
+        :type period: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(period > 0)
+        return technical.batch_skip_none(lambda v: _sma(v, period), technical.batch_input(values))
+
 
 class EMAEventWindow(technical.EventWindow):
     def __init__(self, period):
@@ -117,6 +166,19 @@ class EMA(technical.EventBasedFilter):
     def __init__(self, dataSeries, period, maxLen=None):
         super(EMA, self).__init__(dataSeries, EMAEventWindow(period), maxLen)
 
+    @staticmethod
+    def batch(values, period):
+        """Calculates the EMA for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param period: The number of values to use to calculate the EMA. Must be an integer greater than 1.
+        :type period: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(period > 1)
+        return technical.batch_skip_none(lambda v: _ema(v, period), technical.batch_input(values))
+
 
 class WMAEventWindow(technical.EventWindow):
     def __init__(self, weights):
@@ -148,3 +210,17 @@ class WMA(technical.EventBasedFilter):
 
     def __init__(self, dataSeries, weights, maxLen=None):
         super(WMA, self).__init__(dataSeries, WMAEventWindow(weights), maxLen)
+
+    @staticmethod
+    def batch(values, weights):
+        """Calculates the WMA for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param weights: A list of int/float with the weights.
+        :type weights: list.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(len(weights) > 0)
+        weights = np.asarray(weights, dtype=np.float64)
+        return technical.batch_skip_none(lambda v: _wma(v, weights), technical.batch_input(values))
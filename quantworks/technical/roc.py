@@ -19,9 +19,22 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import numpy as np
+
 from quantworks import technical
 
 
+def _roc(values, valuesAgo):
+    ret = np.full(len(values), np.nan)
+    if len(values) > valuesAgo:
+        prev = values[:-valuesAgo]
+        diff = values[valuesAgo:] - prev
+        with np.errstate(divide="ignore", invalid="ignore"):
+            roc = np.where(prev != 0, diff / prev, np.nan)
+        ret[valuesAgo:] = np.where(diff == 0, 0.0, roc)
+    return ret
+
+
 class ROCEventWindow(technical.EventWindow):
     def __init__(self, windowSize):
         super(ROCEventWindow, self).__init__(windowSize)
@@ -56,3 +69,16 @@ class RateOfChange(technical.EventBasedFilter):
     def __init__(self, dataSeries, valuesAgo, maxLen=None):
         assert(valuesAgo > 0)
         super(RateOfChange, self).__init__(dataSeries, ROCEventWindow(valuesAgo + 1), maxLen)
+
+    @staticmethod
+    def batch(values, valuesAgo):
+        """Calculates the rate of change for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param valuesAgo: The number of values back that a given value will compare to. Must be > 0.
+        :type valuesAgo: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(valuesAgo > 0)
+        return technical.batch_skip_none(lambda v: _roc(v, valuesAgo), technical.batch_input(values))
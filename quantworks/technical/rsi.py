@@ -20,6 +20,8 @@
 """
 
 from six.moves import xrange
+import numpy as np
+from scipy import signal
 
 from quantworks import technical
 
@@ -70,6 +72,34 @@ def avg_gain_loss(values, begin, end):
     return (gain/float(rangeLen-1), loss/float(rangeLen-1))
 
 
+def wilder_smoothing(first, values, period):
+    # avg[i] = (avg[i-1] * (period - 1) + values[i]) / period
+    b = [1 / float(period)]
+    a = [1, -(period - 1) / float(period)]
+    zi = signal.lfiltic(b, a, [first])
+    return signal.lfilter(b, a, values, zi=zi)[0]
+
+
+def _rsi(values, period):
+    ret = np.full(len(values), np.nan)
+    if len(values) > period:
+        changes = np.diff(values)
+        gains = np.where(changes < 0, 0, changes)
+        losses = np.where(changes < 0, -changes, 0)
+
+        avgGains = np.empty(len(changes) - period + 1)
+        avgLosses = np.empty(len(avgGains))
+        avgGains[0] = gains[:period].sum() / float(period)
+        avgLosses[0] = losses[:period].sum() / float(period)
+        avgGains[1:] = wilder_smoothing(avgGains[0], gains[period:], period)
+        avgLosses[1:] = wilder_smoothing(avgLosses[0], losses[period:], period)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - 100 / (1 + avgGains / avgLosses)
+        ret[period:] = np.where(avgLosses == 0, 100, rsi)
+    return ret
+
+
 class RSIEventWindow(technical.EventWindow):
     def __init__(self, period):
         assert(period > 1)
@@ -125,3 +155,16 @@ class RSI(technical.EventBasedFilter):
 
     def __init__(self, dataSeries, period, maxLen=None):
         super(RSI, self).__init__(dataSeries, RSIEventWindow(period), maxLen)
+
+    @staticmethod
+    def batch(values, period):
+        """Calculates the RSI for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param period: The period. Note that if period is **n**, then **n+1** values are used. Must be > 1.
+        :type period: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(period > 1)
+        return technical.batch_skip_none(lambda v: _rsi(v, period), technical.batch_input(values))
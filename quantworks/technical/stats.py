@@ -19,10 +19,108 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import math
+
+import numpy as np
+
 from quantworks import technical
 
 
-class StdDevEventWindow(technical.EventWindow):
+def _std_dev(values, period, ddof):
+    return technical.apply_to_windows(period, lambda windows: windows.std(axis=1, ddof=ddof), values)
+
+
+def _z_score(values, period, ddof):
+    def z_score(windows):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (windows[:, -1] - windows.mean(axis=1)) / windows.std(axis=1, ddof=ddof)
+
+    return technical.apply_to_windows(period, z_score, values)
+
+
+class RollingMomentsEventWindow(technical.EventWindow):
+    """An :class:`quantworks.technical.EventWindow` that keeps the mean and the variance of the values in the window up
+    to date as values get in and out of it, so getting them doesn't depend on the window size.
+
+    Welford's algorithm is used to update both moments, and they are calculated from scratch every windowSize updates
+    (or when non finite values get in or out of the window) so rounding errors don't pile up.
+
+    :param windowSize: The size of the window. Must be greater than 0.
+    :type windowSize: int.
+    """
+
+    def __init__(self, windowSize):
+        super(RollingMomentsEventWindow, self).__init__(windowSize)
+        self.__mean = 0.0
+        self.__m2 = 0.0  # The sum of the squared differences from the mean.
+        self.__updates = 0
+
+    def __reanchor(self):
+        values = self.getValues()
+        self.__mean = float(values.mean())
+        self.__m2 = float(((values - self.__mean) ** 2).sum())
+        self.__updates = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is None:
+            super(RollingMomentsEventWindow, self).onNewValue(dateTime, value)
+            return
+
+        oldValue = None
+        if self.windowFull():
+            oldValue = float(self.getValues()[0])
+        super(RollingMomentsEventWindow, self).onNewValue(dateTime, value)
+        value = float(value)
+
+        self.__updates += 1
+        if self.__updates >= self.getWindowSize() or not math.isfinite(value) or (
+            oldValue is not None and not math.isfinite(oldValue)
+        ):
+            self.__reanchor()
+        elif oldValue is None:
+            # The window is growing.
+            delta = value - self.__mean
+            self.__mean += delta / len(self.getValues())
+            self.__m2 += delta * (value - self.__mean)
+        else:
+            # value replaces oldValue.
+            delta = value - oldValue
+            prevMean = self.__mean
+            self.__mean += delta / self.getWindowSize()
+            self.__m2 = max(self.__m2 + delta * (value - self.__mean + oldValue - prevMean), 0.0)
+
+    def getMean(self):
+        """Returns the mean of the values in the window, or None if the window is empty."""
+        ret = None
+        if len(self.getValues()):
+            ret = self.__mean
+        return ret
+
+    def getVariance(self, ddof=0):
+        """Returns the variance of the values in the window, or None if there are not enough values.
+
+        :param ddof: Delta degrees of freedom.
+        :type ddof: int.
+        """
+        ret = None
+        count = len(self.getValues())
+        if count > ddof:
+            ret = self.__m2 / (count - ddof)
+        return ret
+
+    def getStdDev(self, ddof=0):
+        """Returns the standard deviation of the values in the window, or None if there are not enough values.
+
+        :param ddof: Delta degrees of freedom.
+        :type ddof: int.
+        """
+        ret = self.getVariance(ddof)
+        if ret is not None:
+            ret = math.sqrt(ret)
+        return ret
+
+
+class StdDevEventWindow(RollingMomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 0)
         super(StdDevEventWindow, self).__init__(period)
@@ -31,7 +129,7 @@ class StdDevEventWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.getValues().std(ddof=self.__ddof)
+            ret = self.getStdDev(self.__ddof)
         return ret
 
 
@@ -53,8 +151,23 @@ class StdDev(technical.EventBasedFilter):
     def __init__(self, dataSeries, period, ddof=0, maxLen=None):
         super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof), maxLen)
 
+    @staticmethod
+    def batch(values, period, ddof=0):
+        """Calculates the standard deviation for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param period: The number of values to use to calculate the Standard deviation.
+        :type period: int.
+        :param ddof: Delta degrees of freedom.
+        :type ddof: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(period > 0)
+        return technical.batch_skip_none(lambda v: _std_dev(v, period, ddof), technical.batch_input(values))
 
-class ZScoreEventWindow(technical.EventWindow):
+
+class ZScoreEventWindow(RollingMomentsEventWindow):
     def __init__(self, period, ddof):
         assert(period > 1)
         super(ZScoreEventWindow, self).__init__(period)
@@ -63,11 +176,9 @@ class ZScoreEventWindow(technical.EventWindow):
     def getValue(self):
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            lastValue = values[-1]
-            mean = values.mean()
-            std = values.std(ddof=self.__ddof)
-            ret = (lastValue - mean) / float(std)
+            # Use a numpy scalar so a standard deviation of 0 returns inf/nan instead of raising.
+            lastValue = self.getValues()[-1]
+            ret = (lastValue - self.getMean()) / self.getStdDev(self.__ddof)
         return ret
 
 
@@ -88,3 +199,18 @@ class ZScore(technical.EventBasedFilter):
 
     def __init__(self, dataSeries, period, ddof=0, maxLen=None):
         super(ZScore, self).__init__(dataSeries, ZScoreEventWindow(period, ddof), maxLen)
+
+    @staticmethod
+    def batch(values, period, ddof=0):
+        """Calculates the Z-Score for all the values at once.
+
+        :param values: The values to filter. None/NaN values are skipped, just like when filtering a DataSeries.
+        :type values: numpy.array or list.
+        :param period: The number of values to use to calculate the Z-Score.
+        :type period: int.
+        :param ddof: Delta degrees of freedom to use for the standard deviation.
+        :type ddof: int.
+        :rtype: numpy.array with NaN where the filter would return None.
+        """
+        assert(period > 1)
+        return technical.batch_skip_none(lambda v: _z_score(v, period, ddof), technical.batch_input(values))
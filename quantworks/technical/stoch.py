@@ -19,11 +19,15 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import numpy as np
+
 from quantworks import technical
 from quantworks.dataseries import bards
 from quantworks.technical import ma
+from quantworks.utils import collections
 
 
+# This is only for backward compatibility since SOEventWindow doesn't use it anymore.
 def get_low_high_values(useAdjusted, bars):
     currBar = bars[0]
     lowestLow = currBar.getLow(useAdjusted)
@@ -35,17 +39,36 @@ def get_low_high_values(useAdjusted, bars):
     return (lowestLow, highestHigh)
 
 
+def _stochastic_k(high, low, close, period):
+    lowestLow = technical.apply_to_windows(period, lambda windows: windows.min(axis=1), low)
+    highestHigh = technical.apply_to_windows(period, lambda windows: windows.max(axis=1), high)
+    closeDelta = close - lowestLow
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = closeDelta / (highestHigh - lowestLow) * 100
+    return np.where(closeDelta == 0, 0.0, ret)
+
+
 class SOEventWindow(technical.EventWindow):
+    # The window holds close values, and the lowest low and highest high are tracked as bars get in and out of it.
     def __init__(self, period, useAdjustedValues):
         assert(period > 1)
-        super(SOEventWindow, self).__init__(period, dtype=object)
+        super(SOEventWindow, self).__init__(period)
         self.__useAdjusted = useAdjustedValues
+        self.__lowestLow = collections.RollingExtremum(period, True)
+        self.__highestHigh = collections.RollingExtremum(period, False)
+
+    def onNewValue(self, dateTime, value):
+        if value is not None:
+            super(SOEventWindow, self).onNewValue(dateTime, value.getClose(self.__useAdjusted))
+            self.__lowestLow.append(value.getLow(self.__useAdjusted))
+            self.__highestHigh.append(value.getHigh(self.__useAdjusted))
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            lowestLow, highestHigh = get_low_high_values(self.__useAdjusted, self.getValues())
-            currentClose = self.getValues()[-1].getClose(self.__useAdjusted)
+            lowestLow = self.__lowestLow.getValue()
+            highestHigh = self.__highestHigh.getValue()
+            currentClose = float(self.getValues()[-1])
             closeDelta = currentClose - lowestLow
             if closeDelta:
                 ret = closeDelta / float(highestHigh - lowestLow) * 100
@@ -81,6 +104,29 @@ class StochasticOscillator(technical.EventBasedFilter):
         super(StochasticOscillator, self).__init__(barDataSeries, SOEventWindow(period, useAdjustedValues), maxLen)
         self.__d = ma.SMA(self, dSMAPeriod, maxLen)
 
+    @staticmethod
+    def batch(high, low, close, period, dSMAPeriod=3):
+        """Calculates %K and %D for all the bars at once.
+
+        :param high: The high values. Use the adjusted values to get the same results as using useAdjustedValues=True.
+        :type high: numpy.array or list.
+        :param low: The low values.
+        :type low: numpy.array or list.
+        :param close: The close values.
+        :type close: numpy.array or list.
+        :param period: The period. Must be > 1.
+        :type period: int.
+        :param dSMAPeriod: The %D SMA period. Must be > 1.
+        :type dSMAPeriod: int.
+        :rtype: A tuple with %K and %D as numpy.arrays, with NaN where the filters would return None.
+        """
+        assert(period > 1)
+        assert dSMAPeriod > 1, "dSMAPeriod must be > 1"
+        k = _stochastic_k(
+            technical.batch_input(high), technical.batch_input(low), technical.batch_input(close), period
+        )
+        return k, ma.SMA.batch(k, dSMAPeriod)
+
     def getD(self):
         """Returns a :class:`quantworks.dataseries.DataSeries` with the %D values."""
         return self.__d
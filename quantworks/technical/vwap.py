@@ -19,30 +19,120 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import math
+
 from quantworks import technical
 from quantworks.dataseries import bards
+from quantworks.utils import collections
+
+
+# Used as the session before the first bar, since a sessionKey may return any value.
+_NO_SESSION = object()
+
+
+def _session_date(dateTime):
+    return dateTime.date()
 
 
 class VWAPEventWindow(technical.EventWindow):
+    """Keeps the sums of price * volume and volume for the bars in the window up to date as bars get in and out of it,
+    so calculating the VWAP doesn't depend on the window size.
+
+    The sums are calculated from scratch every windowSize updates (or when non finite values get in or out of the
+    window) so rounding errors don't pile up.
+    """
+
     def __init__(self, windowSize, useTypicalPrice):
-        super(VWAPEventWindow, self).__init__(windowSize, dtype=object)
+        # The window holds price * volume for each bar, and the volumes are held in a parallel deque.
+        super(VWAPEventWindow, self).__init__(windowSize)
+        self.__volumes = collections.NumPyDeque(windowSize)
         self.__useTypicalPrice = useTypicalPrice
+        self.__priceVolume = 0.0
+        self.__volume = 0.0
+        self.__updates = 0
+
+    def __reanchor(self):
+        self.__priceVolume = float(self.getValues().sum())
+        self.__volume = float(self.__volumes.data().sum())
+        self.__updates = 0
+
+    def onNewValue(self, dateTime, value):
+        if value is None:
+            return
+
+        if self.__useTypicalPrice:
+            price = value.getTypicalPrice()
+        else:
+            price = value.getPrice()
+        volume = float(value.getVolume())
+        priceVolume = price * volume
+
+        oldPriceVolume = None
+        oldVolume = None
+        if self.windowFull():
+            oldPriceVolume = float(self.getValues()[0])
+            oldVolume = float(self.__volumes[0])
+        super(VWAPEventWindow, self).onNewValue(dateTime, priceVolume)
+        self.__volumes.append(volume)
+
+        self.__updates += 1
+        if self.__updates >= self.getWindowSize() or not math.isfinite(priceVolume) or (
+            oldPriceVolume is not None and not math.isfinite(oldPriceVolume)
+        ):
+            self.__reanchor()
+        else:
+            self.__priceVolume += priceVolume
+            self.__volume += volume
+            if oldPriceVolume is not None:
+                self.__priceVolume -= oldPriceVolume
+                self.__volume -= oldVolume
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            cumTotal = 0
-            cumVolume = 0
+            ret = self.__priceVolume / self.__volume
+        return ret
 
-            for bar in self.getValues():
-                if self.__useTypicalPrice:
-                    cumTotal += bar.getTypicalPrice() * bar.getVolume()
-                else:
-                    cumTotal += bar.getPrice() * bar.getVolume()
-                cumVolume += bar.getVolume()
 
-            ret = cumTotal / float(cumVolume)
-        return ret
+class AnchoredVWAPEventWindow(technical.EventWindow):
+    """Accumulates price * volume and volume since the beginning of the current session.
+
+    Only the sums are kept, so the window storage is unused and getValues() is always empty.
+    """
+
+    def __init__(self, useTypicalPrice, sessionKey):
+        super(AnchoredVWAPEventWindow, self).__init__(1)
+        self.__useTypicalPrice = useTypicalPrice
+        self.__sessionKey = sessionKey
+        self.__session = _NO_SESSION
+        self.__priceVolume = 0.0
+        self.__volume = 0.0
+        self.__value = None
+
+    def onNewValue(self, dateTime, value):
+        if value is None:
+            return
+
+        session = self.__sessionKey(value.getDateTime())
+        if session != self.__session:
+            self.__session = session
+            self.__priceVolume = 0.0
+            self.__volume = 0.0
+
+        if self.__useTypicalPrice:
+            price = value.getTypicalPrice()
+        else:
+            price = value.getPrice()
+        volume = float(value.getVolume())
+        self.__priceVolume += price * volume
+        self.__volume += volume
+        self.__value = self.__priceVolume / self.__volume if self.__volume else None
+
+    def windowFull(self):
+        return self.__value is not None
+
+    def getValue(self):
+        return self.__value
 
 
 class VWAP(technical.EventBasedFilter):
@@ -65,3 +155,34 @@ class VWAP(technical.EventBasedFilter):
             "dataSeries must be a dataseries.bards.BarDataSeries instance"
 
         super(VWAP, self).__init__(dataSeries, VWAPEventWindow(period, useTypicalPrice), maxLen)
+
+
+class AnchoredVWAP(technical.EventBasedFilter):
+    """Anchored Volume Weighted Average Price filter. The VWAP is calculated using all the bars since the beginning of
+    the session, and it is reset when a new session begins.
+
+    :param dataSeries: The DataSeries instance being filtered.
+    :type dataSeries: :class:`quantworks.dataseries.bards.BarDataSeries`.
+    :param useTypicalPrice: True if the typical price should be used instead of the closing price.
+    :type useTypicalPrice: boolean.
+    :param sessionKey: A function that receives a bar's :class:`datetime.datetime` and returns a value identifying the
+        session the bar belongs to. A new session begins when this value changes.
+        If None then the bar's date is used, so the VWAP is reset every day.
+    :type sessionKey: function.
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        The default sessionKey uses the date of the datetime as is. If the bars are in a timezone other than the
+        market's one, use a sessionKey that converts the datetime to the market timezone first.
+    """
+
+    def __init__(self, dataSeries, useTypicalPrice=False, sessionKey=None, maxLen=None):
+        assert isinstance(dataSeries, bards.BarDataSeries), \
+            "dataSeries must be a dataseries.bards.BarDataSeries instance"
+
+        if sessionKey is None:
+            sessionKey = _session_date
+        super(AnchoredVWAP, self).__init__(dataSeries, AnchoredVWAPEventWindow(useTypicalPrice, sessionKey), maxLen)
@@ -19,6 +19,9 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+from collections import deque
+import numbers
+
 import numpy as np
 
 
@@ -58,50 +61,56 @@ def intersect(values1, values2, skipNone=False):
 
 
 # Like a collections.deque but using a numpy.array.
+# Values are kept in a circular buffer that is twice as long as maxLen, and every value is written twice, at pos and
+# at pos + maxLen. This way the values, in order, are always available as a contiguous slice of the buffer and
+# appending doesn't require shifting items once the deque is full.
 class NumPyDeque(object):
     def __init__(self, maxLen, dtype=float):
         assert maxLen > 0, "Invalid maximum length"
 
-        self.__values = np.empty(maxLen, dtype=dtype)
+        self.__values = np.empty(maxLen * 2, dtype=dtype)
         self.__maxLen = maxLen
-        self.__nextPos = 0
+        self.__start = 0
+        self.__len = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        if self.__nextPos < self.__maxLen:
-            self.__values[self.__nextPos] = value
-            self.__nextPos += 1
+        pos = self.__start + self.__len
+        if pos >= self.__maxLen:
+            pos -= self.__maxLen
+        self.__values[pos] = value
+        self.__values[pos + self.__maxLen] = value
+
+        if self.__len < self.__maxLen:
+            self.__len += 1
         else:
-            # Shift items to the left and put the last value.
-            # I'm not using np.roll to avoid creating a new array.
-            self.__values[0:-1] = self.__values[1:]
-            self.__values[self.__nextPos - 1] = value
+            # Drop the oldest value.
+            self.__start += 1
+            if self.__start == self.__maxLen:
+                self.__start = 0
 
     def data(self):
-        # If all values are not initialized, return a portion of the array.
-        if self.__nextPos < self.__maxLen:
-            ret = self.__values[0:self.__nextPos]
-        else:
-            ret = self.__values
-        return ret
+        return self.__values[self.__start:self.__start + self.__len]
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         # Create empty, copy last values and swap.
-        values = np.empty(maxLen, dtype=self.__values.dtype)
-        lastValues = self.__values[0:self.__nextPos]
-        values[0:min(maxLen, len(lastValues))] = lastValues[-1*min(maxLen, len(lastValues)):]
+        values = np.empty(maxLen * 2, dtype=self.__values.dtype)
+        length = min(maxLen, self.__len)
+        lastValues = self.data()[self.__len - length:]
+        values[0:length] = lastValues
+        values[maxLen:maxLen + length] = lastValues
         self.__values = values
 
         self.__maxLen = maxLen
-        if self.__nextPos >= self.__maxLen:
-            self.__nextPos = self.__maxLen
+        self.__start = 0
+        self.__len = length
 
     def __len__(self):
-        return self.__nextPos
+        return self.__len
 
     def __getitem__(self, key):
         return self.data()[key]
@@ -110,33 +119,126 @@ class NumPyDeque(object):
 # I'm not using collections.deque because:
 # 1: Random access is slower.
 # 2: Slicing is not supported.
+# Values are kept in order in a list. Once full, the oldest values are not removed right away but skipped using an
+# offset, and they are deleted all at once every maxLen appends. This way appending is amortized O(1) and the values
+# are always available as a contiguous slice of the list.
 class ListDeque(object):
     def __init__(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         self.__values = []
         self.__maxLen = maxLen
+        # Position of the oldest value.
+        self.__offset = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        self.__values.append(value)
+        values = self.__values
+        values.append(value)
         # Check bounds
-        if len(self.__values) > self.__maxLen:
-            self.__values.pop(0)
+        if len(values) - self.__offset > self.__maxLen:
+            self.__offset += 1
+            if self.__offset == self.__maxLen:
+                del values[:self.__offset]
+                self.__offset = 0
+
+    def __compact(self):
+        if self.__offset:
+            del self.__values[:self.__offset]
+            self.__offset = 0
 
     def data(self):
+        self.__compact()
         return self.__values
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
+        self.__compact()
         self.__maxLen = maxLen
         self.__values = self.__values[-1*maxLen:]
 
     def __len__(self):
-        return len(self.__values)
+        return len(self.__values) - self.__offset
 
     def __getitem__(self, key):
-        return self.__values[key]
+        offset = self.__offset
+        if offset == 0:
+            return self.__values[key]
+
+        values = self.__values
+        # Checking the class first since isinstance with numbers.Integral is a lot slower.
+        if key.__class__ is int or (key.__class__ is not slice and isinstance(key, numbers.Integral)):
+            if key < 0:
+                # Negative positions are relative to the newest value, just like in the list.
+                if key < offset - len(values):
+                    raise IndexError("list index out of range")
+                return values[key]
+            return values[offset + key]
+        elif key.__class__ is slice:
+            if key.stop is None and key.step is None:
+                # All values or the last ones, which are the usual cases.
+                begin = key.start
+                if begin is None:
+                    return values[offset:]
+                elif begin.__class__ is int and begin < 0:
+                    if begin < offset - len(values):
+                        begin = offset - len(values)
+                    return values[begin:]
+            begin, end, step = key.indices(len(values) - offset)
+            return values[offset + begin:offset + end:step]
+        return self.data()[key]
+
+
+# Keeps track of the lowest (or highest) of the last maxLen values appended, in amortized O(1) per value.
+# A deque holds the (position, value) pairs that may still become the extreme value, with values increasing (or
+# decreasing) from front to back. Each new value drops the ones at the back it beats, since they can't become the
+# extreme value before it leaves the window, and values at the front are dropped once they leave the window.
+class RollingExtremum(object):
+    def __init__(self, maxLen, useMin):
+        assert maxLen > 0, "Invalid maximum length"
+
+        self.__maxLen = maxLen
+        self.__useMin = useMin
+        self.__candidates = deque()
+        self.__count = 0
+        # Position of the last NaN appended. The extreme value is NaN while it is in the window, like with numpy.
+        self.__lastNaN = None
+
+    def getMaxLen(self):
+        return self.__maxLen
+
+    def append(self, value):
+        value = float(value)
+        pos = self.__count
+        self.__count += 1
+        candidates = self.__candidates
+
+        if value != value:  # NaN
+            self.__lastNaN = pos
+        else:
+            if self.__useMin:
+                while candidates and candidates[-1][1] >= value:
+                    candidates.pop()
+            else:
+                while candidates and candidates[-1][1] <= value:
+                    candidates.pop()
+            candidates.append((pos, value))
+
+        # Drop the candidate that is out of the window, if any. Only one value leaves the window on each append.
+        if candidates and candidates[0][0] <= pos - self.__maxLen:
+            candidates.popleft()
+
+    def getValue(self):
+        """Returns the lowest (or highest) of the last maxLen values, or None if no values were appended."""
+        ret = None
+        if self.__lastNaN is not None and self.__lastNaN >= self.__count - self.__maxLen:
+            ret = float("nan")
+        elif len(self.__candidates):
+            ret = self.__candidates[0][1]
+        return ret
+
+    def __len__(self):
+        return min(self.__count, self.__maxLen)
@@ -22,6 +22,7 @@
 import csv
 import logging
 
+import numpy as np
 import six
 from six.moves import xrange
 import requests
@@ -66,6 +67,75 @@ class FastDictReader(object):
         return self._next_impl()
 
 
+def read_columns(path, delimiter=",", fieldNames=None, chunkSize=2**26):
+    """Reads a CSV file and returns the values as columns of strings, processing a chunk of rows at a time.
+    This is a lot faster than :class:`FastDictReader`, but quoted values and empty rows are not supported.
+
+    :param path: The path to the CSV file.
+    :param delimiter: The character that separates values.
+    :param fieldNames: The field names, or None if the first row has them.
+    :param chunkSize: The approximate number of characters in each chunk of rows. Only one chunk is read into memory
+        at a time.
+    :rtype: A tuple with the field names and a generator that yields, for each chunk of rows, a list with one list of
+        strings per field. ValueError is raised if the file is not supported.
+    """
+    skipHeader = fieldNames is None
+    if skipHeader:
+        with open(path, "r") as f:
+            header = f.readline().rstrip("\n")
+        if '"' in header:
+            raise ValueError("Quoted values and empty rows are not supported")
+        fieldNames = header.split(delimiter)
+    fieldNames = list(fieldNames)
+
+    def read_chunks():
+        with open(path, "r") as f:
+            if skipHeader:
+                f.readline()
+            # The last line read may be incomplete, so it is carried over to the next chunk.
+            pending = ""
+            # Empty rows are only supported at the end of the file.
+            emptyRows = False
+            while True:
+                data = f.read(chunkSize)
+                eof = len(data) == 0
+                if eof:
+                    rows = pending
+                else:
+                    data = pending + data
+                    end = data.rfind("\n")
+                    if end == -1:
+                        pending = data
+                        continue
+                    rows = data[:end]
+                    pending = data[end + 1:]
+
+                values = rows.rstrip("\n")
+                if '"' in values or (len(values) and (emptyRows or values.startswith("\n") or "\n\n" in values)):
+                    raise ValueError("Quoted values and empty rows are not supported")
+                if len(values):
+                    yield _split_columns(values, delimiter, len(fieldNames))
+                if eof:
+                    break
+                if len(values) < len(rows) or len(rows) == 0:
+                    emptyRows = True
+
+    return fieldNames, read_chunks()
+
+
+def _split_columns(rows, delimiter, columnCount):
+    # Check that every row has the right number of values before splitting everything at once.
+    buf = np.frombuffer(rows.encode(), dtype=np.uint8)
+    delimiterPositions = np.flatnonzero(buf == ord(delimiter))
+    rowEnds = np.searchsorted(delimiterPositions, np.flatnonzero(buf == ord("\n")))
+    delimiterCounts = np.diff(rowEnds, prepend=0, append=len(delimiterPositions))
+    if (delimiterCounts != columnCount - 1).any():
+        raise ValueError("Expected %d columns in every row" % columnCount)
+
+    values = rows.replace("\n", delimiter).split(delimiter)
+    return [values[i::columnCount] for i in xrange(columnCount)]
+
+
 def download_csv(url, url_params=None, content_type="text/csv"):
     response = requests.get(url, params=url_params)
 
@@ -20,6 +20,8 @@
 """
 
 import datetime
+
+import numpy as np
 import pytz
 
 
@@ -67,6 +69,144 @@ def timestamp_to_datetime(timeStamp, localized=True):
     return ret
 
 
+def datetime_to_epoch_ns(dateTime):
+    """Converts a datetime.datetime to the number of nanoseconds since the epoch.
+    Naive datetimes are treated as if they were in UTC."""
+    if dateTime.tzinfo is None:
+        diff = dateTime - epoch_naive
+    elif datetime_is_naive(dateTime):
+        diff = dateTime.replace(tzinfo=None) - epoch_naive
+    else:
+        diff = dateTime - epoch_utc
+    return ((diff.days * 86400 + diff.seconds) * 1000000 + diff.microseconds) * 1000
+
+
+def epoch_ns_to_datetime(epochNs, tzInfo=None):
+    """Converts nanoseconds since the epoch back into a datetime.datetime.
+    If tzInfo is None a naive datetime is returned, otherwise the datetime is adjusted to that timezone."""
+    ret = epoch_naive + datetime.timedelta(microseconds=int(epochNs) // 1000)
+    if tzInfo is not None:
+        ret = pytz.utc.localize(ret).astimezone(tzInfo)
+    return ret
+
+
+def epoch_ns_to_datetimes(epochNs, tzInfo=None):
+    """Same as :func:`epoch_ns_to_datetime`, but converts a numpy.array of int64 values and returns a list."""
+    ret = (np.asarray(epochNs, dtype=np.int64) // 1000).astype("datetime64[us]").tolist()
+    if tzInfo is not None:
+        ret = [pytz.utc.localize(dateTime).astimezone(tzInfo) for dateTime in ret]
+    return ret
+
+
+def localize_epoch_ns(epochNs, timeZone):
+    """Localizes naive datetimes, supplied as int64 nanoseconds since the epoch, to a timezone like :func:`localize`
+    does, and returns the nanoseconds since the epoch in UTC.
+
+    UTC offsets are calculated once per day, and per datetime only for days when the offset changes.
+    """
+    epochNs = np.asarray(epochNs, dtype=np.int64)
+    days, dayIdxs = np.unique(epochNs // _DAY_NS, return_inverse=True)
+    dayIdxs = dayIdxs.reshape(-1)
+    offsets = np.empty(len(days), dtype=np.int64)
+    changingDays = []
+    for i, day in enumerate(days.tolist()):
+        offsets[i] = _get_utc_offset_ns(day * _DAY_NS, timeZone)
+        if offsets[i] != _get_utc_offset_ns((day + 1) * _DAY_NS - 1000, timeZone):
+            changingDays.append(i)
+
+    ret = epochNs - offsets[dayIdxs]
+    for i in changingDays:
+        for pos in np.flatnonzero(dayIdxs == i):
+            ret[pos] = epochNs[pos] - _get_utc_offset_ns(epochNs[pos], timeZone)
+    return ret
+
+
+def _get_utc_offset_ns(epochNs, timeZone):
+    offset = localize(epoch_ns_to_datetime(epochNs), timeZone).utcoffset()
+    return ((offset.days * 86400 + offset.seconds) * 1000000 + offset.microseconds) * 1000
+
+
+def parse_datetimes(values, dateTimeFormat):
+    """Parses a sequence of strings into naive datetimes, as int64 nanoseconds since the epoch, using NumPy.
+
+    This is a lot faster than calling strptime for each value, but only fixed width formats made of the %Y, %m, %d, %H,
+    %M and %S directives are supported, and every value must be zero padded. A ValueError is raised if the format is not
+    supported or if a value doesn't match it.
+
+    :param values: The strings to parse.
+    :param dateTimeFormat: The format, for example "%Y-%m-%d %H:%M:%S".
+    :type dateTimeFormat: string.
+    :rtype: A numpy.array.
+    """
+    # Map every directive to its position in the values, and every other character to the expected byte.
+    fields = {}
+    literals = []
+    width = 0
+    i = 0
+    while i < len(dateTimeFormat):
+        if dateTimeFormat[i] == "%":
+            directive = dateTimeFormat[i + 1:i + 2]
+            size = _FIXED_WIDTH_DIRECTIVES.get(directive)
+            if size is None or directive in fields:
+                raise ValueError("Unsupported datetime format %s" % dateTimeFormat)
+            fields[directive] = (width, size)
+            width += size
+            i += 2
+        else:
+            literals.append((width, ord(dateTimeFormat[i])))
+            width += 1
+            i += 1
+    if any(directive not in fields for directive in "Ymd"):
+        raise ValueError("Unsupported datetime format %s" % dateTimeFormat)
+
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # One row of bytes per value, followed by a line break. A value with a different width misplaces line breaks.
+    codes = np.frombuffer(("\n".join(values) + "\n").encode(), dtype=np.uint8)
+    if len(codes) != len(values) * (width + 1):
+        raise ValueError("Values don't match the format %s" % dateTimeFormat)
+    codes = codes.reshape(len(values), width + 1)
+    if (codes[:, width] != ord("\n")).any():
+        raise ValueError("Values don't match the format %s" % dateTimeFormat)
+    for pos, code in literals:
+        if (codes[:, pos] != code).any():
+            raise ValueError("Values don't match the format %s" % dateTimeFormat)
+
+    def get_field(directive, minValue, maxValue):
+        if directive not in fields:
+            return 0
+        pos, size = fields[directive]
+        digits = codes[:, pos:pos + size].astype(np.int64) - ord("0")
+        if ((digits < 0) | (digits > 9)).any():
+            raise ValueError("Values don't match the format %s" % dateTimeFormat)
+        ret = digits.dot(10 ** np.arange(size - 1, -1, -1, dtype=np.int64))
+        if ((ret < minValue) | (ret > maxValue)).any():
+            raise ValueError("Values out of range for the format %s" % dateTimeFormat)
+        return ret
+
+    # Years that fit in int64 nanoseconds since the epoch.
+    year = get_field("Y", 1678, 2261)
+    month = get_field("m", 1, 12)
+    day = get_field("d", 1, 31)
+    hour = get_field("H", 0, 23)
+    minute = get_field("M", 0, 59)
+    second = get_field("S", 0, 59)
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    if (day > _DAYS_IN_MONTH[month - 1] + (leap & (month == 2))).any():
+        raise ValueError("Day is out of range for month")
+
+    # Days since the epoch, using a calendar where years start in March so the leap day is the last one.
+    year = year - (month <= 2)
+    era = year // 400
+    yearOfEra = year - era * 400
+    dayOfYear = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    dayOfEra = yearOfEra * 365 + yearOfEra // 4 - yearOfEra // 100 + dayOfYear
+    days = era * 146097 + dayOfEra - 719468
+    return (((days * 24 + hour) * 60 + minute) * 60 + second) * 1000000000
+
+
 def get_first_monday(year):
     ret = datetime.date(year, 1, 1)
     if ret.weekday() != 0:
@@ -83,4 +223,9 @@ def get_last_monday(year):
     return ret
 
 
-epoch_utc = as_utc(datetime.datetime(1970, 1, 1))
+_DAY_NS = 86400 * 1000000000
+_FIXED_WIDTH_DIRECTIVES = {"Y": 4, "m": 2, "d": 2, "H": 2, "M": 2, "S": 2}
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+epoch_naive = datetime.datetime(1970, 1, 1)
+epoch_utc = as_utc(epoch_naive)
@@ -0,0 +1,67 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+
+Measures the cost of appending values to full NumPyDeque and ListDeque instances for different maximum lengths.
+The cost per append should not depend on the maximum length.
+It also measures the cost of slicing a full ListDeque.
+
+Run with: python -m testcases.benchmark.collections_benchmark
+"""
+
+import timeit
+
+from quantworks.utils import collections
+
+
+MAX_LENS = [16, 1024, 65536, 1048576]
+APPENDS = 200000
+SLICE_MAX_LEN = 1024
+SLICES = 100000
+
+
+def time_appends(deque):
+    # Fill it first so every append has to drop the oldest value.
+    for i in range(deque.getMaxLen()):
+        deque.append(i)
+    return timeit.timeit(lambda: deque.append(1), number=APPENDS) / APPENDS
+
+
+def time_slices(deque, key):
+    for i in range(deque.getMaxLen() + 1):
+        deque.append(i)
+    return timeit.timeit(lambda: deque[key], number=SLICES) / SLICES
+
+
+def main():
+    print("%-12s %12s %18s" % ("maxLen", "NumPyDeque", "ListDeque"))
+    for maxLen in MAX_LENS:
+        numpyCost = time_appends(collections.NumPyDeque(maxLen))
+        listCost = time_appends(collections.ListDeque(maxLen))
+        print("%-12d %9.0f ns %15.0f ns" % (maxLen, numpyCost * 1e9, listCost * 1e9))
+
+    print()
+    print("%-12s %12s" % ("slice", "ListDeque"))
+    for name, key in (("[-10:]", slice(-10, None)), ("[100:200]", slice(100, 200)), ("[:]", slice(None))):
+        cost = time_slices(collections.ListDeque(SLICE_MAX_LEN), key)
+        print("%-12s %9.0f ns" % (name, cost * 1e9))
+
+
+if __name__ == "__main__":
+    main()
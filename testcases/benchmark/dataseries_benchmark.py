@@ -0,0 +1,101 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+
+Measures the cost of appending values to full SequenceDataSeries and NumericSequenceDataSeries instances, and the
+memory they use per value.
+NumericSequenceDataSeries is also measured using appendWithTimestamp, which is what BarDataSeries does to convert
+each datetime only once for all the bar fields.
+It also measures the same for BarDataSeries.
+
+Run with: python -m testcases.benchmark.dataseries_benchmark
+"""
+
+import datetime
+import timeit
+import tracemalloc
+
+from quantworks import bar
+from quantworks import dataseries
+from quantworks.dataseries import bards
+
+
+MAX_LEN = 1024
+APPENDS = 100000
+
+
+def build_datetimes(count):
+    begin = datetime.datetime(2000, 1, 1)
+    return [begin + datetime.timedelta(minutes=i) for i in range(count)]
+
+
+def build_bars(dateTimes):
+    return [
+        bar.BasicBar(dateTime, i + 1.5, i + 2.5, i + 0.5, i + 1.5, i * 10.5, i + 1.25, bar.Frequency.MINUTE)
+        for i, dateTime in enumerate(dateTimes)
+    ]
+
+
+def measure(buildDS, appendValue, count):
+    # Returns the memory used per value by a full data series, and the cost per append once it is full.
+    tracemalloc.start()
+    ds = buildDS()
+    for i in range(MAX_LEN):
+        appendValue(ds, i)
+    memory = tracemalloc.get_traced_memory()[0] / float(MAX_LEN)
+    tracemalloc.stop()
+
+    it = iter(range(MAX_LEN, count))
+    cost = timeit.timeit(lambda: appendValue(ds, next(it)), number=count - MAX_LEN) / (count - MAX_LEN)
+    return cost, memory
+
+
+def main():
+    dateTimes = build_datetimes(MAX_LEN + APPENDS)
+    timestamps = [dataseries.get_timestamp(dateTime) for dateTime in dateTimes]
+
+    # A new float every time, just like prices coming from bars.
+    def append_value(ds, i):
+        ds.appendWithDateTime(dateTimes[i], i * 1.5)
+
+    def append_value_with_timestamp(ds, i):
+        ds.appendWithTimestamp(dateTimes[i], timestamps[i], i * 1.5)
+
+    print("%-40s %14s %16s" % ("", "append", "memory"))
+    for name, buildDS, appendValue in (
+        ("SequenceDataSeries", lambda: dataseries.SequenceDataSeries(MAX_LEN), append_value),
+        ("NumericSequenceDataSeries", lambda: dataseries.NumericSequenceDataSeries(MAX_LEN), append_value),
+        (
+            "NumericSequenceDataSeries (timestamps)",
+            lambda: dataseries.NumericSequenceDataSeries(MAX_LEN), append_value_with_timestamp
+        ),
+    ):
+        cost, memory = measure(buildDS, appendValue, MAX_LEN + APPENDS)
+        print("%-40s %11.0f ns %9.1f B/value" % (name, cost * 1e9, memory))
+
+    bars = build_bars(dateTimes)
+    cost, memory = measure(
+        lambda: bards.BarDataSeries(MAX_LEN), lambda ds, i: ds.appendWithDateTime(dateTimes[i], bars[i]), len(bars)
+    )
+    print("%-40s %11.0f ns %11.1f B/bar" % ("BarDataSeries", cost * 1e9, memory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+
+
+Measures the cost of adding a value to a HurstExponent filter and of calculating the hurst exponent for a whole
+series with HurstExponent.batch, for different periods and number of lags.
+The cost per value of the filter should depend on the number of lags but not on the period.
+
+Run with: python -m testcases.benchmark.hurst_benchmark
+"""
+
+import timeit
+
+import numpy as np
+
+from quantworks import dataseries
+from quantworks.technical import hurst
+
+
+CONFIGS = [(100, 20), (500, 20), (500, 50), (2000, 50)]
+VALUES = 10000
+
+
+def build_values():
+    rnd = np.random.RandomState(1)
+    return 1000 + rnd.normal(0, 1, VALUES).cumsum()
+
+
+def time_filter(period, maxLags, values):
+    # Returns the cost per value and the filter.
+    seqDS = dataseries.SequenceDataSeries(maxLen=VALUES)
+    filter_ = hurst.HurstExponent(seqDS, period, maxLags=maxLags, maxLen=VALUES)
+    it = iter(values)
+
+    def add_value():
+        seqDS.append(next(it))
+    return timeit.timeit(add_value, number=VALUES) / VALUES, filter_
+
+
+def main():
+    values = build_values()
+    print("%-8s %-8s %14s %14s %20s" % ("period", "maxLags", "filter", "batch", "max diff vs batch"))
+    for period, maxLags in CONFIGS:
+        filterCost, filter_ = time_filter(period, maxLags, values)
+        batchValues = []
+        batchCost = timeit.timeit(
+            lambda: batchValues.append(hurst.HurstExponent.batch(values, period, maxLags=maxLags)), number=1
+        ) / VALUES
+        diff = np.nanmax(np.abs(np.array(filter_[period - 1:], dtype=float) - batchValues[0][period - 1:]))
+        print("%-8d %-8d %11.1f us %11.1f us %20.2e" % (
+            period, maxLags, filterCost * 1e6, batchCost * 1e6, diff
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+
+
+Measures the cost of adding a value to LeastSquaresRegression and Slope filters for different window sizes, and how
+far the results are from the ones calculated with scipy.stats.linregress over each window.
+The cost per value should not depend on the window size.
+
+Run with: python -m testcases.benchmark.linreg_benchmark
+"""
+
+import datetime
+import timeit
+
+import numpy as np
+
+from quantworks import dataseries
+from quantworks.technical import linreg
+from quantworks.utils import dt
+
+
+WINDOW_SIZES = [10, 100, 1000, 10000]
+VALUES = 20000
+CHECKED_VALUES = 50
+
+
+def build_values():
+    rnd = np.random.RandomState(1)
+    prices = 100 + rnd.normal(0, 1, VALUES).cumsum()
+    dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(minutes=i) for i in range(VALUES)]
+    return dateTimes, prices
+
+
+def time_filter(filterClass, windowSize, dateTimes, prices):
+    # Returns the cost per value and the filter.
+    seqDS = dataseries.SequenceDataSeries(maxLen=VALUES)
+    filter_ = filterClass(seqDS, windowSize, maxLen=VALUES)
+    values = iter(zip(dateTimes, prices))
+
+    def add_value():
+        seqDS.appendWithDateTime(*next(values))
+    return timeit.timeit(add_value, number=VALUES) / VALUES, filter_
+
+
+def max_error(lsReg, slope, windowSize, dateTimes, prices):
+    # Largest difference with scipy over the last CHECKED_VALUES windows.
+    timestamps = np.array([dt.datetime_to_timestamp(dateTime) for dateTime in dateTimes], dtype=float)
+    ret = 0
+    for i in range(VALUES - CHECKED_VALUES, VALUES):
+        x = timestamps[i - windowSize + 1:i + 1]
+        y = prices[i - windowSize + 1:i + 1]
+        a, b = linreg.lsreg(x, y)
+        ret = max(ret, abs(lsReg[i] - (a * x[-1] + b)))
+        ret = max(ret, abs(slope[i] - linreg.lsreg(np.arange(windowSize), y)[0]))
+    return ret
+
+
+def main():
+    dateTimes, prices = build_values()
+    print("%-12s %24s %12s %20s" % ("windowSize", "LeastSquaresRegression", "Slope", "max error vs scipy"))
+    for windowSize in WINDOW_SIZES:
+        lsRegCost, lsReg = time_filter(linreg.LeastSquaresRegression, windowSize, dateTimes, prices)
+        slopeCost, slope = time_filter(linreg.Slope, windowSize, dateTimes, prices)
+        error = max_error(lsReg, slope, windowSize, dateTimes, prices)
+        print("%-12d %21.1f us %9.1f us %20.2e" % (windowSize, lsRegCost * 1e6, slopeCost * 1e6, error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# QuantWorks
+# 
+# Copyright 2019 Tyler M Kontra
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+
+
+Measures order throughput for the backtesting broker, and the memory used by the objects created on every order
+lifecycle (the order, its events and its execution info).
+
+Run with: python -m testcases.benchmark.orders_benchmark
+"""
+
+import datetime
+import time
+import tracemalloc
+
+from quantworks import bar
+from quantworks import barfeed
+from quantworks import broker
+from quantworks.broker import backtesting
+
+
+INSTRUMENT = "orcl"
+BARS = 20000
+ORDERS_PER_BAR = 10
+RETAINED_ORDERS = 100000
+
+
+class BarFeed(barfeed.BaseBarFeed):
+    def __init__(self):
+        super(BarFeed, self).__init__(bar.Frequency.MINUTE)
+        self.__dateTime = datetime.datetime(2000, 1, 1)
+        self.__nextBars = None
+
+    def getCurrentDateTime(self):
+        return self.__dateTime
+
+    def barsHaveAdjClose(self):
+        return False
+
+    def getNextBars(self):
+        return self.__nextBars
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return False
+
+    def peekDateTime(self):
+        return None
+
+    def dispatchBar(self):
+        self.__dateTime += datetime.timedelta(minutes=1)
+        self.__nextBars = bar.Bars({
+            INSTRUMENT: bar.BasicBar(self.__dateTime, 10, 10, 10, 10, 1e9, None, bar.Frequency.MINUTE)
+        })
+        self.dispatch()
+
+
+def time_orders():
+    barFeed = BarFeed()
+    brk = backtesting.Broker(1e12, barFeed)
+    brk.getFillStrategy().setVolumeLimit(None)
+    events = [0]
+
+    def onOrderEvent(broker_, orderEvent):
+        events[0] += 1
+    brk.getOrderUpdatedEvent().subscribe(onOrderEvent)
+
+    begin = time.time()
+    for i in range(BARS):
+        for j in range(ORDERS_PER_BAR):
+            action = broker.Order.Action.BUY if j % 2 else broker.Order.Action.SELL
+            brk.submitOrder(brk.createMarketOrder(action, INSTRUMENT, 1))
+        barFeed.dispatchBar()
+    elapsed = time.time() - begin
+    assert events[0] == BARS * ORDERS_PER_BAR * 3
+    return BARS * ORDERS_PER_BAR / elapsed
+
+
+def measure_memory():
+    # The memory used by orders that went through a whole lifecycle and are kept around, along with their events.
+    dateTime = datetime.datetime(2000, 1, 1)
+    traits = broker.IntegerTraits()
+    tracemalloc.start()
+    retained = []
+    for i in range(RETAINED_ORDERS):
+        order = backtesting.MarketOrder(broker.Order.Action.BUY, INSTRUMENT, 1, False, traits)
+        executionInfo = broker.OrderExecutionInfo(10, 1, 0, dateTime)
+        retained.append((
+            order,
+            executionInfo,
+            broker.OrderEvent(order, broker.OrderEvent.Type.SUBMITTED, None),
+            broker.OrderEvent(order, broker.OrderEvent.Type.ACCEPTED, None),
+            broker.OrderEvent(order, broker.OrderEvent.Type.FILLED, executionInfo),
+        ))
+    ret = tracemalloc.get_traced_memory()[0] / float(RETAINED_ORDERS)
+    tracemalloc.stop()
+    return ret
+
+
+def main():
+    print("%-30s %12.0f" % ("orders/second", time_orders()))
+    print("%-30s %12.0f" % ("bytes per order lifecycle", measure_memory()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import datetime
+import os
+import shutil
+from unittest import mock
+
+from . import common
+
+from quantworks import bar
+from quantworks import marketsession
+from quantworks.barfeed import csvfeed
+
+
+class GenericBarFeed(csvfeed.GenericBarFeed):
+    def __init__(self, *args, **kwargs):
+        super(GenericBarFeed, self).__init__(*args, **kwargs)
+        self.parsedFiles = 0
+
+    def addBarsFromCSV(self, *args, **kwargs):
+        # Files are parsed either into columns or one row at a time.
+        with mock.patch.object(
+            csvfeed.GenericRowParser, "parseColumns", autospec=True, side_effect=csvfeed.GenericRowParser.parseColumns
+        ) as parseColumns, mock.patch.object(
+            csvfeed.BarFeed, "loadBarsFromCSV", autospec=True, side_effect=csvfeed.BarFeed.loadBarsFromCSV
+        ) as loadBarsFromCSV:
+            super(GenericBarFeed, self).addBarsFromCSV(*args, **kwargs)
+        if parseColumns.called or loadBarsFromCSV.called:
+            self.parsedFiles += 1
+
+
+def get_cache_files(cacheDir):
+    if not os.path.exists(cacheDir):
+        return []
+    return os.listdir(cacheDir)
+
+
+def load_bars(feed):
+    ret = []
+    for dateTime, bars in feed:
+        for instrument in bars.getInstruments():
+            ret.append((instrument, bars[instrument]))
+    return ret
+
+
+class BarCacheTestCase(common.TestCase):
+    def assertBarsEqual(self, bars1, bars2):
+        self.assertEqual(len(bars1), len(bars2))
+        for (instrument1, bar1), (instrument2, bar2) in zip(bars1, bars2):
+            self.assertEqual(instrument1, instrument2)
+            self.assertEqual(bar1.getDateTime(), bar2.getDateTime())
+            self.assertEqual(str(bar1.getDateTime()), str(bar2.getDateTime()))
+            self.assertEqual(bar1.getOpen(), bar2.getOpen())
+            self.assertEqual(bar1.getHigh(), bar2.getHigh())
+            self.assertEqual(bar1.getLow(), bar2.getLow())
+            self.assertEqual(bar1.getClose(), bar2.getClose())
+            self.assertEqual(bar1.getVolume(), bar2.getVolume())
+            self.assertEqual(bar1.getAdjClose(), bar2.getAdjClose())
+            self.assertEqual(bar1.getExtraColumns(), bar2.getExtraColumns())
+
+    def __buildFeed(self, cacheDir, timezone=None, columnar=False):
+        ret = GenericBarFeed(bar.Frequency.DAY, timezone=timezone)
+        ret.setUseColumnarStorage(columnar)
+        ret.setColumnName("datetime", "Date")
+        ret.setDateTimeFormat("%Y-%m-%d")
+        ret.setBarCacheDir(cacheDir)
+        return ret
+
+    def __checkCache(self, timezone, columnar):
+        with common.TmpDir() as tmpPath:
+            cacheDir = os.path.join(tmpPath, "cache")
+            csvPath = os.path.join(tmpPath, "orcl.csv")
+            shutil.copy(common.get_data_file_path("orcl-2000-yahoofinance.csv"), csvPath)
+
+            noCacheFeed = self.__buildFeed(None, timezone)
+            noCacheFeed.addBarsFromCSV("orcl", csvPath)
+            noCacheFeed.addBarsFromCSV("spy", common.get_data_file_path("spy-2010-yahoofinance.csv"))
+            expectedBars = load_bars(noCacheFeed)
+
+            feed = self.__buildFeed(cacheDir, timezone, columnar)
+            feed.addBarsFromCSV("orcl", csvPath)
+            feed.addBarsFromCSV("spy", common.get_data_file_path("spy-2010-yahoofinance.csv"))
+            self.assertEqual(feed.parsedFiles, 2)
+            self.assertEqual(len(os.listdir(cacheDir)), 2)
+            self.assertBarsEqual(load_bars(feed), expectedBars)
+
+            # Load from the cache.
+            feed = self.__buildFeed(cacheDir, timezone, columnar)
+            feed.addBarsFromCSV("orcl", csvPath)
+            feed.addBarsFromCSV("spy", common.get_data_file_path("spy-2010-yahoofinance.csv"))
+            self.assertEqual(feed.parsedFiles, 0)
+            self.assertTrue(feed.barsHaveAdjClose())
+            self.assertBarsEqual(load_bars(feed), expectedBars)
+
+            # Different parser settings use a different cache file.
+            feed = self.__buildFeed(cacheDir, marketsession.USEquities.getTimezone(), columnar)
+            feed.setDailyBarTime(datetime.time(16))
+            feed.addBarsFromCSV("orcl", csvPath)
+            self.assertEqual(feed.parsedFiles, 1)
+            self.assertEqual(len(os.listdir(cacheDir)), 3)
+
+            # Modifying the file invalidates the cache.
+            with open(csvPath, "a") as f:
+                f.write("1999-12-31,1,1,1,1,1,1\n")
+            feed = self.__buildFeed(cacheDir, timezone, columnar)
+            feed.addBarsFromCSV("orcl", csvPath)
+            self.assertEqual(feed.parsedFiles, 1)
+            self.assertEqual(len(load_bars(feed)), 253)
+            feed = self.__buildFeed(cacheDir, timezone, columnar)
+            feed.addBarsFromCSV("orcl", csvPath)
+            self.assertEqual(feed.parsedFiles, 0)
+            self.assertEqual(len(load_bars(feed)), 253)
+
+    def testCache(self):
+        self.__checkCache(None, False)
+
+    def testCacheColumnar(self):
+        self.__checkCache(None, True)
+
+    def testCacheWithTimezone(self):
+        self.__checkCache(marketsession.USEquities.getTimezone(), False)
+
+    def testExtraColumns(self):
+        with common.TmpDir() as tmpPath:
+            cacheDir = os.path.join(tmpPath, "cache")
+            csvPath = os.path.join(tmpPath, "bars.csv")
+            with open(csvPath, "w") as f:
+                f.write("Date,Open,High,Low,Close,Volume,Adj Close,Score\n")
+                f.write("2001-01-01,1,2,0.5,1.5,100,,0.25\n")
+                f.write("2001-01-02,2,3,1.5,2.5,200,,-1\n")
+
+            for i in range(2):
+                feed = self.__buildFeed(cacheDir)
+                feed.addBarsFromCSV("orcl", csvPath)
+                self.assertEqual(feed.parsedFiles, 1 - i)
+                self.assertFalse(feed.barsHaveAdjClose())
+                bars = load_bars(feed)
+                self.assertEqual(bars[0][1].getExtraColumns(), {"Score": 0.25})
+                self.assertEqual(bars[1][1].getExtraColumns(), {"Score": -1})
+                self.assertEqual(bars[1][1].getAdjClose(), None)
+
+    def testNotCached(self):
+        with common.TmpDir() as tmpPath:
+            cacheDir = os.path.join(tmpPath, "cache")
+            csvPath = os.path.join(tmpPath, "bars.csv")
+            with open(csvPath, "w") as f:
+                f.write("Date,Open,High,Low,Close,Volume,Adj Close,Name\n")
+                f.write("2001-01-01,1,2,0.5,1.5,100,1,abc\n")
+
+            # Non numeric extra columns.
+            for i in range(2):
+                feed = self.__buildFeed(cacheDir)
+                feed.addBarsFromCSV("orcl", csvPath)
+                self.assertEqual(feed.parsedFiles, 1)
+                self.assertEqual(load_bars(feed)[0][1].getExtraColumns(), {"Name": "abc"})
+            self.assertEqual(get_cache_files(cacheDir), [])
+
+            # Bar filters.
+            feed = self.__buildFeed(cacheDir)
+            feed.setBarFilter(csvfeed.DateRangeFilter(datetime.datetime(2000, 1, 1)))
+            feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            self.assertEqual(get_cache_files(cacheDir), [])
@@ -0,0 +1,200 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import datetime
+
+import numpy as np
+
+from . import common
+
+from quantworks import bar
+from quantworks import marketsession
+from quantworks.barfeed import barstore
+from quantworks.barfeed import yahoofeed
+from quantworks.utils import dt
+
+
+def load_bars(feed):
+    ret = []
+    for dateTime, bars in feed:
+        ret.append((dateTime, [(instrument, bars[instrument]) for instrument in sorted(bars.getInstruments())]))
+    return ret
+
+
+def build_yahoo_feed(columnar, timezone=None):
+    ret = yahoofeed.Feed(timezone=timezone)
+    ret.setUseColumnarStorage(columnar)
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+    ret.addBarsFromCSV("spy", common.get_data_file_path("spy-2010-yahoofinance.csv"))
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2001-yahoofinance.csv"))
+    return ret
+
+
+class ColumnarBarStoreTestCase(common.TestCase):
+    def assertBarsEqual(self, bar1, bar2):
+        self.assertEqual(type(bar1), type(bar2))
+        self.assertEqual(bar1.getDateTime(), bar2.getDateTime())
+        self.assertEqual(str(bar1.getDateTime()), str(bar2.getDateTime()))
+        self.assertEqual(bar1.getOpen(), bar2.getOpen())
+        self.assertEqual(bar1.getHigh(), bar2.getHigh())
+        self.assertEqual(bar1.getLow(), bar2.getLow())
+        self.assertEqual(bar1.getClose(), bar2.getClose())
+        self.assertEqual(bar1.getVolume(), bar2.getVolume())
+        self.assertEqual(bar1.getAdjClose(), bar2.getAdjClose())
+        self.assertEqual(bar1.getFrequency(), bar2.getFrequency())
+        self.assertEqual(bar1.getExtraColumns(), bar2.getExtraColumns())
+
+    def testSortAndMaterialize(self):
+        bars = [
+            bar.BasicBar(datetime.datetime(2001, 1, 3), 1, 2, 0.5, 1.5, 100, None, bar.Frequency.DAY, {"a": 1.0}),
+            bar.BasicBar(datetime.datetime(2001, 1, 1), 2, 3, 1.5, 2.5, 200, None, bar.Frequency.DAY, {"b": "x"}),
+            bar.BasicBar(datetime.datetime(2001, 1, 2), 3, 4, 2.5, 3.5, 300, 3, bar.Frequency.DAY),
+        ]
+        store = barstore.ColumnarBarStore()
+        store.addBars(bars)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.getDateTime(0), datetime.datetime(2001, 1, 1))
+        self.assertBarsEqual(store.getBar(0), bars[1])
+        self.assertBarsEqual(store.getBar(1), bars[2])
+        self.assertBarsEqual(store.getBar(2), bars[0])
+        self.assertEqual(store.getClose().dtype, np.float64)
+        self.assertEqual(store.getDateTimes().dtype, np.int64)
+
+    def testLocalizedDateTimes(self):
+        tz = marketsession.USEquities.timezone
+        bars = [
+            bar.BasicBar(dt.localize(datetime.datetime(2001, 1, 1), tz), 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+            bar.BasicBar(dt.localize(datetime.datetime(2001, 7, 1), tz), 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+        ]
+        store = barstore.ColumnarBarStore()
+        store.addBars(bars)
+        self.assertBarsEqual(store.getBar(0), bars[0])
+        self.assertBarsEqual(store.getBar(1), bars[1])
+
+        with self.assertRaisesRegex(Exception, "Can't mix naive and localized datetimes"):
+            store.addBars([bar.BasicBar(datetime.datetime(2001, 1, 2), 1, 1, 1, 1, 1, None, bar.Frequency.DAY)])
+
+    def testAddColumns(self):
+        store = barstore.ColumnarBarStore()
+        dateTimes = [dt.datetime_to_epoch_ns(datetime.datetime(2001, 1, i)) for i in (2, 1)]
+        store.addColumns(dateTimes, [1, 2], [1, 2], [1, 2], [1, 2], [10, 20], None, bar.Frequency.DAY)
+        self.assertEqual(store.getDateTime(0), datetime.datetime(2001, 1, 1))
+        self.assertEqual(store.getBar(0).getClose(), 2)
+        self.assertEqual(store.getBar(0).getAdjClose(), None)
+        self.assertEqual(store.getBar(1).getVolume(), 10)
+
+        with self.assertRaisesRegex(Exception, "high < low on 2001-01-03 00:00:00"):
+            store.addColumns(
+                [dt.datetime_to_epoch_ns(datetime.datetime(2001, 1, 3))], [1], [1], [2], [1], [1], None, bar.Frequency.DAY
+            )
+
+    def testGetBarAcrossChunks(self):
+        count = barstore.BAR_CHUNK_SIZE * 2 + 10
+        begin = datetime.datetime(2001, 1, 1)
+        store = barstore.ColumnarBarStore()
+        store.addColumns(
+            [dt.datetime_to_epoch_ns(begin + datetime.timedelta(minutes=i)) for i in range(count)],
+            range(count), range(count), range(count), range(count), range(count), None, bar.Frequency.MINUTE
+        )
+        bars = store.getBars()
+        for pos in list(range(count)) + [count - 1, 0, barstore.BAR_CHUNK_SIZE + 5, 3, -1]:
+            self.assertEqual(store.getDateTime(pos), bars[pos].getDateTime())
+            self.assertBarsEqual(store.getBar(pos), bars[pos])
+        with self.assertRaises(IndexError):
+            store.getBar(count)
+
+        # Bars built before adding new ones are not reused.
+        store.addColumns([dt.datetime_to_epoch_ns(begin)], [-1], [-1], [-1], [-1], [1], None, bar.Frequency.MINUTE)
+        self.assertEqual(store.getBar(0).getClose(), 0)
+        self.assertEqual(store.getBar(1).getClose(), -1)
+
+    def testFeedMatchesListStorage(self):
+        for timezone in (None, marketsession.USEquities.timezone):
+            expected = load_bars(build_yahoo_feed(False, timezone))
+            loaded = load_bars(build_yahoo_feed(True, timezone))
+            self.assertEqual(len(loaded), len(expected))
+            for (dateTime1, bars1), (dateTime2, bars2) in zip(loaded, expected):
+                self.assertEqual(dateTime1, dateTime2)
+                self.assertEqual([instrument for instrument, _ in bars1], [instrument for instrument, _ in bars2])
+                for (_, bar1), (_, bar2) in zip(bars1, bars2):
+                    self.assertBarsEqual(bar1, bar2)
+
+    def testMemoryUsage(self):
+        barFeed = build_yahoo_feed(True)
+        store = barFeed.getBarStore("orcl")
+        # 8 bytes per column: datetime, open, high, low, close, volume and adj close.
+        self.assertEqual(store.getNBytes(), len(store) * 8 * 7)
+
+    def testCantChangeStorageAfterAddingBars(self):
+        barFeed = build_yahoo_feed(False)
+        with self.assertRaisesRegex(Exception, "Can't change the storage once bars were added"):
+            barFeed.setUseColumnarStorage(True)
+
+
+class MemoryBarFeedTimelineTestCase(common.TestCase):
+    def __buildFeed(self, columnar):
+        barFeed = yahoofeed.Feed()
+        barFeed.setUseColumnarStorage(columnar)
+        for instrument, days in (("a", (1, 2, 3, 5)), ("b", (2, 4, 5)), ("c", ()), ("d", (6, ))):
+            barFeed.addBarsFromSequence(instrument, [
+                bar.BasicBar(datetime.datetime(2001, 1, day), 1, 1, 1, 1, 1, None, bar.Frequency.DAY) for day in days
+            ])
+        return barFeed
+
+    def testMergedTimeline(self):
+        for columnar in (False, True):
+            barFeed = self.__buildFeed(columnar)
+            barFeed.start()
+            self.assertFalse(barFeed.eof())
+            self.assertEqual(barFeed.peekDateTime(), datetime.datetime(2001, 1, 1))
+
+            loaded = []
+            while not barFeed.eof():
+                dateTime = barFeed.peekDateTime()
+                bars = barFeed.getNextBars()
+                self.assertEqual(bars.getDateTime(), dateTime)
+                loaded.append((dateTime.day, bars.getInstruments()))
+            self.assertEqual(loaded, [
+                (1, ["a"]), (2, ["a", "b"]), (3, ["a"]), (4, ["b"]), (5, ["a", "b"]), (6, ["d"])
+            ])
+            self.assertEqual(barFeed.peekDateTime(), None)
+            self.assertEqual(barFeed.getNextBars(), None)
+
+    def testReset(self):
+        barFeed = self.__buildFeed(False)
+        barFeed.loadAll()
+        self.assertTrue(barFeed.eof())
+        barFeed.reset()
+        self.assertFalse(barFeed.eof())
+        self.assertEqual(barFeed.peekDateTime(), datetime.datetime(2001, 1, 1))
+        barFeed.loadAll()
+        self.assertEqual(len(barFeed["a"]), 4)
+        self.assertEqual(len(barFeed["b"]), 3)
+
+    def testAddBarsBeforeStarting(self):
+        barFeed = self.__buildFeed(False)
+        self.assertEqual(barFeed.getNextBars().getDateTime(), datetime.datetime(2001, 1, 1))
+        barFeed.addBarsFromSequence("c", [
+            bar.BasicBar(datetime.datetime(2001, 1, 7), 1, 1, 1, 1, 1, None, bar.Frequency.DAY)
+        ])
+        days = []
+        while not barFeed.eof():
+            days.append(barFeed.getNextBars().getDateTime().day)
+        self.assertEqual(days, [2, 3, 4, 5, 6, 7])
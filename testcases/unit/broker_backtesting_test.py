@@ -19,11 +19,14 @@
 """
 
 import datetime
+import random
+import weakref
 
 from . import common
 
 from quantworks import broker
 from quantworks.broker import backtesting
+from quantworks.broker import fillstrategy
 from quantworks import bar
 from quantworks import barfeed
 
@@ -122,6 +125,16 @@ class BarFeed(barfeed.BaseBarFeed):
         self.__nextBars = self.__builder.nextBars(openPrice, highPrice, lowPrice, closePrice, volume, sessionClose)
         self.dispatch()
 
+    # barDict maps instruments to (open, high, low, close) tuples.
+    def dispatchBarDict(self, barDict):
+        dateTime = self.__builder.getCurrentDateTime()
+        self.__builder.advance(False)
+        self.__nextBars = bar.Bars(dict(
+            (instrument, bar.BasicBar(dateTime, o, h, l, c, c * 10, c, self.getFrequency()))
+            for instrument, (o, h, l, c) in barDict.items()
+        ))
+        self.dispatch()
+
     def barsHaveAdjClose(self):
         raise True
 
@@ -129,6 +142,11 @@ class BarFeed(barfeed.BaseBarFeed):
         return self.__nextBars
 
 
+class NoTriggerBooksStrategy(fillstrategy.DefaultStrategy):
+    def fillsOnlyTouchedOrders(self):
+        return False
+
+
 class BaseTestCase(common.TestCase):
     TestInstrument = "orcl"
 
@@ -156,6 +174,20 @@ class CommissionTestCase(common.TestCase):
 
 
 class BrokerTestCase(BaseTestCase):
+    def testOrderCustomAttributes(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        orders = [
+            brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 1),
+            brk.createLimitOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 10, 1),
+            brk.createStopOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 10, 1),
+            brk.createStopLimitOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 10, 11, 1),
+        ]
+        for order in orders:
+            order.tag = "entry"
+            self.assertEqual(order.tag, "entry")
+            self.assertTrue(weakref.ref(order)() is order)
+
     def testOneCancelsAnother(self):
         orders = {}
 
@@ -236,6 +268,59 @@ class BrokerTestCase(BaseTestCase):
         self.assertEqual(activeOrders[2], 1)  # Second order gets accepted, one order is active.
         self.assertEqual(activeOrders[3], 0)  # Second order gets filled, zero orders are active.
 
+    def testOrdersProcessedOnlyForInstrumentsWithBars(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(25, barFeed)
+
+        o1 = brk.createMarketOrder(broker.Order.Action.BUY, "ibm", 1)
+        o2 = brk.createMarketOrder(broker.Order.Action.BUY, "orcl", 1)
+        o3 = brk.createMarketOrder(broker.Order.Action.BUY, "ibm", 1)
+        o4 = brk.createLimitOrder(broker.Order.Action.BUY, "aapl", 1, 1)
+        for order in [o1, o2, o3, o4]:
+            brk.submitOrder(order)
+        self.assertEqual(brk.getActiveOrders("ibm"), [o1, o3])
+        self.assertEqual(brk.getActiveOrders("orcl"), [o2])
+        self.assertEqual(brk.getActiveOrders("msft"), [])
+
+        # Orders for instruments without a bar are not touched.
+        barFeed.dispatchBarDict({"ibm": (10, 10, 10, 10), "orcl": (10, 10, 10, 10), "msft": (1, 1, 1, 1)})
+        self.assertTrue(o4.isSubmitted())
+        # Orders are processed in submission order across instruments, so the last one runs out of cash.
+        self.assertTrue(o1.isFilled())
+        self.assertTrue(o2.isFilled())
+        self.assertTrue(o3.isAccepted())
+        self.assertEqual(brk.getCash(), 5)
+        self.assertEqual(brk.getActiveOrders(), [o3, o4])
+        self.assertEqual(brk.getActiveOrders("orcl"), [])
+
+        brk.cancelOrder(o3)
+        self.assertEqual(brk.getActiveOrders("ibm"), [])
+        barFeed.dispatchBarDict({"aapl": (1, 1, 1, 1)})
+        self.assertTrue(o4.isFilled())
+        self.assertEqual(brk.getActiveOrders(), [])
+
+    def testEquityMarkedToMarket(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        brk.setShares("aapl", 2, 50)
+        self.assertEqual(brk.getEquity(), 1100)
+
+        brk.submitOrder(brk.createMarketOrder(broker.Order.Action.BUY, "ibm", 10))
+        brk.submitOrder(brk.createMarketOrder(broker.Order.Action.SELL_SHORT, "orcl", 5))
+        barFeed.dispatchBarDict({"ibm": (10, 12, 9, 11), "orcl": (20, 20, 20, 20)})
+        self.assertEqual(brk.getCash(), 1000 - 10*10 + 5*20)
+        self.assertEqual(brk.getEquity(), 1000 - 10*10 + 5*20 + 10*11 - 5*20 + 2*50)
+
+        # Instruments without a bar keep their last price.
+        barFeed.dispatchBarDict({"orcl": (21, 22, 18, 19), "aapl": (55, 55, 55, 55)})
+        self.assertEqual(brk.getEquity(), 1000 - 10*10 + 5*20 + 10*11 - 5*19 + 2*55)
+
+        # Closing a position removes its value.
+        brk.submitOrder(brk.createMarketOrder(broker.Order.Action.BUY_TO_COVER, "orcl", 5))
+        barFeed.dispatchBarDict({"orcl": (18, 18, 18, 18)})
+        self.assertEqual(brk.getPositions(), {"aapl": 2, "ibm": 10})
+        self.assertEqual(brk.getEquity(), 1000 - 10*10 + 5*20 - 5*18 + 10*11 + 2*55)
+
     def testVolumeLimitMinuteBars(self):
         barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
         brk = self.buildBroker(1000, barFeed)
@@ -2604,3 +2689,122 @@ class StopLimitOrderTestCase(BaseTestCase):
         self.assertTrue(order.getExecutionInfo().getPrice() == 8)
         self.assertEqual(order.getFilled(), 1)
         self.assertEqual(order.getRemaining(), 0)
+
+
+class TriggerBooksTestCase(BaseTestCase):
+    def __runRandomOrders(self, fillStrategy, frequency, seed):
+        rnd = random.Random(seed)
+        instruments = ["ibm", "orcl", "aapl"]
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, frequency)
+        brk = self.buildBroker(5000, barFeed)
+        brk.setFillStrategy(fillStrategy)
+        events = []
+        brk.getOrderUpdatedEvent().subscribe(lambda broker_, orderEvent: events.append((
+            orderEvent.getOrder().getId(), orderEvent.getEventType(), orderEvent.getOrder().getFilled(),
+            orderEvent.getOrder().getAvgFillPrice()
+        )))
+
+        prices = dict((instrument, 100.0) for instrument in instruments)
+        for i in range(300):
+            for j in range(rnd.randint(0, 3)):
+                instrument = rnd.choice(instruments)
+                action = rnd.choice([broker.Order.Action.BUY, broker.Order.Action.SELL])
+                price = round(prices[instrument] + rnd.uniform(-5, 5), 1)
+                quantity = rnd.randint(1, 20)
+                orderType = rnd.randint(0, 3)
+                if orderType == 0:
+                    order = brk.createMarketOrder(action, instrument, quantity)
+                elif orderType == 1:
+                    order = brk.createLimitOrder(action, instrument, price, quantity)
+                elif orderType == 2:
+                    order = brk.createStopOrder(action, instrument, price, quantity)
+                else:
+                    order = brk.createStopLimitOrder(action, instrument, price, round(price + rnd.uniform(-2, 2), 1), quantity)
+                order.setGoodTillCanceled(rnd.random() < 0.8)
+                brk.submitOrder(order)
+            if rnd.random() < 0.05 and len(brk.getActiveOrders()):
+                brk.cancelOrder(rnd.choice(brk.getActiveOrders()))
+
+            barDict = {}
+            for instrument in rnd.sample(instruments, rnd.randint(1, len(instruments))):
+                # Prices gap between bars, so resting orders can get triggered on open.
+                open_ = round(prices[instrument] + rnd.uniform(-4, 4), 1)
+                close = round(open_ + rnd.uniform(-3, 3), 1)
+                barDict[instrument] = (open_, round(max(open_, close) + rnd.uniform(0, 2), 1), round(min(open_, close) - rnd.uniform(0, 2), 1), close)
+                prices[instrument] = close
+            barFeed.dispatchBarDict(barDict)
+            # Equity is updated incrementally.
+            expectedEquity = brk.getCash() + sum(
+                prices[instrument] * shares for instrument, shares in brk.getPositions().items()
+            )
+            self.assertAlmostEqual(brk.getEquity(), expectedEquity, places=6)
+        return events, brk.getCash(), [order.getId() for order in brk.getActiveOrders()]
+
+    def testSameFillsAsProcessingEveryOrder(self):
+        for frequency in [bar.Frequency.MINUTE, bar.Frequency.DAY]:
+            for seed in range(5):
+                expected = self.__runRandomOrders(NoTriggerBooksStrategy(), frequency, seed)
+                self.assertGreater(len(expected[0]), 100)
+                self.assertEqual(self.__runRandomOrders(fillstrategy.DefaultStrategy(), frequency, seed), expected)
+
+    def testUntouchedOrdersAreSkipped(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+        processed = []
+
+        class Strategy(fillstrategy.DefaultStrategy):
+            def fillLimitOrder(self, broker_, order, bar):
+                processed.append(order.getId())
+                return super(Strategy, self).fillLimitOrder(broker_, order, bar)
+
+            # Limit orders are still filled like DefaultStrategy does.
+            def fillsOnlyTouchedOrders(self):
+                return True
+
+        brk.setFillStrategy(Strategy())
+        orders = []
+        for limitPrice in [5, 8, 11, 14]:
+            orders.append(brk.createLimitOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, limitPrice, 1))
+            orders.append(brk.createLimitOrder(broker.Order.Action.SELL, BaseTestCase.TestInstrument, limitPrice + 10, 1))
+        for order in orders:
+            order.setGoodTillCanceled(True)
+            brk.submitOrder(order)
+
+        # Orders are processed on the first bar to get accepted. Buy limits at 11 and 14 get filled.
+        barFeed.dispatchBars(10, 11, 9, 10)
+        self.assertEqual(len(processed), len(orders))
+        self.assertEqual([order.getId() for order in orders if order.isFilled()], [orders[4].getId(), orders[6].getId()])
+        del processed[:]
+
+        # Only the orders within reach get processed.
+        barFeed.dispatchBars(10, 19, 9, 10)
+        self.assertEqual(processed, [orders[1].getId(), orders[3].getId()])
+        self.assertTrue(orders[1].isFilled())
+        self.assertTrue(orders[3].isFilled())
+        del processed[:]
+
+        barFeed.dispatchBars(10, 10, 7.5, 10)
+        self.assertEqual(processed, [orders[2].getId()])
+        self.assertTrue(orders[2].isFilled())
+        self.assertEqual(brk.getActiveOrders(), [orders[0], orders[5], orders[7]])
+
+    def testOverriddenFillMethodsGetEveryOrder(self):
+        barFeed = self.buildBarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE)
+        brk = self.buildBroker(1000, barFeed)
+
+        # Fills limit orders at the close, even if the bar doesn't reach the limit price.
+        class Strategy(fillstrategy.DefaultStrategy):
+            def fillLimitOrder(self, broker_, order, bar):
+                return fillstrategy.FillInfo(bar.getClose(), order.getRemaining())
+
+        strategy = Strategy()
+        self.assertFalse(strategy.fillsOnlyTouchedOrders())
+        brk.setFillStrategy(strategy)
+        order = brk.createLimitOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 5, 1)
+        order.setGoodTillCanceled(True)
+        brk.submitOrder(order)
+        # The order gets accepted on the first bar, and filled on the second one even though it doesn't reach 5.
+        barFeed.dispatchBars(10, 11, 9, 10)
+        barFeed.dispatchBars(10, 11, 9, 10)
+        self.assertTrue(order.isFilled())
+        self.assertEqual(order.getAvgFillPrice(), 10)
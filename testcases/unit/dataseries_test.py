@@ -20,6 +20,7 @@
 
 import datetime
 
+import numpy as np
 from six.moves import xrange
 
 from . import common
@@ -28,6 +29,8 @@ from quantworks import dataseries
 from quantworks.dataseries import bards
 from quantworks.dataseries import aligned
 from quantworks import bar
+from quantworks import marketsession
+from quantworks.utils import dt
 
 
 class TestSequenceDataSeries(common.TestCase):
@@ -143,6 +146,121 @@ class TestSequenceDataSeries(common.TestCase):
         self.assertEqual(ds[-1], 99)
 
 
+class TestNumericSequenceDataSeries(common.TestCase):
+    def testEmpty(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        self.assertEqual(len(ds), 0)
+        with self.assertRaises(IndexError):
+            ds[-1]
+        with self.assertRaises(IndexError):
+            ds[0]
+        self.assertEqual(len(ds.asarray()), 0)
+
+    def testSeqLikeOps(self):
+        seq = [float(i) for i in xrange(10)]
+        ds = dataseries.NumericSequenceDataSeries()
+        for value in seq:
+            ds.append(value)
+
+        self.assertEqual(len(ds), len(seq))
+        for i in xrange(-len(seq), len(seq)):
+            self.assertEqual(ds[i], seq[i])
+            self.assertEqual(type(ds[i]), float)
+        for step in xrange(1, 5):
+            for i in xrange(-20, 20):
+                self.assertEqual(ds[i::step], seq[i::step])
+
+    def testNoneValues(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        values = []
+        ds.getNewValueEvent().subscribe(lambda ds_, dateTime, value: values.append(value))
+        ds.append(None)
+        ds.append(1)
+        ds.append(np.nan)
+        self.assertTrue(np.isnan(ds[0]))
+        self.assertTrue(np.isnan(ds.getValueAbsolute(2)))
+        self.assertEqual(ds[1:2], [1])
+        self.assertTrue(np.isnan(ds[-1:][0]))
+        self.assertEqual(values[:2], [None, 1])
+        self.assertTrue(np.isnan(ds.asarray()[0]))
+
+        ds = dataseries.NumericSequenceDataSeries(nanAsNone=True)
+        ds.append(None)
+        ds.append(1)
+        ds.append(np.nan)
+        self.assertEqual(ds[0], None)
+        self.assertEqual(ds.getValueAbsolute(2), None)
+        self.assertEqual(ds[:], [None, 1, None])
+
+        ds = dataseries.NumericSequenceDataSeries(dtype=np.int64)
+        ds.append(1)
+        self.assertEqual(type(ds[0]), int)
+        with self.assertRaisesRegex(Exception, "None values are only supported with a float dtype"):
+            ds.append(None)
+
+    def testBoundedAndResize(self):
+        ds = dataseries.NumericSequenceDataSeries(maxLen=3)
+        now = datetime.datetime(2000, 1, 1)
+        for i in xrange(10):
+            ds.appendWithDateTime(now + datetime.timedelta(seconds=i), i)
+        self.assertEqual(ds[:], [7, 8, 9])
+        self.assertEqual(list(ds.asarray()), [7, 8, 9])
+        self.assertEqual(ds.getDateTimes(), [now + datetime.timedelta(seconds=i) for i in (7, 8, 9)])
+
+        ds.setMaxLen(2)
+        self.assertEqual(ds[:], [8, 9])
+        self.assertEqual(len(ds.getDateTimes()), 2)
+        self.assertEqual(ds.getMaxLen(), 2)
+
+    def testDateTimes(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        tz = marketsession.USEquities.getTimezone()
+        dateTimes = [dt.localize(datetime.datetime(2000, month, 1), tz) for month in (1, 7)]
+        for dateTime in dateTimes:
+            ds.appendWithDateTime(dateTime, 1)
+        self.assertEqual(ds.getDateTimes(), dateTimes)
+        self.assertEqual([str(dateTime) for dateTime in ds.getDateTimes()], [str(dateTime) for dateTime in dateTimes])
+        self.assertEqual(ds.getTimestamps().dtype, np.int64)
+        self.assertEqual(list(ds.getTimestamps()), [dt.datetime_to_epoch_ns(dateTime) for dateTime in dateTimes])
+
+        with self.assertRaisesRegex(Exception, "Invalid datetime. It must be bigger than that last one"):
+            ds.appendWithDateTime(dateTimes[0], 1)
+        with self.assertRaisesRegex(Exception, "Invalid datetime. It must be bigger than that last one"):
+            ds.appendWithTimestamp(dateTimes[0], dataseries.get_timestamp(dateTimes[0]), 1)
+
+    def testNoneDateTimes(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        ds.append(1)
+        ds.append(2)
+        self.assertEqual(ds.getDateTimes(), [None, None])
+        self.assertEqual(list(ds.getTimestamps()), [dataseries.NO_DATETIME] * 2)
+
+        dateTime = datetime.datetime(2000, 1, 1)
+        ds.appendWithDateTime(dateTime, 3)
+        ds.append(4)
+        self.assertEqual(ds.getDateTimes(), [None, None, dateTime, None])
+
+    def testZeroCopyView(self):
+        ds = dataseries.NumericSequenceDataSeries(maxLen=5)
+        for i in xrange(20):
+            ds.append(i)
+            self.assertEqual(list(ds.asarray()), list(range(max(0, i - 4), i + 1)))
+            self.assertEqual(ds[:], list(range(max(0, i - 4), i + 1)))
+            self.assertEqual(ds[0], max(0, i - 4))
+            self.assertEqual(len(ds.getTimestamps()), len(ds))
+        self.assertFalse(ds.asarray().flags.owndata)
+
+    def testSingleValue(self):
+        ds = dataseries.NumericSequenceDataSeries(maxLen=1)
+        for i in xrange(5):
+            ds.append(i)
+            self.assertEqual(ds[:], [i])
+        ds.setMaxLen(3)
+        for i in xrange(5, 8):
+            ds.append(i)
+        self.assertEqual(ds[:], [5, 6, 7])
+
+
 class TestBarDataSeries(common.TestCase):
     def testEmpty(self):
         ds = bards.BarDataSeries()
@@ -173,6 +291,21 @@ class TestBarDataSeries(common.TestCase):
         for i in xrange(0, 10):
             self.assertTrue(ds[i].getOpen() == 0)
 
+    def testNumericSubSeries(self):
+        ds = bards.BarDataSeries()
+        for i in xrange(10):
+            dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(seconds=i)
+            ds.append(bar.BasicBar(dateTime, i, i, i, i, i * 10, None, bar.Frequency.SECOND))
+
+        self.assertEqual(list(ds.getCloseDataSeries().asarray()), list(range(10)))
+        self.assertEqual(list(ds.getVolumeDataSeries().asarray()), [i * 10 for i in xrange(10)])
+        self.assertEqual(ds.getAdjCloseDataSeries()[-1], None)
+        self.assertEqual(ds.getCloseDataSeries().getDateTimes(), ds.getDateTimes())
+        self.assertEqual(
+            list(ds.getOpenDataSeries().getTimestamps()),
+            [dataseries.get_timestamp(dateTime) for dateTime in ds.getDateTimes()]
+        )
+
     def __testGetValue(self, ds, itemCount, value):
         for i in xrange(0, itemCount):
             self.assertTrue(ds[i] == value)
@@ -117,6 +117,24 @@ class DefaultStrategyTestCase(BaseTestCase):
         order.addExecutionInfo(broker.OrderExecutionInfo(price, quantity, 0, datetime.datetime.now()))
         return order
 
+    def testFillsOnlyTouchedOrders(self):
+        class MarketStrategy(fillstrategy.DefaultStrategy):
+            def fillMarketOrder(self, broker_, order, bar):
+                return super(MarketStrategy, self).fillMarketOrder(broker_, order, bar)
+
+        class StopStrategy(fillstrategy.DefaultStrategy):
+            def fillStopOrder(self, broker_, order, bar):
+                return super(StopStrategy, self).fillStopOrder(broker_, order, bar)
+
+        class StopLimitStrategy(fillstrategy.DefaultStrategy):
+            def fillStopLimitOrder(self, broker_, order, bar):
+                return super(StopLimitStrategy, self).fillStopLimitOrder(broker_, order, bar)
+
+        self.assertTrue(self.strategy.fillsOnlyTouchedOrders())
+        self.assertTrue(MarketStrategy().fillsOnlyTouchedOrders())
+        self.assertFalse(StopStrategy().fillsOnlyTouchedOrders())
+        self.assertFalse(StopLimitStrategy().fillsOnlyTouchedOrders())
+
     def testVolumeLimitPerBar(self):
         volume = 100
         self.strategy.onBars(None, self.barsBuilder.nextBars(11, 12, 4, 9, volume))
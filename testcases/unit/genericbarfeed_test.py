@@ -0,0 +1,170 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import datetime
+import os
+
+from . import common
+
+from quantworks import bar
+from quantworks import marketsession
+from quantworks.barfeed import csvfeed
+from quantworks.utils import dt
+
+
+class IncludeAll(csvfeed.BarFilter):
+    def includeBar(self, bar_):
+        return True
+
+
+def load_bars(feed):
+    ret = []
+    for dateTime, bars in feed:
+        for instrument in bars.getInstruments():
+            bar_ = bars[instrument]
+            ret.append((
+                instrument, bar_.getDateTime(), str(bar_.getDateTime()), bar_.getOpen(), bar_.getHigh(), bar_.getLow(),
+                bar_.getClose(), bar_.getVolume(), bar_.getAdjClose(), bar_.getExtraColumns()
+            ))
+    return ret
+
+
+class GenericBarFeedTestCase(common.TestCase):
+    def __buildFeed(self, frequency, dateTimeFormat, timezone, dailyBarTime, columnar, rowByRow):
+        ret = csvfeed.GenericBarFeed(frequency, timezone=timezone)
+        ret.setUseColumnarStorage(columnar)
+        if dateTimeFormat is not None:
+            ret.setColumnName("datetime", "Date")
+            ret.setDateTimeFormat(dateTimeFormat)
+            ret.setDailyBarTime(dailyBarTime)
+        if rowByRow:
+            # Bar filters need the bars, so files are parsed one row at a time.
+            ret.setBarFilter(IncludeAll())
+        return ret
+
+    def __checkSameBars(self, files, frequency, dateTimeFormat=None, timezone=None, dailyBarTime=None):
+        for columnar in [False, True]:
+            feed = self.__buildFeed(frequency, dateTimeFormat, timezone, dailyBarTime, columnar, False)
+            rowByRowFeed = self.__buildFeed(frequency, dateTimeFormat, timezone, dailyBarTime, columnar, True)
+            for instrument, path in files:
+                feed.addBarsFromCSV(instrument, path)
+                rowByRowFeed.addBarsFromCSV(instrument, path)
+            self.assertEqual(feed.barsHaveAdjClose(), rowByRowFeed.barsHaveAdjClose())
+            bars = load_bars(feed)
+            self.assertTrue(len(bars) > 0)
+            self.assertEqual(bars, load_bars(rowByRowFeed))
+
+    def __buildParser(self, dateTimeFormat="%Y-%m-%d", timezone=None):
+        columnNames = {
+            "datetime": "Date",
+            "open": "Open",
+            "high": "High",
+            "low": "Low",
+            "close": "Close",
+            "volume": "Volume",
+            "adj_close": "Adj Close",
+        }
+        return csvfeed.GenericRowParser(columnNames, dateTimeFormat, None, bar.Frequency.DAY, timezone)
+
+    def testParseColumns(self):
+        parser = self.__buildParser()
+        dateTimes, columns, extra = parser.parseColumns(common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        self.assertEqual(len(dateTimes), 252)
+        self.assertEqual(dateTimes[0], dt.datetime_to_epoch_ns(datetime.datetime(2000, 12, 29)))
+        self.assertEqual(columns["close"][0], 29.06)
+        self.assertEqual(columns["adj_close"][0], 28.41)
+        self.assertEqual(columns["volume"][0], 31655500)
+        self.assertEqual(extra, {})
+        self.assertTrue(parser.barsHaveAdjClose())
+
+    def testDailyBars(self):
+        files = [
+            ("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv")),
+            ("spy", common.get_data_file_path("spy-2010-yahoofinance.csv")),
+        ]
+        self.__checkSameBars(files, bar.Frequency.DAY, "%Y-%m-%d")
+        self.__checkSameBars(files, bar.Frequency.DAY, "%Y-%m-%d", dailyBarTime=datetime.time(23, 59))
+        self.__checkSameBars(
+            files, bar.Frequency.DAY, "%Y-%m-%d", timezone=marketsession.USEquities.getTimezone(),
+            dailyBarTime=datetime.time(16)
+        )
+
+    def testIntradayBars(self):
+        files = [("BTC", common.get_data_file_path("30min-bitstampUSD-2.csv"))]
+        self.__checkSameBars(files, bar.Frequency.MINUTE * 30)
+        self.__checkSameBars(files, bar.Frequency.MINUTE * 30, timezone=marketsession.USEquities.getTimezone())
+
+    def testExtraColumns(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date,Open,High,Low,Close,Volume,Adj Close,Score,Name\n")
+                f.write("2001-01-02,2,3,1.5,2.5,200,,-1,def\n")
+                f.write("2001-01-01,1,2,0.5,1.5,100,,0.25,1.5\n")
+
+            self.assertIsNotNone(self.__buildParser().parseColumns(path))
+            self.__checkSameBars([("orcl", path)], bar.Frequency.DAY, "%Y-%m-%d")
+
+    def testRowByRowFallback(self):
+        with common.TmpDir() as tmpPath:
+            for i, rows in enumerate([
+                # Quoted values.
+                ["2001-01-01,\"1\",2,0.5,1.5,100,1"],
+                # Empty rows.
+                ["2001-01-01,1,2,0.5,1.5,100,1", "", "2001-01-02,1,2,0.5,1.5,100,1"],
+                # Datetimes that are not zero padded.
+                ["2001-01-1,1,2,0.5,1.5,100,1", "2001-01-02,1,2,0.5,1.5,100,1"],
+            ]):
+                path = os.path.join(tmpPath, "bars-%d.csv" % i)
+                with open(path, "w") as f:
+                    f.write("Date,Open,High,Low,Close,Volume,Adj Close\n")
+                    f.write("\n".join(rows))
+
+                self.assertIsNone(self.__buildParser().parseColumns(path))
+                self.__checkSameBars([("orcl", path)], bar.Frequency.DAY, "%Y-%m-%d")
+
+            # Unsupported datetime formats.
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date,Open,High,Low,Close,Volume,Adj Close\n")
+                f.write("Jan 1 2001,1,2,0.5,1.5,100,1\n")
+            self.assertIsNone(self.__buildParser("%b %d %Y").parseColumns(path))
+            self.__checkSameBars([("orcl", path)], bar.Frequency.DAY, "%b %d %Y")
+
+    def testMalformedBars(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date,Open,High,Low,Close,Volume,Adj Close\n")
+                f.write("2001-01-01,1,2,0.5,1.5,100,1\n")
+                f.write("2001-01-02,1,0.5,2,1.5,100,1\n")
+                f.write("2001-01-03,1,2,0.5,abc,100,1\n")
+                f.write("2001-01-04,1,2,0.5,1.5,100,1\n")
+            self.assertIsNone(self.__buildParser().parseColumns(path))
+
+            feed = self.__buildFeed(bar.Frequency.DAY, "%Y-%m-%d", None, None, False, False)
+            with self.assertRaises(Exception):
+                feed.addBarsFromCSV("orcl", path)
+
+            feed = self.__buildFeed(bar.Frequency.DAY, "%Y-%m-%d", None, None, False, False)
+            feed.addBarsFromCSV("orcl", path, skipMalformedBars=True)
+            self.assertEqual(
+                [bar_[1] for bar_ in load_bars(feed)], [datetime.datetime(2001, 1, 1), datetime.datetime(2001, 1, 4)]
+            )
@@ -0,0 +1,137 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import datetime
+
+import numpy as np
+
+from . import common
+
+from quantworks import bar
+from quantworks import barfeed
+from quantworks.barfeed import yahoofeed
+from quantworks.optimizer import indicatorcache
+from quantworks.technical import atr
+from quantworks.technical import ma
+from quantworks.technical import stoch
+
+
+def load_bars():
+    feed = yahoofeed.Feed()
+    feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+    return [bars for dateTime, bars in feed]
+
+
+class IndicatorCacheTestCase(common.TestCase):
+    def testLRU(self):
+        cache = indicatorcache.IndicatorCache(2)
+        self.assertEqual(cache.get("a", lambda: 1), 1)
+        self.assertEqual(cache.get("b", lambda: 2), 2)
+        self.assertEqual(cache.get("a", lambda: 10), 1)
+        # b is the least recently used.
+        self.assertEqual(cache.get("c", lambda: 3), 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("b", lambda: 20), 20)
+        self.assertEqual(cache.get("a", lambda: 100), 100)
+        self.assertEqual(cache.getHits(), 1)
+        self.assertEqual(cache.getMisses(), 5)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.getHits(), 0)
+        self.assertEqual(cache.getMisses(), 0)
+
+    def testIndicatorValues(self):
+        bars = load_bars()
+        barColumns = indicatorcache.BarColumns(["orcl"], bars)
+        cache = indicatorcache.IndicatorCache()
+        sma = cache.getIndicatorValues(barColumns, "orcl", "close", ma.SMA, 10)
+        self.assertEqual(cache.getMisses(), 1)
+        self.assertTrue(cache.getIndicatorValues(barColumns, "orcl", "close", ma.SMA, 10) is sma)
+        self.assertEqual(cache.getHits(), 1)
+
+        # Different parameters, columns or data.
+        cache.getIndicatorValues(barColumns, "orcl", "close", ma.SMA, 11)
+        cache.getIndicatorValues(barColumns, "orcl", "open", ma.SMA, 10)
+        cache.getIndicatorValues(indicatorcache.BarColumns(["orcl"], bars[1:]), "orcl", "close", ma.SMA, 10)
+        self.assertEqual(cache.getMisses(), 4)
+
+        # Same data with a different BarColumns instance.
+        cache.getIndicatorValues(indicatorcache.BarColumns(["orcl"], bars), "orcl", "close", ma.SMA, 10)
+        self.assertEqual(cache.getHits(), 2)
+
+        # Multiple columns and parameters that are not hashable.
+        cache.getIndicatorValues(barColumns, "orcl", ("high", "low", "close"), atr.ATR, 14)
+        cache.getIndicatorValues(barColumns, "orcl", "close", ma.WMA, [1, 2, 3])
+        cache.getIndicatorValues(barColumns, "orcl", "close", ma.WMA, [1, 2, 3])
+        self.assertEqual(cache.getHits(), 3)
+
+    def testBarColumnsWithMissingBars(self):
+        bars = [
+            bar.Bars({
+                "orcl": bar.BasicBar(datetime.datetime(2001, 1, 1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+            }),
+            bar.Bars({
+                "orcl": bar.BasicBar(datetime.datetime(2001, 1, 2), 2, 2, 2, 2, 2, None, bar.Frequency.DAY),
+                "spy": bar.BasicBar(datetime.datetime(2001, 1, 2), 3, 3, 3, 3, 3, 3, bar.Frequency.DAY),
+            }),
+        ]
+        barColumns = indicatorcache.BarColumns(["orcl", "spy"], bars)
+        self.assertEqual(barColumns.getValues("orcl", "close").tolist(), [1, 2])
+        self.assertTrue(np.isnan(barColumns.getValues("orcl", "adj_close")).all())
+        self.assertEqual(barColumns.getValues("spy", "volume").tolist(), [3])
+        with self.assertRaisesRegex(Exception, "Invalid column.*"):
+            barColumns.getValues("spy", "price")
+
+    def testOptimizerBarFeed(self):
+        bars = load_bars()
+        barColumns = indicatorcache.BarColumns(["orcl"], bars)
+        cache = indicatorcache.IndicatorCache()
+
+        for i in range(2):
+            feed = barfeed.OptimizerBarFeed(
+                bar.Frequency.DAY, ["orcl"], bars, barColumns=barColumns, indicatorCache=cache
+            )
+            precomputed = feed.getIndicator("orcl", "close", ma.SMA, 15)
+            k, d = feed.getIndicator("orcl", ("high", "low", "close"), stoch.StochasticOscillator, 14)
+            sma = ma.SMA(feed["orcl"].getCloseDataSeries(), 15)
+            so = stoch.StochasticOscillator(feed["orcl"], 14)
+            for dateTime, currentBars in feed:
+                self.assertEqual(precomputed.getDateTimes()[-1], dateTime)
+                if sma[-1] is None:
+                    self.assertEqual(precomputed[-1], None)
+                else:
+                    self.assertAlmostEqual(precomputed[-1], sma[-1], places=9)
+                if so[-1] is not None:
+                    self.assertAlmostEqual(k[-1], so[-1], places=9)
+                if so.getD()[-1] is not None:
+                    self.assertAlmostEqual(d[-1], so.getD()[-1], places=9)
+            self.assertEqual(len(precomputed), len(bars))
+
+        self.assertEqual(cache.getMisses(), 2)
+        self.assertEqual(cache.getHits(), 2)
+
+    def testOptimizerBarFeedWithoutCache(self):
+        feed = barfeed.OptimizerBarFeed(bar.Frequency.DAY, ["orcl"], load_bars())
+        precomputed = feed.getIndicator("orcl", "close", ma.EMA, 10)
+        for dateTime, currentBars in feed:
+            pass
+        self.assertEqual(len(precomputed), len(feed["orcl"]))
+        self.assertEqual(feed.getIndicatorCache().getMisses(), 1)
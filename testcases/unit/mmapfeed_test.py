@@ -0,0 +1,195 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import datetime
+import os
+
+import pytz
+
+from . import common
+from . import barfeed_test
+from . import feed_test
+
+from quantworks import bar
+from quantworks import marketsession
+from quantworks.barfeed import mmapfeed
+from quantworks.barfeed import yahoofeed
+
+
+def load_bars(feed):
+    ret = []
+    for dateTime, bars in feed:
+        for instrument in bars.getInstruments():
+            bar_ = bars[instrument]
+            ret.append((
+                instrument, bar_.getDateTime(), bar_.getOpen(), bar_.getHigh(), bar_.getLow(), bar_.getClose(),
+                bar_.getVolume(), bar_.getAdjClose(), bar_.getFrequency()
+            ))
+    return ret
+
+
+def build_yahoo_feed(files, timezone=None):
+    ret = yahoofeed.Feed(timezone=timezone)
+    for instrument, fileName in files:
+        ret.addBarsFromCSV(instrument, common.get_data_file_path(fileName))
+    return ret
+
+
+class MMapFeedTestCase(common.TestCase):
+    def setUp(self):
+        super(MMapFeedTestCase, self).setUp()
+        self.__tmpDir = common.TmpDir()
+        self.__dirPath = os.path.join(self.__tmpDir.__enter__(), "bars")
+
+    def tearDown(self):
+        self.__tmpDir.__exit__(None, None, None)
+        super(MMapFeedTestCase, self).tearDown()
+
+    def __writeBars(self, files, timezone=None):
+        db = mmapfeed.Database(self.__dirPath)
+        db.addBarsFromFeed(build_yahoo_feed(files, timezone))
+        return db
+
+    def testSameBars(self):
+        files = [("orcl", "orcl-2000-yahoofinance.csv"), ("spy", "spy-2011-yahoofinance.csv")]
+        self.__writeBars(files)
+
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl")
+        feed.loadBars("spy")
+        self.assertTrue(feed.barsHaveAdjClose())
+        self.assertEqual(load_bars(feed), load_bars(build_yahoo_feed(files)))
+        self.assertEqual(feed.getCurrentDateTime(), datetime.datetime(2011, 12, 30))
+
+        # Reset and dispatch again.
+        feed.reset()
+        self.assertEqual(len(load_bars(feed)), 252 * 2)
+
+    def testTimezone(self):
+        files = [("orcl", "orcl-2000-yahoofinance.csv")]
+        timezone = marketsession.USEquities.getTimezone()
+        self.__writeBars(files, timezone)
+
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl", timezone)
+        self.assertEqual(load_bars(feed), load_bars(build_yahoo_feed(files, timezone)))
+
+        # Bars written with localized datetimes are in UTC if no timezone is given.
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl")
+        bars = load_bars(feed)
+        self.assertEqual(bars[0][1], datetime.datetime(2000, 1, 3, 5, tzinfo=pytz.utc))
+
+    def testDateRange(self):
+        db = self.__writeBars([("orcl", "orcl-2000-yahoofinance.csv")])
+
+        table = db.getTable("orcl", bar.Frequency.DAY)
+        self.assertEqual(len(table), 252)
+        self.assertEqual(table.getRange(), (0, 252))
+        self.assertEqual(table.getRange(datetime.datetime(2000, 1, 4), datetime.datetime(2000, 1, 6)), (1, 4))
+        self.assertEqual(table.getRange(datetime.datetime(2000, 1, 8), datetime.datetime(2000, 1, 9)), (5, 5))
+        self.assertEqual(table.getRange(datetime.datetime(2001, 1, 1)), (252, 252))
+        self.assertEqual(table.getRange(toDateTime=datetime.datetime(1999, 1, 1)), (0, 0))
+        self.assertEqual(table.getColumn("close")[1], 107.69)
+        with self.assertRaisesRegex(Exception, "Invalid column.*"):
+            table.getColumn("foo")
+
+        bars = db.getBars("orcl", bar.Frequency.DAY, fromDateTime=datetime.datetime(2000, 12, 1))
+        self.assertEqual(len(bars), 20)
+        self.assertEqual(bars[0].getDateTime(), datetime.datetime(2000, 12, 1))
+        self.assertEqual(bars[-1].getDateTime(), datetime.datetime(2000, 12, 29))
+        self.assertEqual(db.getBars("orcl", bar.Frequency.MINUTE), [])
+        self.assertEqual(db.getBars("ibm", bar.Frequency.DAY), [])
+
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl", fromDateTime=datetime.datetime(2000, 1, 4), toDateTime=datetime.datetime(2000, 1, 6))
+        self.assertEqual(
+            [values[1] for values in load_bars(feed)],
+            [datetime.datetime(2000, 1, 4), datetime.datetime(2000, 1, 5), datetime.datetime(2000, 1, 6)]
+        )
+
+    def testAppend(self):
+        db = mmapfeed.Database(self.__dirPath, flushSize=100)
+        barFeed = build_yahoo_feed([("orcl", "orcl-2000-yahoofinance.csv")])
+        bars = [bars["orcl"] for dateTime, bars in barFeed]
+        for bar_ in bars[:150]:
+            db.addBar("orcl", bar_, bar.Frequency.DAY)
+        # Only the first 100 were flushed.
+        self.assertEqual(len(db.getTable("orcl", bar.Frequency.DAY)), 100)
+
+        # Simulate a write that was interrupted before the metadata got updated.
+        with open(os.path.join(mmapfeed.get_table_path(self.__dirPath, "orcl", bar.Frequency.DAY), "close.bin"), "ab") as f:
+            f.write(b"\0" * 16)
+
+        for bar_ in bars[150:]:
+            db.addBar("orcl", bar_, bar.Frequency.DAY)
+        db.flush()
+        self.assertEqual(len(db.getTable("orcl", bar.Frequency.DAY)), 252)
+
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl")
+        self.assertEqual(load_bars(feed), load_bars(build_yahoo_feed([("orcl", "orcl-2000-yahoofinance.csv")])))
+
+        # Bars must be added in order.
+        db = mmapfeed.Database(self.__dirPath)
+        db.addBar("orcl", bars[-1], bar.Frequency.DAY)
+        with self.assertRaisesRegex(Exception, "Bars for orcl must be added in ascending datetime order"):
+            db.flush()
+
+    def testMixNaiveAndLocalized(self):
+        self.__writeBars([("orcl", "orcl-2000-yahoofinance.csv")])
+        db = mmapfeed.Database(self.__dirPath)
+        db.addBar("orcl", bar.BasicBar(
+            datetime.datetime(2001, 1, 2, tzinfo=pytz.utc), 1, 1, 1, 1, 1, None, bar.Frequency.DAY
+        ), bar.Frequency.DAY)
+        with self.assertRaisesRegex(Exception, "Can't mix naive and localized datetimes"):
+            db.flush()
+
+    def testNoAdjClose(self):
+        db = mmapfeed.Database(self.__dirPath)
+        for day in range(1, 3):
+            db.addBar("orcl", bar.BasicBar(
+                datetime.datetime(2001, 1, day), 1, 1, 1, 1, 1, None, bar.Frequency.DAY
+            ), bar.Frequency.DAY)
+        db.flush()
+
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl")
+        barfeed_test.check_base_barfeed(self, feed, False)
+
+    def testBaseBarFeed(self):
+        self.__writeBars([("orcl", "orcl-2000-yahoofinance.csv")])
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl")
+        barfeed_test.check_base_barfeed(self, feed, True)
+
+    def testBaseFeedInterface(self):
+        self.__writeBars([("orcl", "orcl-2000-yahoofinance.csv")])
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl")
+        feed_test.tstBaseFeedInterface(self, feed)
+
+    def testDuplicateBars(self):
+        self.__writeBars([("orcl", "orcl-2000-yahoofinance.csv")])
+        feed = mmapfeed.Feed(self.__dirPath, bar.Frequency.DAY)
+        feed.loadBars("orcl")
+        feed.loadBars("orcl")
+        with self.assertRaisesRegex(Exception, "Duplicate bars found for.*"):
+            load_bars(feed)
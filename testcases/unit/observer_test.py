@@ -225,6 +225,72 @@ class DispatcherTestCase(common.TestCase):
         self.assertTrue(values[0] < values[1])
 
 
+class HeapSchedulingDispatcherTestCase(common.TestCase):
+    def __runFeeds(self, feeds, useHeapScheduling):
+        values = []
+        disp = dispatcher.Dispatcher(useHeapScheduling=useHeapScheduling)
+        for i, feed in enumerate(feeds):
+            feed.getEvent().subscribe(lambda x, i=i: values.append((i, x)))
+            disp.addSubject(feed)
+        disp.run()
+        return values
+
+    def __buildFeeds(self):
+        now = datetime.datetime(2000, 1, 1)
+        ret = []
+        for i in xrange(20):
+            # Overlapping datetimes with different strides.
+            datetimes = [now + datetime.timedelta(seconds=j*(i % 4 + 1)) for j in xrange(10)]
+            ret.append(NonRealtimeFeed(datetimes))
+        ret.append(RealtimeFeed([now + datetime.timedelta(seconds=j) for j in xrange(15)]))
+        return ret
+
+    def testSameOrderAsScan(self):
+        expected = self.__runFeeds(self.__buildFeeds(), False)
+        values = self.__runFeeds(self.__buildFeeds(), True)
+        self.assertEqual(len(values), 20 * 10 + 15)
+        self.assertEqual(values, expected)
+
+    def test2Combined(self):
+        now = datetime.datetime.now()
+        datetimes1 = [now + datetime.timedelta(seconds=i) for i in xrange(10)]
+        datetimes2 = [now + datetime.timedelta(seconds=i+len(datetimes1)) for i in xrange(10)]
+        values = self.__runFeeds([RealtimeFeed(copy.copy(datetimes1)), NonRealtimeFeed(copy.copy(datetimes2))], True)
+
+        self.assertEqual(len(values), len(datetimes1) + len(datetimes2))
+        for i in xrange(len(datetimes1)):
+            self.assertEqual(values[i*2], (0, datetimes1[i]))
+            self.assertEqual(values[i*2+1], (1, datetimes2[i]))
+
+    def testFeedGetsEventsAfterEof(self):
+        now = datetime.datetime(2000, 1, 1)
+        for useHeapScheduling in [False, True]:
+            datetimes1 = [now]
+            datetimes2 = [now + datetime.timedelta(seconds=i) for i in xrange(1, 4)]
+            feed1 = NonRealtimeFeed(datetimes1)
+            feed2 = NonRealtimeFeed(datetimes2)
+            # feed1 hits eof after the first event and gets a new one while feed2 is dispatched.
+            feed2.getEvent().subscribe(
+                lambda x: datetimes1.append(x + datetime.timedelta(seconds=0.5)) if len(datetimes2) == 1 else None
+            )
+            values = self.__runFeeds([feed1, feed2], useHeapScheduling)
+            self.assertEqual(values, [
+                (0, now),
+                (1, now + datetime.timedelta(seconds=1)),
+                (1, now + datetime.timedelta(seconds=2)),
+                (0, now + datetime.timedelta(seconds=2.5)),
+                (1, now + datetime.timedelta(seconds=3)),
+            ])
+
+    def testDispatchOrder(self):
+        now = datetime.datetime.now()
+        feed1 = NonRealtimeFeed([now], 0)
+        feed2 = RealtimeFeed([now + datetime.timedelta(seconds=1)], None)
+        values = self.__runFeeds([feed2, feed1], True)
+        # Check that although feed2 is realtime, feed1 was dispatched before.
+        self.assertEqual(values, [(1, now), (0, now + datetime.timedelta(seconds=1))])
+
+
 class EventTestCase(common.TestCase):
     def testEmitOrder(self):
         handlersData = []
@@ -69,5 +69,46 @@ class OptimizerTestCase(common.TestCase):
         res = local.run(FailingStrategy, barFeed, parameters_generator(instrument, 5, 100), logLevel=logging.DEBUG)
         self.assertIsNone(res)
 
+    def __runProcessPool(self, strategyClass, useSharedMemory):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        return local.run(
+            strategyClass, barFeed, parameters_generator(instrument, 5, 100), workerCount=2,
+            logLevel=logging.DEBUG, batchSize=10, useSharedMemory=useSharedMemory, backend=local.Backend.PROCESS_POOL
+        )
+
+    def testProcessPool(self):
+        for useSharedMemory in [True, False]:
+            res = self.__runProcessPool(sma_crossover.SMACrossOver, useSharedMemory)
+            self.assertEqual(round(res.getResult(), 2), 1295462.6)
+            self.assertEqual(res.getParameters()[1], 20)
+
+    def testProcessPoolFailingStrategy(self):
+        self.assertIsNone(self.__runProcessPool(FailingStrategy, True))
+
+    def testPoolWorkerRunBatch(self):
+        # Runs the strategies in this process, with the same code every backend uses.
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        bars = [bars for dateTime, bars in barFeed]
+        instruments = barFeed.getRegisteredInstruments()
+
+        poolWorker = local.PoolWorker(
+            sma_crossover.SMACrossOver, barFeed.getFrequency(), instruments, bars, None, logging.ERROR
+        )
+        results = poolWorker.runBatch([(instrument, 20), (instrument, 30)])
+        self.assertEqual([parameters for parameters, _, _ in results], [(instrument, 20), (instrument, 30)])
+        self.assertEqual(round(results[0][1], 2), 1295462.6)
+        self.assertTrue(all(runtime >= 0 for _, _, runtime in results))
+
+        poolWorker = local.PoolWorker(FailingStrategy, barFeed.getFrequency(), instruments, bars, None, logging.CRITICAL)
+        self.assertEqual([result for _, result, _ in poolWorker.runBatch([(instrument, 20)])], [None])
+
+    def testInvalidBackend(self):
+        with self.assertRaisesRegex(Exception, "Invalid backend.*"):
+            local.run(sma_crossover.SMACrossOver, yahoofeed.Feed(), [], backend="invalid")
+
 if __name__ == "__main__":
     OptimizerTestCase().testLocal()
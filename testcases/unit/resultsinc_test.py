@@ -0,0 +1,122 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import logging
+import os
+
+import numpy as np
+
+from . import common
+
+from quantworks.barfeed import yahoofeed
+from quantworks.examples import sma_crossover
+from quantworks.optimizer import base
+from quantworks.optimizer import local
+from quantworks.optimizer import resultsfile
+
+
+class ResultSincTestCase(common.TestCase):
+    def testBestOnly(self):
+        sinc = base.ResultSinc()
+        sinc.push(None, base.Parameters(0))
+        sinc.push(1, base.Parameters(1))
+        sinc.push(3, base.Parameters(3))
+        sinc.push(2, base.Parameters(2))
+        self.assertEqual(sinc.getBest()[0], 3)
+        self.assertEqual([(r, p.args) for r, p in sinc.getTopResults()], [(3, (3,))])
+        self.assertEqual(sinc.getResultCount(), 4)
+
+    def testTopK(self):
+        sinc = base.ResultSinc(topK=3)
+        self.assertEqual(sinc.getTopResults(), [])
+        for result, name in [(1, "a"), (5, "b"), (None, "c"), (3, "d"), (5, "e"), (4, "f"), (0, "g")]:
+            sinc.push(result, base.Parameters(name))
+        # Among equal results, the first one is ranked first.
+        self.assertEqual([(r, p.args[0]) for r, p in sinc.getTopResults()], [(5, "b"), (5, "e"), (4, "f")])
+        self.assertEqual(sinc.getBest()[1].args, ("b",))
+
+    def testResultsFile(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "results.bin")
+            sinc = base.ResultSinc(resultsPath=path)
+            for i in range(25):
+                sinc.push(None if i == 3 else i * 2.0, base.Parameters("orcl", i), 0.5)
+            sinc.close()
+
+            # Appending to an existing file and with a different chunk size.
+            writer = resultsfile.ResultsWriter(path, chunkSize=2)
+            writer.append(("spy", 100), 1.5)
+            writer.append(("spy", 101.5), 2.5, 3)
+            writer.append(("spy", 102), 3.5)
+            writer.close()
+
+            parameters, results, runtimes = resultsfile.read_results(path)
+            self.assertEqual(len(parameters), 2)
+            self.assertEqual(list(parameters[0]), ["orcl"] * 25 + ["spy"] * 3)
+            self.assertEqual(list(parameters[1]), list(range(25)) + [100, 101.5, 102])
+            self.assertTrue(np.isnan(results[3]))
+            self.assertEqual(results[24], 48)
+            self.assertEqual(list(results[25:]), [1.5, 2.5, 3.5])
+            self.assertEqual(runtimes[0], 0.5)
+            self.assertEqual(runtimes[26], 3)
+            self.assertTrue(np.isnan(runtimes[25]))
+
+    def testParametersWithDifferentLengths(self):
+        with common.TmpDir() as tmpPath:
+            writer = resultsfile.ResultsWriter(os.path.join(tmpPath, "results.bin"))
+            writer.append((1, 2), 1)
+            writer.append((1,), 1)
+            with self.assertRaisesRegex(Exception, "All parameters must have the same length"):
+                writer.flush()
+
+    def testEmptyFile(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "results.bin")
+            resultsfile.ResultsWriter(path).close()
+            parameters, results, runtimes = resultsfile.read_results(path)
+            self.assertEqual(parameters, [])
+            self.assertEqual(len(results), 0)
+
+    def testLocal(self):
+        for backend in [local.Backend.XMLRPC, local.Backend.PROCESS_POOL]:
+            with common.TmpDir() as tmpPath:
+                path = os.path.join(tmpPath, "results.bin")
+                barFeed = yahoofeed.Feed()
+                barFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+                sinc = base.ResultSinc(topK=5, resultsPath=path)
+                res = local.run(
+                    sma_crossover.SMACrossOver, barFeed, [("orcl", sma) for sma in range(5, 40)], workerCount=2,
+                    logLevel=logging.DEBUG, batchSize=10, backend=backend, resultSinc=sinc
+                )
+                sinc.close()
+
+                self.assertEqual(res.getParameters()[1], 20)
+                topResults = sinc.getTopResults()
+                self.assertEqual(len(topResults), 5)
+                self.assertEqual(topResults[0][1].args, ("orcl", 20))
+                self.assertEqual(sinc.getResultCount(), 35)
+
+                parameters, results, runtimes = resultsfile.read_results(path)
+                self.assertEqual(sorted(parameters[1]), list(range(5, 40)))
+                self.assertEqual(round(results.max(), 2), 1295462.6)
+                self.assertEqual(
+                    sorted(results.tolist(), reverse=True)[:5], [result for result, parameters in topResults]
+                )
+                self.assertTrue((runtimes > 0).all())
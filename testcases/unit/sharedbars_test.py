@@ -0,0 +1,129 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import datetime
+import logging
+
+import numpy as np
+import pytz
+
+from . import common
+
+from quantworks import bar
+from quantworks.barfeed import yahoofeed
+from quantworks.optimizer import indicatorcache
+from quantworks.optimizer import local
+from quantworks.optimizer import sharedbars
+from quantworks.examples import sma_crossover
+
+
+def load_bars(timezone=None):
+    feed = yahoofeed.Feed(timezone=timezone)
+    feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+    feed.addBarsFromCSV("ige", common.get_data_file_path("sharpe-ratio-test-ige.csv"))
+    return feed.getRegisteredInstruments(), [bars for dateTime, bars in feed]
+
+
+def parameters_generator(instrument, smaFirst, smaLast):
+    for sma in range(smaFirst, smaLast+1):
+        yield(instrument, sma)
+
+
+class SharedBarsTestCase(common.TestCase):
+    def setUp(self):
+        super(SharedBarsTestCase, self).setUp()
+        if not sharedbars.is_supported():
+            self.skipTest("Shared memory is not supported")
+
+    def __checkRoundTrip(self, timezone):
+        instruments, bars = load_bars(timezone)
+        published = sharedbars.SharedBars.publish(instruments, bars, bar.Frequency.DAY)
+        try:
+            attached = sharedbars.SharedBars.attach(published.getDescriptor())
+            try:
+                self.assertEqual(len(attached), len(bars))
+                self.assertEqual(attached.getInstruments(), instruments)
+                for expected, actual in zip(bars, attached):
+                    self.assertEqual(expected.getDateTime(), actual.getDateTime())
+                    self.assertEqual(str(expected.getDateTime()), str(actual.getDateTime()))
+                    self.assertEqual(expected.getInstruments(), actual.getInstruments())
+                    for instrument in expected.getInstruments():
+                        expectedBar = expected[instrument]
+                        actualBar = actual[instrument]
+                        self.assertEqual(type(expectedBar), type(actualBar))
+                        self.assertEqual(expectedBar.getOpen(), actualBar.getOpen())
+                        self.assertEqual(expectedBar.getHigh(), actualBar.getHigh())
+                        self.assertEqual(expectedBar.getLow(), actualBar.getLow())
+                        self.assertEqual(expectedBar.getClose(), actualBar.getClose())
+                        self.assertEqual(expectedBar.getVolume(), actualBar.getVolume())
+                        self.assertEqual(expectedBar.getAdjClose(), actualBar.getAdjClose())
+                        self.assertEqual(expectedBar.getFrequency(), actualBar.getFrequency())
+                self.assertEqual(attached[-1].getDateTime(), bars[-1].getDateTime())
+
+                # Columns taken from shared memory should match the ones extracted from the bars.
+                sharedColumns = sharedbars.SharedBarColumns(attached)
+                barColumns = indicatorcache.BarColumns(instruments, bars)
+                for instrument in instruments:
+                    for column in ["open", "close", "volume", "adj_close", "adj_open"]:
+                        self.assertEqual(
+                            sharedColumns.getFingerprint(instrument, column), barColumns.getFingerprint(instrument, column)
+                        )
+            finally:
+                attached.close()
+        finally:
+            published.close()
+
+    def testRoundTrip(self):
+        self.__checkRoundTrip(None)
+
+    def testRoundTripWithTimezone(self):
+        self.__checkRoundTrip(pytz.timezone("US/Eastern"))
+
+    def testExtraColumnsNotSupported(self):
+        bars = [bar.Bars({
+            "orcl": bar.BasicBar(datetime.datetime(2001, 1, 1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY, {"a": 1})
+        })]
+        with self.assertRaisesRegex(Exception, "Extra columns are not supported"):
+            sharedbars.SharedBars.publish(["orcl"], bars, bar.Frequency.DAY)
+
+    def testAdjustedColumnsWithoutAdjClose(self):
+        bars = [bar.Bars({
+            "orcl": bar.BasicBar(datetime.datetime(2001, 1, i + 1), 1, 1, 1, 1, 1, None, bar.Frequency.DAY)
+        }) for i in range(3)]
+        published = sharedbars.SharedBars.publish(["orcl"], bars, bar.Frequency.DAY)
+        try:
+            sharedColumns = sharedbars.SharedBarColumns(published)
+            barColumns = indicatorcache.BarColumns(["orcl"], bars)
+            for columns in [sharedColumns, barColumns]:
+                self.assertTrue(np.isnan(columns.getValues("orcl", "adj_close")).all())
+                with self.assertRaisesRegex(Exception, "Adjusted close is missing"):
+                    columns.getValues("orcl", "adj_open")
+        finally:
+            published.close()
+
+    def testLocal(self):
+        barFeed = yahoofeed.Feed()
+        barFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        res = local.run(
+            sma_crossover.SMACrossOver, barFeed, parameters_generator("orcl", 5, 30), workerCount=2,
+            logLevel=logging.DEBUG, batchSize=10, useSharedMemory=True
+        )
+        self.assertEqual(round(res.getResult(), 2), 1295462.6)
+        self.assertEqual(res.getParameters()[1], 20)
@@ -18,7 +18,9 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import datetime
 import os
+import sqlite3
 
 from six.moves import xrange
 
@@ -56,6 +58,16 @@ class TemporarySQLiteFeed:
 class SQLiteFeedTestCase(common.TestCase):
     dbName = "SQLiteFeedTestCase.sqlite"
 
+    def __getIndexes(self):
+        connection = sqlite3.connect(SQLiteFeedTestCase.dbName)
+        try:
+            rows = connection.execute(
+                "select name from sqlite_master where type = 'index' and name not like 'sqlite_autoindex%'"
+            ).fetchall()
+        finally:
+            connection.close()
+        return [row[0] for row in rows]
+
     def testBaseFeedInterface(self):
         tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
         with tmpFeed:
@@ -127,3 +139,151 @@ class SQLiteFeedTestCase(common.TestCase):
             self.assertEqual(len(barDS.getHighDataSeries()), 2)
             self.assertEqual(len(barDS.getLowDataSeries()), 2)
             self.assertEqual(len(barDS.getAdjCloseDataSeries()), 2)
+
+    def testBulkWrites(self):
+        tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+        with tmpFeed:
+            yahooFeed = yahoofeed.Feed()
+            yahooFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+            yahooFeed.addBarsFromCSV("spy", common.get_data_file_path("spy-2011-yahoofinance.csv"))
+
+            db = tmpFeed.getFeed().getDatabase()
+            with db.importSession() as session:
+                self.assertEqual(session, db)
+                self.assertEqual(db.addBarsFromFeed(yahooFeed, batchSize=100), 252 * 2)
+            # The index used for streaming is only created when requested, after the import.
+            self.assertEqual(self.__getIndexes(), [])
+            db.createIndexes()
+            self.assertEqual(self.__getIndexes(), ["bar_frequency_timestamp"])
+
+            bars = db.getBars("orcl", bar.Frequency.DAY)
+            self.assertEqual(len(bars), 252)
+            self.assertEqual(bars[-1].getClose(), 29.06)
+            self.assertEqual(len(db.getBars("spy", bar.Frequency.DAY)), 252)
+
+            # Existing bars get replaced.
+            lastBar = bars[-1]
+            newBars = [
+                bar.BasicBar(lastBar.getDateTime(), 1, 2, 0.5, 1.5, 100, None, bar.Frequency.DAY),
+                bar.BasicBar(datetime.datetime(2001, 1, 2), 1, 2, 0.5, 1.2, 100, 1, bar.Frequency.DAY),
+            ]
+            self.assertEqual(db.addBarsFromSequence("orcl", newBars, bar.Frequency.DAY), 2)
+            bars = db.getBars("orcl", bar.Frequency.DAY)
+            self.assertEqual(len(bars), 253)
+            self.assertEqual(bars[-2].getClose(), 1.5)
+            self.assertEqual(bars[-2].getAdjClose(), None)
+            self.assertEqual(bars[-1].getClose(), 1.2)
+
+            db.addBar("orcl", bar.BasicBar(datetime.datetime(2001, 1, 2), 1, 2, 0.5, 1.7, 100, 1, bar.Frequency.DAY), bar.Frequency.DAY)
+            bars = db.getBars("orcl", bar.Frequency.DAY)
+            self.assertEqual(len(bars), 253)
+            self.assertEqual(bars[-1].getClose(), 1.7)
+
+    def testFailedBatchIsRolledBack(self):
+        tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+        with tmpFeed:
+            db = tmpFeed.getFeed().getDatabase()
+            bars = [
+                bar.BasicBar(datetime.datetime(2001, 1, 1), 1, 2, 0.5, 1.5, 100, None, bar.Frequency.DAY),
+                bar.BasicBar(datetime.datetime(2001, 1, 2), 1, 2, 0.5, 1.5, None, None, bar.Frequency.DAY),
+            ]
+            with self.assertRaises(sqlite3.IntegrityError):
+                db.addBarsFromSequence("orcl", bars, bar.Frequency.DAY)
+            self.assertEqual(db.getBars("orcl", bar.Frequency.DAY), [])
+
+            # The connection is still usable.
+            self.assertEqual(db.addBarsFromSequence("orcl", bars[:1], bar.Frequency.DAY), 1)
+            self.assertEqual(len(db.getBars("orcl", bar.Frequency.DAY)), 1)
+
+    def testImportSessionRestoresPragmas(self):
+        tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+        with tmpFeed:
+            db = tmpFeed.getFeed().getDatabase()
+            bar_ = bar.BasicBar(datetime.datetime(2001, 1, 1), 1, 2, 0.5, 1.5, 100, None, bar.Frequency.DAY)
+            with self.assertRaises(sqlite3.IntegrityError):
+                with db.importSession(synchronous="OFF", journalMode="MEMORY"):
+                    db.addBar("orcl", bar_, bar.Frequency.DAY)
+                    db.addBar("orcl", bar.BasicBar(
+                        datetime.datetime(2001, 1, 2), 1, 2, 0.5, 1.5, None, None, bar.Frequency.DAY
+                    ), bar.Frequency.DAY)
+            # Previous values were restored, and the session can be used again.
+            with db.importSession(synchronous="NORMAL", journalMode=None):
+                db.addBar("spy", bar_, bar.Frequency.DAY)
+            self.assertEqual(len(db.getBars("orcl", bar.Frequency.DAY)), 1)
+            self.assertEqual(len(db.getBars("spy", bar.Frequency.DAY)), 1)
+
+    def __fillDatabase(self, db):
+        yahooFeed = yahoofeed.Feed()
+        yahooFeed.addBarsFromCSV("spy", common.get_data_file_path("spy-2011-yahoofinance.csv"))
+        yahooFeed.addBarsFromCSV("goog", common.get_data_file_path("goog-2011-yahoofinance.csv"))
+        yahooFeed.addBarsFromCSV("nikkei", common.get_data_file_path("nikkei-2011-yahoofinance.csv"))
+        db.addBarsFromFeed(yahooFeed)
+
+    def testStreamingFeed(self):
+        tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+        with tmpFeed:
+            sqliteFeed = tmpFeed.getFeed()
+            self.__fillDatabase(sqliteFeed.getDatabase())
+            sqliteFeed.loadBars("spy")
+            sqliteFeed.loadBars("goog")
+
+            streamingFeed = sqlitefeed.StreamingFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY, fetchSize=7)
+            streamingFeed.loadBars(["spy", "goog"])
+            self.assertEqual(streamingFeed.getRegisteredInstruments(), ["spy", "goog"])
+            sqliteFeed.start()
+            streamingFeed.start()
+            while not sqliteFeed.eof():
+                self.assertFalse(streamingFeed.eof())
+                self.assertEqual(streamingFeed.peekDateTime(), sqliteFeed.peekDateTime())
+                streamingBars = streamingFeed.getNextBars()
+                sqliteBars = sqliteFeed.getNextBars()
+                self.assertEqual(streamingBars.getDateTime(), sqliteBars.getDateTime())
+                self.assertEqual(streamingFeed.getCurrentDateTime(), sqliteFeed.getCurrentDateTime())
+                self.assertEqual(sorted(streamingBars.getInstruments()), sorted(sqliteBars.getInstruments()))
+                for instrument in sqliteBars.getInstruments():
+                    self.assertEqual(streamingBars[instrument].getClose(), sqliteBars[instrument].getClose())
+                    self.assertEqual(streamingBars[instrument].getAdjClose(), sqliteBars[instrument].getAdjClose())
+            self.assertTrue(streamingFeed.eof())
+            self.assertEqual(streamingFeed.getNextBars(), None)
+            streamingFeed.stop()
+            streamingFeed.getDatabase().disconnect()
+
+    def testStreamingFeedInterface(self):
+        tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+        with tmpFeed:
+            self.__fillDatabase(tmpFeed.getFeed().getDatabase())
+
+            streamingFeed = sqlitefeed.StreamingFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+            streamingFeed.loadBars(["spy", "nikkei"])
+            feed_test.tstBaseFeedInterface(self, streamingFeed)
+            self.assertEqual(len(streamingFeed["spy"]), 252)
+            self.assertEqual(len(streamingFeed["nikkei"]), 244)
+
+            # Rows are fetched again after a reset.
+            streamingFeed.reset()
+            streamingFeed.loadBars(["spy"], timezone=marketsession.USEquities.timezone, fromDateTime=datetime.datetime(2011, 12, 1))
+            for bars in streamingFeed:
+                pass
+            self.assertEqual(len(streamingFeed["spy"]), 21)
+            self.assertEqual(streamingFeed["spy"][0].getDateTime().tzinfo.zone, "US/Eastern")
+            with self.assertRaisesRegex(Exception, "Can't load bars once bars were read"):
+                streamingFeed.loadBars(["goog"])
+            streamingFeed.getDatabase().disconnect()
+
+    def testIterBars(self):
+        tmpFeed = TemporarySQLiteFeed(SQLiteFeedTestCase.dbName, bar.Frequency.DAY)
+        with tmpFeed:
+            db = tmpFeed.getFeed().getDatabase()
+            self.__fillDatabase(db)
+
+            rows = list(db.iterBars(None, bar.Frequency.DAY, fetchSize=10))
+            self.assertEqual(len(rows), 252 * 2 + 244)
+            keys = [(bar_.getDateTime(), sqlitefeed.normalize_instrument(instrument)) for instrument, bar_ in rows]
+            self.assertEqual([dateTime for dateTime, _ in keys], sorted(dateTime for dateTime, _ in keys))
+            self.assertEqual(len(set(keys)), len(keys))
+
+            rows = list(db.iterBars(["goog", "missing"], bar.Frequency.DAY, toDateTime=datetime.datetime(2011, 1, 31)))
+            self.assertEqual(set(instrument for instrument, _ in rows), set(["goog"]))
+            self.assertEqual(len(rows), 20)
+            self.assertEqual(list(db.iterBars(["goog"], bar.Frequency.MINUTE)), [])
+            self.assertEqual(list(db.iterBars([], bar.Frequency.DAY)), [])
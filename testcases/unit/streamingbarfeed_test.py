@@ -0,0 +1,172 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import datetime
+import os
+
+from . import common
+from . import barfeed_test
+from . import feed_test
+
+from quantworks import bar
+from quantworks.barfeed import csvfeed
+
+
+def build_row_parser(timezone=None):
+    columnNames = {
+        "datetime": "Date",
+        "open": "Open",
+        "high": "High",
+        "low": "Low",
+        "close": "Close",
+        "volume": "Volume",
+        "adj_close": "Adj Close",
+    }
+    return csvfeed.GenericRowParser(columnNames, "%Y-%m-%d", datetime.time(0), bar.Frequency.DAY, timezone)
+
+
+def write_sorted_csv(srcPath, dstPath):
+    # Yahoo! Finance files are sorted by datetime in descending order.
+    with open(srcPath) as f:
+        lines = f.read().splitlines()
+    with open(dstPath, "w") as f:
+        f.write("\n".join([lines[0]] + sorted(lines[1:])))
+
+
+def load_bars(feed):
+    ret = []
+    for dateTime, bars in feed:
+        ret.append((dateTime, {instrument: (
+            bars[instrument].getDateTime(), bars[instrument].getOpen(), bars[instrument].getClose(),
+            bars[instrument].getVolume(), bars[instrument].getAdjClose()
+        ) for instrument in bars.getInstruments()}))
+    return ret
+
+
+class StreamingBarFeedTestCase(common.TestCase):
+    def setUp(self):
+        super(StreamingBarFeedTestCase, self).setUp()
+        self.__tmpDir = common.TmpDir()
+        tmpPath = self.__tmpDir.__enter__()
+        self.__paths = {}
+        for instrument, fileName in [
+            ("orcl", "orcl-2000-yahoofinance.csv"),
+            ("spy", "spy-2011-yahoofinance.csv"),
+            ("goog", "goog-2011-yahoofinance.csv"),
+        ]:
+            self.__paths[instrument] = os.path.join(tmpPath, fileName)
+            write_sorted_csv(common.get_data_file_path(fileName), self.__paths[instrument])
+        self.__tmpPath = tmpPath
+
+    def tearDown(self):
+        self.__tmpDir.__exit__(None, None, None)
+        super(StreamingBarFeedTestCase, self).tearDown()
+
+    def testSameBarsAsGenericBarFeed(self):
+        memFeed = csvfeed.GenericBarFeed(bar.Frequency.DAY)
+        memFeed.setColumnName("datetime", "Date")
+        memFeed.setDateTimeFormat("%Y-%m-%d")
+        streamingFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        for instrument in ["spy", "goog"]:
+            memFeed.addBarsFromCSV(instrument, self.__paths[instrument])
+            streamingFeed.addBarsFromCSV(instrument, self.__paths[instrument], build_row_parser())
+
+        bars = load_bars(streamingFeed)
+        self.assertEqual(len(bars), 252)
+        self.assertEqual(sum(len(values) for dateTime, values in bars), 252 * 2)
+        self.assertEqual(bars, load_bars(memFeed))
+        self.assertEqual(streamingFeed.getCurrentDateTime(), datetime.datetime(2011, 12, 30))
+
+    def testBaseBarFeed(self):
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromCSV("orcl", self.__paths["orcl"], build_row_parser())
+        barfeed_test.check_base_barfeed(self, barFeed, True)
+
+    def testBaseFeedInterface(self):
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromCSV("orcl", self.__paths["orcl"], build_row_parser())
+        feed_test.tstBaseFeedInterface(self, barFeed)
+
+    def testBounded(self):
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY, maxLen=2)
+        barFeed.addBarsFromCSV("orcl", self.__paths["orcl"], build_row_parser())
+        for dateTime, bars in barFeed:
+            pass
+        self.assertEqual(len(barFeed["orcl"]), 2)
+        self.assertEqual(barFeed["orcl"][-1].getDateTime(), datetime.datetime(2000, 12, 29))
+
+    def testFirstBarReadRightAway(self):
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromCSV("orcl", self.__paths["orcl"], build_row_parser())
+        self.assertEqual(barFeed.peekDateTime(), datetime.datetime(2000, 1, 3))
+        self.assertEqual(barFeed.getNextBars()["orcl"].getClose(), 118.12)
+        self.assertEqual(barFeed.peekDateTime(), datetime.datetime(2000, 1, 4))
+        with self.assertRaisesRegex(Exception, "Can't add more files once bars were read"):
+            barFeed.addBarsFromCSV("spy", self.__paths["spy"], build_row_parser())
+
+    def testReset(self):
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromCSV("orcl", self.__paths["orcl"], build_row_parser())
+        bars = load_bars(barFeed)
+        self.assertTrue(barFeed.eof())
+        barFeed.reset()
+        self.assertFalse(barFeed.eof())
+        self.assertEqual(load_bars(barFeed), bars)
+
+    def testBarFilter(self):
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.setBarFilter(csvfeed.DateRangeFilter(datetime.datetime(2000, 12, 1)))
+        barFeed.addBarsFromCSV("orcl", self.__paths["orcl"], build_row_parser())
+        bars = load_bars(barFeed)
+        self.assertEqual(len(bars), 20)
+        self.assertEqual(bars[0][0], datetime.datetime(2000, 12, 1))
+
+    def testNotSorted(self):
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), build_row_parser())
+        with self.assertRaisesRegex(Exception, "Bars in .* are not sorted by datetime.*"):
+            load_bars(barFeed)
+
+    def testDuplicateBars(self):
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromCSV("orcl", self.__paths["orcl"], build_row_parser())
+        barFeed.addBarsFromCSV("orcl", self.__paths["orcl"], build_row_parser())
+        with self.assertRaisesRegex(Exception, "Duplicate bars found for.*"):
+            load_bars(barFeed)
+
+    def testMalformedBars(self):
+        path = os.path.join(self.__tmpPath, "malformed.csv")
+        with open(path, "w") as f:
+            f.write("Date,Open,High,Low,Close,Volume,Adj Close\n")
+            f.write("2001-01-01,1,2,0.5,1.5,100,1\n")
+            f.write("2001-01-02,1,2,0.5,abc,100,1\n")
+            f.write("2001-01-03,1,2,0.5,1.5,100,1\n")
+
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromCSV("orcl", path, build_row_parser(), skipMalformedBars=True)
+        self.assertEqual(
+            [dateTime for dateTime, bars in load_bars(barFeed)],
+            [datetime.datetime(2001, 1, 1), datetime.datetime(2001, 1, 3)]
+        )
+
+        barFeed = csvfeed.StreamingBarFeed(bar.Frequency.DAY)
+        barFeed.addBarsFromCSV("orcl", path, build_row_parser())
+        with self.assertRaises(ValueError):
+            load_bars(barFeed)
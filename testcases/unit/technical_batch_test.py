@@ -0,0 +1,176 @@
+# QuantWorks
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
+"""
+
+import datetime
+
+import numpy as np
+
+from . import common
+
+from quantworks.barfeed import yahoofeed
+from quantworks.dataseries import bards
+from quantworks import dataseries
+from quantworks.technical import atr
+from quantworks.technical import highlow
+from quantworks.technical import hurst
+from quantworks.technical import linreg
+from quantworks.technical import ma
+from quantworks.technical import roc
+from quantworks.technical import rsi
+from quantworks.technical import stats
+from quantworks.technical import stoch
+from quantworks.utils import dt
+
+
+class BatchTestCase(common.TestCase):
+    def setUp(self):
+        super(BatchTestCase, self).setUp()
+        self.__barDs = bards.BarDataSeries()
+        self.__filters = []
+
+    def __loadBars(self):
+        feed = yahoofeed.Feed()
+        feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        for dateTime, bars in feed:
+            self.__barDs.append(bars["orcl"])
+
+    def assertSeriesEqual(self, eventValues, batchValues):
+        self.assertEqual(len(eventValues), len(batchValues))
+        for i in range(len(eventValues)):
+            if eventValues[i] is None or np.isnan(eventValues[i]):
+                self.assertTrue(np.isnan(batchValues[i]), "%s != %s at %d" % (eventValues[i], batchValues[i], i))
+            else:
+                self.assertAlmostEqual(eventValues[i], batchValues[i], delta=abs(eventValues[i]) * 1e-9 + 1e-9)
+
+    def __checkClose(self, filterClass, *args):
+        eventFilter = filterClass(self.__barDs.getCloseDataSeries(), *args)
+        self.__loadBars()
+        closes = self.__barDs.getCloseDataSeries().asarray()
+        self.assertSeriesEqual(eventFilter, filterClass.batch(closes, *args))
+
+    def testSMA(self):
+        self.__checkClose(ma.SMA, 15)
+
+    def testEMA(self):
+        self.__checkClose(ma.EMA, 10)
+
+    def testWMA(self):
+        self.__checkClose(ma.WMA, [1, 2, 3, 4])
+
+    def testRSI(self):
+        self.__checkClose(rsi.RSI, 14)
+
+    def testStdDev(self):
+        self.__checkClose(stats.StdDev, 20, 1)
+
+    def testZScore(self):
+        self.__checkClose(stats.ZScore, 20)
+
+    def testHigh(self):
+        self.__checkClose(highlow.High, 10)
+
+    def testLow(self):
+        self.__checkClose(highlow.Low, 10)
+
+    def testROC(self):
+        self.__checkClose(roc.RateOfChange, 12)
+
+    def testSlope(self):
+        self.__checkClose(linreg.Slope, 10)
+
+    def testTrend(self):
+        closeDs = self.__barDs.getCloseDataSeries()
+        trend = linreg.Trend(closeDs, 10, 0.2, -0.2)
+        self.__loadBars()
+        self.assertEqual(list(linreg.Trend.batch(closeDs.asarray(), 10, 0.2, -0.2)), list(trend))
+
+    def testHurst(self):
+        self.__checkClose(hurst.HurstExponent, 100, 2, 20)
+
+    def testHurstPeriodLessThanLags(self):
+        # Some lags have no differences in the window.
+        self.__checkClose(hurst.HurstExponent, 30, 2, 40)
+
+    def testHurstPeriodEqualToLags(self):
+        # The largest lag has a single difference in the window.
+        self.__checkClose(hurst.HurstExponent, 20, 2, 20)
+
+    def testLeastSquaresRegression(self):
+        closeDs = self.__barDs.getCloseDataSeries()
+        lsReg = linreg.LeastSquaresRegression(closeDs, 10)
+        self.__loadBars()
+        timestamps = [dt.datetime_to_timestamp(dateTime) for dateTime in closeDs.getDateTimes()]
+        self.assertSeriesEqual(lsReg, linreg.LeastSquaresRegression.batch(closeDs.asarray(), timestamps, 10))
+
+    def testATR(self):
+        atrDs = atr.ATR(self.__barDs, 14)
+        self.__loadBars()
+        self.assertSeriesEqual(atrDs, atr.ATR.batch(
+            self.__barDs.getHighDataSeries().asarray(),
+            self.__barDs.getLowDataSeries().asarray(),
+            self.__barDs.getCloseDataSeries().asarray(),
+            14
+        ))
+
+    def testStochasticOscillator(self):
+        stochDs = stoch.StochasticOscillator(self.__barDs, 14, 3)
+        self.__loadBars()
+        k, d = stoch.StochasticOscillator.batch(
+            self.__barDs.getHighDataSeries().asarray(),
+            self.__barDs.getLowDataSeries().asarray(),
+            self.__barDs.getCloseDataSeries().asarray(),
+            14, 3
+        )
+        self.assertSeriesEqual(stochDs, k)
+        self.assertSeriesEqual(stochDs.getD(), d)
+
+    def testSkipNone(self):
+        values = [None, 1, 2, None, 3, 4, None, None, 5, 2, 1, None, 7]
+        for filterClass, args in [(ma.SMA, (3,)), (ma.EMA, (3,)), (rsi.RSI, (2,)), (stats.StdDev, (2,))]:
+            ds = dataseries.SequenceDataSeries()
+            eventFilter = filterClass(ds, *args)
+            for value in values:
+                ds.append(value)
+            self.assertSeriesEqual(eventFilter, filterClass.batch(values, *args))
+            self.assertSeriesEqual(eventFilter, filterClass.batch(np.array(values, dtype=float), *args))
+
+    def testSkipNoneWithTimestamps(self):
+        ds = dataseries.SequenceDataSeries()
+        lsReg = linreg.LeastSquaresRegression(ds, 3)
+        values = [1, None, 3, 2, None, 5, 8]
+        timestamps = []
+        dateTime = datetime.datetime(2012, 1, 1)
+        for value in values:
+            ds.appendWithDateTime(dateTime, value)
+            timestamps.append(dt.datetime_to_timestamp(dateTime))
+            dateTime += datetime.timedelta(hours=1)
+        self.assertSeriesEqual(lsReg, linreg.LeastSquaresRegression.batch(values, timestamps, 3))
+
+    def testNotEnoughValues(self):
+        self.assertTrue(np.isnan(ma.SMA.batch([1, 2], 3)).all())
+        self.assertTrue(np.isnan(ma.EMA.batch([1, 2], 3)).all())
+        self.assertTrue(np.isnan(rsi.RSI.batch([1, 2, 3], 3)).all())
+        self.assertTrue(np.isnan(stats.StdDev.batch([], 3)).all())
+        self.assertEqual(len(roc.RateOfChange.batch([], 1)), 0)
+
+    def testInvalidPeriod(self):
+        for filter_ in (highlow.High, highlow.Low):
+            with self.assertRaises(AssertionError):
+                filter_.batch([1, 2, 3], 0)
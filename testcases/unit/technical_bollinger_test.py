@@ -18,11 +18,14 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import numpy
 from six.moves import xrange
 
 from . import common
 
 from quantworks.technical import bollinger
+from quantworks.technical import ma
+from quantworks.technical import stats
 from quantworks import dataseries
 
 
@@ -75,3 +78,22 @@ class TestCase(common.TestCase):
         self.assertEqual(len(bBands.getLowerBand()), 3)
         self.assertEqual(len(bBands.getLowerBand()[:]), 3)
         self.assertEqual(len(bBands.getLowerBand().getDateTimes()), 3)
+
+    def testSameAsSMAAndStdDev(self):
+        values = numpy.random.RandomState(1).normal(100, 5, 1000)
+        seqDS = dataseries.SequenceDataSeries()
+        bBands = bollinger.BollingerBands(seqDS, 50, 2)
+        sma = ma.SMA(seqDS, 50)
+        stdDev = stats.StdDev(seqDS, 50)
+        for value in values:
+            seqDS.append(value)
+
+        for i in xrange(len(values)):
+            if sma[i] is None:
+                self.assertEqual(bBands.getMiddleBand()[i], None)
+                self.assertEqual(bBands.getUpperBand()[i], None)
+                self.assertEqual(bBands.getLowerBand()[i], None)
+            else:
+                self.assertAlmostEqual(bBands.getMiddleBand()[i], sma[i], places=9)
+                self.assertAlmostEqual(bBands.getUpperBand()[i], sma[i] + 2 * stdDev[i], places=9)
+                self.assertAlmostEqual(bBands.getLowerBand()[i], sma[i] - 2 * stdDev[i], places=9)
@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import numpy
+
 from . import common
 
 from quantworks import dataseries
@@ -33,3 +35,18 @@ class HighLowTestCase(common.TestCase):
             values.append(value)
         self.assertEqual(high[-1], 5)
         self.assertEqual(low[-1], 3)
+
+    def testLongPeriod(self):
+        rnd = numpy.random.RandomState(1)
+        prices = 100 + rnd.normal(0, 1, 1000).cumsum()
+        values = dataseries.SequenceDataSeries()
+        high = highlow.High(values, 252)
+        low = highlow.Low(values, 252)
+        for i, price in enumerate(prices):
+            values.append(price)
+            if i < 251:
+                self.assertEqual(high[-1], None)
+                self.assertEqual(low[-1], None)
+            else:
+                self.assertEqual(high[-1], prices[i - 251:i + 1].max())
+                self.assertEqual(low[-1], prices[i - 251:i + 1].min())
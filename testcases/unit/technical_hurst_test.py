@@ -26,9 +26,15 @@ from quantworks.technical import hurst
 from quantworks import dataseries
 
 
-def build_hurst(values, period, minLags, maxLags):
-    ds = dataseries.SequenceDataSeries()
-    ret = hurst.HurstExponent(ds, period, minLags, maxLags)
+def hurst_exp_reference(p, minLags, maxLags):
+    lagvec = list(range(minLags, maxLags))
+    tau = [np.sqrt(np.std(np.subtract(p[lag:], p[:-lag]))) for lag in lagvec]
+    return np.polyfit(np.log10(lagvec), np.log10(tau), 1)[0] * 2
+
+
+def build_hurst(values, period, minLags, maxLags, maxLen=None):
+    ds = dataseries.SequenceDataSeries(maxLen=maxLen)
+    ret = hurst.HurstExponent(ds, period, minLags, maxLags, maxLen=maxLen)
     for value in values:
         ds.append(value)
     return ret
@@ -70,3 +76,43 @@ class TestCase(common.TestCase):
         hds = build_hurst(values, num_values - 10, 2, 20)
         self.assertEqual(round(hds[-1], 1), 0)
         self.assertEqual(round(hds[-2], 1), 0)
+
+    def testHurstExpFunMatchesReference(self):
+        values = np.log10(np.cumsum(np.random.RandomState(1).randn(1000)) + 1000)
+        for minLags, maxLags in [(2, 4), (2, 20), (5, 50)]:
+            self.assertAlmostEqual(
+                hurst.hurst_exp(values, minLags, maxLags), hurst_exp_reference(values, minLags, maxLags), places=10
+            )
+
+    def testIncrementalMatchesReference(self):
+        # Long enough for the moments to be updated and recalculated several times.
+        values = np.cumsum(np.random.RandomState(2).randn(1000) + 0.5) + 1000
+        for period, minLags, maxLags in [(25, 2, 20), (100, 2, 20), (150, 5, 50)]:
+            hds = build_hurst(values, period, minLags, maxLags, len(values))
+            for i in range(period - 1):
+                self.assertIsNone(hds[i])
+            for i in range(period - 1, len(values)):
+                expected = hurst_exp_reference(np.log10(values[i - period + 1:i + 1]), minLags, maxLags)
+                self.assertAlmostEqual(hds[i], expected, places=9)
+
+    def testNoneValuesAreSkipped(self):
+        values = list(np.cumsum(np.random.RandomState(3).randn(300)) + 1000)
+        expectedValues = values[:100] + values[101:200] + values[203:]
+        values[100] = None
+        values[200:203] = [None] * 3
+        hds = build_hurst(values, 50, 2, 20)
+        expected = build_hurst(expectedValues, 50, 2, 20)
+        self.assertEqual(hds[-1], expected[-1])
+        self.assertEqual(hds[100], hds[99])
+
+    def testNotEnoughDifferences(self):
+        # With period <= maxLags some lags have less than 2 differences in the window, so there is no value.
+        values = np.cumsum(np.random.RandomState(4).randn(100)) + 1000
+        for period, minLags, maxLags in [(30, 2, 40), (20, 2, 20)]:
+            hds = build_hurst(values, period, minLags, maxLags)
+            batchValues = hurst.HurstExponent.batch(values, period, minLags, maxLags)
+            for i in range(period - 1):
+                self.assertIsNone(hds[i])
+            for i in range(period - 1, len(values)):
+                self.assertTrue(np.isnan(hds[i]))
+            self.assertTrue(np.isnan(batchValues).all())
@@ -20,10 +20,13 @@
 
 import datetime
 
+import numpy
+
 from . import common
 
 from quantworks.technical import linreg
 from quantworks import dataseries
+from quantworks.utils import dt
 
 
 class LeastSquaresRegressionTestCase(common.TestCase):
@@ -79,3 +82,42 @@ class LeastSquaresRegressionTestCase(common.TestCase):
         nextDateTime = nextDateTime + datetime.timedelta(milliseconds=50)
         seqDS.appendWithDateTime(nextDateTime, 5)
         self.assertEqual(round(lsReg[-1], 2), 5)
+
+    def testMatchesScipy(self):
+        rnd = numpy.random.RandomState(1)
+        prices = 100 + rnd.normal(0, 1, 1000).cumsum()
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i, seconds=int(s)) for i, s in enumerate(rnd.randint(0, 3600, len(prices)))]
+        timestamps = numpy.array([dt.datetime_to_timestamp(dateTime) for dateTime in dateTimes], dtype=float)
+        for windowSize in [2, 20, 252]:
+            seqDS = dataseries.SequenceDataSeries()
+            lsReg = linreg.LeastSquaresRegression(seqDS, windowSize)
+            slope = linreg.Slope(seqDS, windowSize)
+            for i, (dateTime, price) in enumerate(zip(dateTimes, prices)):
+                seqDS.appendWithDateTime(dateTime, price)
+                if i < windowSize - 1:
+                    self.assertEqual(lsReg[-1], None)
+                    self.assertEqual(slope[-1], None)
+                    continue
+                x = timestamps[i - windowSize + 1:i + 1]
+                y = prices[i - windowSize + 1:i + 1]
+                a, b = linreg.lsreg(x, y)
+                self.assertAlmostEqual(lsReg[-1], a * x[-1] + b, places=6)
+                futureDateTime = dateTime + datetime.timedelta(days=5)
+                self.assertAlmostEqual(
+                    lsReg.getValueAt(futureDateTime), a * dt.datetime_to_timestamp(futureDateTime) + b, places=5
+                )
+                self.assertAlmostEqual(slope[-1], linreg.lsreg(numpy.arange(windowSize), y)[0], places=9)
+
+    def testRollingLeastSquares(self):
+        regression = linreg.RollingLeastSquares(3)
+        self.assertEqual(regression.getSlope(), None)
+        self.assertEqual(regression.getValueAt(1), None)
+        regression.append(1, 1)
+        self.assertEqual(regression.getSlope(), None)
+        regression.append(2, float("nan"))
+        self.assertTrue(numpy.isnan(regression.getSlope()))
+        for x, y in [(3, 3), (4, 4), (5, 5)]:
+            regression.append(x, y)
+        self.assertEqual(regression.getSlope(), 1)
+        self.assertEqual(regression.getValueAt(10), 10)
+        self.assertEqual(regression.getLastX(), 5)
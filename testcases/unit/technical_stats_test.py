@@ -70,3 +70,32 @@ class TestCase(common.TestCase):
             if i >= 4:
                 self.assertEqual(round(zscore[-1], 4), round(expected[i], 4))
             i += 1
+
+    def testRollingMomentsMatchNumPy(self):
+        # Values with a large offset and a small spread are the hard case for running sums.
+        rnd = numpy.random.RandomState(1)
+        values = 1e6 + rnd.normal(0, 1, 1000)
+        for period in [2, 15, 250]:
+            seqDS = dataseries.SequenceDataSeries()
+            stdDev = stats.StdDev(seqDS, period, ddof=1)
+            zscore = stats.ZScore(seqDS, period)
+            for value in values:
+                seqDS.append(value)
+            for i in range(period - 1, len(values)):
+                window = values[i - period + 1:i + 1]
+                self.assertAlmostEqual(stdDev[i], window.std(ddof=1), places=7)
+                # With 2 values the spread can get too close to 0 for the Z-Score to be well conditioned.
+                if period > 2:
+                    self.assertAlmostEqual(zscore[i], (window[-1] - window.mean()) / window.std(), places=6)
+
+    def testRollingMomentsRecoverFromNaN(self):
+        eventWindow = stats.RollingMomentsEventWindow(3)
+        self.assertEqual(eventWindow.getMean(), None)
+        self.assertEqual(eventWindow.getVariance(), None)
+        for value in [1, float("nan"), None, 2, 3]:
+            eventWindow.onNewValue(None, value)
+        self.assertTrue(numpy.isnan(eventWindow.getMean()))
+        eventWindow.onNewValue(None, 4)
+        self.assertEqual(eventWindow.getMean(), 3)
+        self.assertEqual(eventWindow.getVariance(ddof=1), 1)
+        self.assertEqual(eventWindow.getStdDev(), numpy.array([2, 3, 4]).std())
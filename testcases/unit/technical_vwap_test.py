@@ -18,12 +18,28 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>, Tyler M Kontra <tyler@tylerkontra.com@gmail.com>
 """
 
+import datetime
+
 from six.moves import xrange
 
 from . import common
 
 from quantworks.technical import vwap
 from quantworks.barfeed import yahoofeed
+from quantworks.dataseries import bards
+from quantworks import bar
+
+
+def vwap_brute_force(bars, useTypicalPrice):
+    cumTotal = 0
+    cumVolume = 0
+    for bar_ in bars:
+        if useTypicalPrice:
+            cumTotal += bar_.getTypicalPrice() * bar_.getVolume()
+        else:
+            cumTotal += bar_.getPrice() * bar_.getVolume()
+        cumVolume += bar_.getVolume()
+    return cumTotal / float(cumVolume)
 
 
 class VWAPTestCase(common.TestCase):
@@ -98,3 +114,74 @@ class VWAPTestCase(common.TestCase):
         outputValues = [14.605005665747331, 14.605416923506045]
         for i in xrange(2):
             self.assertEqual(round(vwap_[i], 4), round(outputValues[i], 4))
+
+    def testMatchesBruteForce(self):
+        for period in [1, 2, 7, 50]:
+            for useTypicalPrice in [False, True]:
+                barFeed = self.__getFeed()
+                bars = barFeed[VWAPTestCase.Instrument]
+                vwap_ = vwap.VWAP(bars, period, useTypicalPrice)
+                barFeed.loadAll()
+                for i in xrange(period - 1, len(bars)):
+                    expected = vwap_brute_force(bars[i - period + 1:i + 1], useTypicalPrice)
+                    self.assertAlmostEqual(vwap_[i], expected, places=9)
+
+
+class AnchoredVWAPTestCase(common.TestCase):
+    def __buildBar(self, dateTime, price, volume):
+        return bar.BasicBar(dateTime, price, price + 1, price - 1, price, volume, None, bar.Frequency.MINUTE)
+
+    def __fillSessions(self, barDs, sessions, barsPerSession):
+        ret = []
+        for session in xrange(sessions):
+            begin = datetime.datetime(2020, 1, 6 + session, 9, 30)
+            for i in xrange(barsPerSession):
+                bar_ = self.__buildBar(
+                    begin + datetime.timedelta(minutes=i), 10 + session + (i % 7), 100 + (i * 37) % 101
+                )
+                barDs.append(bar_)
+                ret.append(bar_)
+        return ret
+
+    def testResetsEverySession(self):
+        for useTypicalPrice in [False, True]:
+            barDs = bards.BarDataSeries(maxLen=3 * 390)
+            anchoredVWAP = vwap.AnchoredVWAP(barDs, useTypicalPrice, maxLen=3 * 390)
+            bars = self.__fillSessions(barDs, 3, 390)
+            for i in xrange(len(bars)):
+                sessionBegin = i - i % 390
+                expected = vwap_brute_force(bars[sessionBegin:i + 1], useTypicalPrice)
+                self.assertAlmostEqual(anchoredVWAP[i], expected, places=9)
+        # The first bar in a session is its own VWAP.
+        self.assertEqual(anchoredVWAP[390], bars[390].getPrice())
+
+    def testSessionKey(self):
+        barDs = bards.BarDataSeries()
+        # A single session spanning all the bars.
+        anchoredVWAP = vwap.AnchoredVWAP(barDs, sessionKey=lambda dateTime: dateTime.year)
+        bars = self.__fillSessions(barDs, 2, 10)
+        self.assertAlmostEqual(anchoredVWAP[-1], vwap_brute_force(bars, False), places=9)
+
+    def testSessionKeyReturningNone(self):
+        barDs = bards.BarDataSeries()
+        anchoredVWAP = vwap.AnchoredVWAP(barDs, sessionKey=lambda dateTime: None)
+        bars = self.__fillSessions(barDs, 2, 10)
+        self.assertAlmostEqual(anchoredVWAP[-1], vwap_brute_force(bars, False), places=9)
+
+    def testWindow(self):
+        barDs = bards.BarDataSeries()
+        anchoredVWAP = vwap.AnchoredVWAP(barDs)
+        eventWindow = anchoredVWAP.getEventWindow()
+        self.assertFalse(eventWindow.windowFull())
+        self.__fillSessions(barDs, 1, 3)
+        self.assertTrue(eventWindow.windowFull())
+        self.assertEqual(len(eventWindow.getValues()), 0)
+
+    def testZeroVolume(self):
+        barDs = bards.BarDataSeries()
+        anchoredVWAP = vwap.AnchoredVWAP(barDs)
+        dateTime = datetime.datetime(2020, 1, 6, 9, 30)
+        barDs.append(self.__buildBar(dateTime, 10, 0))
+        barDs.append(self.__buildBar(dateTime + datetime.timedelta(minutes=1), 12, 50))
+        self.assertEqual(anchoredVWAP[0], None)
+        self.assertEqual(anchoredVWAP[1], 12)
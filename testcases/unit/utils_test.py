@@ -19,13 +19,18 @@
 """
 
 import datetime
+import os
+
+import numpy
 
 from six.moves import xrange
 
 from . import common
 
+from quantworks import marketsession
 from quantworks import utils
 from quantworks.utils import collections
+from quantworks.utils import csvutils
 from quantworks.utils import dt
 
 
@@ -280,6 +285,31 @@ class CollectionTestCaseBase(common.TestCase):
         self.assertEqual(d[0], 20)
         self.assertEqual(d[-1], 20)
 
+    def _testWrapAroundImpl(self):
+        maxLen = 7
+        d = self.buildCollection(maxLen)
+        expected = []
+        for i in xrange(50):
+            d.append(i)
+            expected = (expected + [i])[-maxLen:]
+            self.assertEqual(len(d), len(expected))
+            self.assertEqual(list(d.data()), expected)
+            self.assertEqual(list(d[1:4]), expected[1:4])
+            self.assertEqual(d[0], expected[0])
+            self.assertEqual(d[-1], expected[-1])
+            if i == 20:
+                d.resize(3)
+                maxLen = 3
+                expected = expected[-maxLen:]
+                self.assertEqual(list(d.data()), expected)
+            elif i == 35:
+                d.resize(12)
+                maxLen = 12
+                self.assertEqual(list(d.data()), expected)
+
+        with self.assertRaises(IndexError):
+            d[maxLen]
+
 
 class NumPyDequeTestCase(CollectionTestCaseBase):
     def buildCollection(self, maxLen):
@@ -294,6 +324,9 @@ class NumPyDequeTestCase(CollectionTestCaseBase):
     def testResizeEmpty(self):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
+    def testWrapAround(self):
+        CollectionTestCaseBase._testWrapAroundImpl(self)
+
     def testSum(self):
         d = collections.NumPyDeque(10)
 
@@ -315,6 +348,50 @@ class ListDequeTestCase(CollectionTestCaseBase):
     def testResizeEmpty(self):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
+    def testWrapAround(self):
+        CollectionTestCaseBase._testWrapAroundImpl(self)
+
+    def testSlicesAndKeys(self):
+        maxLen = 5
+        d = collections.ListDeque(maxLen)
+        bounds = [None, -7, -5, -3, -1, 0, 1, 2, 4, 5, 7]
+        for i in xrange(12):
+            d.append(i)
+            expected = list(range(max(0, i + 1 - maxLen), i + 1))
+            for begin in bounds:
+                for end in bounds:
+                    for step in [None, 1, 2, -1, -2]:
+                        self.assertEqual(d[begin:end:step], expected[begin:end:step])
+            for key in xrange(-len(expected), len(expected)):
+                self.assertEqual(d[numpy.int64(key)], expected[key])
+            with self.assertRaises(IndexError):
+                d[numpy.int32(len(expected))]
+
+
+class RollingExtremumTestCase(common.TestCase):
+    def testEmpty(self):
+        extremum = collections.RollingExtremum(3, True)
+        self.assertEqual(extremum.getValue(), None)
+        self.assertEqual(len(extremum), 0)
+
+    def testMatchesNumPy(self):
+        rnd = numpy.random.RandomState(1)
+        # Few distinct values to get plenty of ties.
+        values = rnd.randint(0, 20, 2000).astype(float)
+        values[rnd.randint(0, len(values), 20)] = numpy.nan
+        for maxLen in [1, 2, 7, 100]:
+            for useMin in [True, False]:
+                extremum = collections.RollingExtremum(maxLen, useMin)
+                for i, value in enumerate(values):
+                    extremum.append(value)
+                    window = values[max(0, i - maxLen + 1):i + 1]
+                    expected = window.min() if useMin else window.max()
+                    if numpy.isnan(expected):
+                        self.assertTrue(numpy.isnan(extremum.getValue()))
+                    else:
+                        self.assertEqual(extremum.getValue(), expected)
+                    self.assertEqual(len(extremum), len(window))
+
 
 class DateTimeTestCase(common.TestCase):
     def testTimeStampConversions(self):
@@ -338,3 +415,92 @@ class DateTimeTestCase(common.TestCase):
     def testGetLastMonday(self):
         self.assertEqual(dt.get_last_monday(2010), datetime.date(2010, 12, 27))
         self.assertEqual(dt.get_last_monday(2011), datetime.date(2011, 12, 26))
+
+    def testParseDateTimes(self):
+        values = ["2000-01-03 09:30:00", "2000-02-29 23:59:59", "1969-12-31 00:00:01"]
+        self.assertEqual(
+            dt.parse_datetimes(values, "%Y-%m-%d %H:%M:%S").tolist(),
+            [dt.datetime_to_epoch_ns(datetime.datetime.strptime(value, "%Y-%m-%d %H:%M:%S")) for value in values]
+        )
+        self.assertEqual(
+            dt.parse_datetimes(["20000103"], "%Y%m%d").tolist(),
+            [dt.datetime_to_epoch_ns(datetime.datetime(2000, 1, 3))]
+        )
+        self.assertEqual(len(dt.parse_datetimes([], "%Y-%m-%d")), 0)
+
+        for values, dateTimeFormat in [
+            (["2000-01-03"], "%d/%m/%Y %p"),
+            (["Jan 3 2000"], "%b %d %Y"),
+            (["2000-01-03"], "%H:%M"),
+            (["2000-1-3"], "%Y-%m-%d"),
+            (["2000-01-03", "2000-01-3"], "%Y-%m-%d"),
+            (["2000/01/03"], "%Y-%m-%d"),
+            (["2000-01-0a"], "%Y-%m-%d"),
+            (["2001-02-29"], "%Y-%m-%d"),
+            (["2000-13-01"], "%Y-%m-%d"),
+            (["2000-01-03 24:00"], "%Y-%m-%d %H:%M"),
+        ]:
+            with self.assertRaises(ValueError):
+                dt.parse_datetimes(values, dateTimeFormat)
+
+    def testLocalizeEpochNs(self):
+        timeZone = marketsession.USEquities.getTimezone()
+        dateTimes = [
+            datetime.datetime(2019, 3, 10, 1, 30),
+            datetime.datetime(2019, 3, 10, 3, 30),
+            datetime.datetime(2019, 7, 1, 12),
+            datetime.datetime(2019, 11, 3, 1, 30),
+            datetime.datetime(2019, 11, 3, 3),
+        ]
+        localized = dt.localize_epoch_ns([dt.datetime_to_epoch_ns(dateTime) for dateTime in dateTimes], timeZone)
+        self.assertEqual(
+            localized.tolist(),
+            [dt.datetime_to_epoch_ns(dt.localize(dateTime, timeZone)) for dateTime in dateTimes]
+        )
+
+
+class ReadColumnsTestCase(common.TestCase):
+    def __readColumns(self, content, **kwargs):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "values.csv")
+            with open(path, "w") as f:
+                f.write(content)
+            fieldNames, chunks = csvutils.read_columns(path, **kwargs)
+            return fieldNames, list(chunks)
+
+    def testReadColumns(self):
+        fieldNames, chunks = self.__readColumns("a,b,c\n1,2,3\n4,5,6\n")
+        self.assertEqual(fieldNames, ["a", "b", "c"])
+        self.assertEqual(chunks, [[["1", "4"], ["2", "5"], ["3", "6"]]])
+
+        fieldNames, chunks = self.__readColumns("1,2,3\n4,5,6", fieldNames=["a", "b", "c"], chunkSize=1)
+        self.assertEqual(fieldNames, ["a", "b", "c"])
+        self.assertEqual(chunks, [[["1"], ["2"], ["3"]], [["4"], ["5"], ["6"]]])
+
+        fieldNames, chunks = self.__readColumns("a;b\n1;\n", delimiter=";")
+        self.assertEqual(fieldNames, ["a", "b"])
+        self.assertEqual(chunks, [[["1"], [""]]])
+
+        fieldNames, chunks = self.__readColumns("a,b\n")
+        self.assertEqual(fieldNames, ["a", "b"])
+        self.assertEqual(chunks, [])
+
+    def testUnsupported(self):
+        for content in ["a,b\n\"1\",2\n", "a,b\n1,2\n\n3,4\n", "a,b\n1,2\n3,4,5\n", "a,b\n1,2,3\n4\n"]:
+            with self.assertRaises(ValueError):
+                self.__readColumns(content)
+        # Empty rows are detected across chunks too.
+        for chunkSize in range(1, 12):
+            for content in ["a,b\n1,2\n\n3,4\n", "a,b\n\n1,2\n", "a,b\n1,2\n3,4\n\n\n5,6"]:
+                with self.assertRaises(ValueError):
+                    self.__readColumns(content, chunkSize=chunkSize)
+
+    def testChunks(self):
+        content = "a,b\n" + "".join("%d,%d\n" % (i, i * 10) for i in range(100)) + "\n\n"
+        expected = [[str(i) for i in range(100)], [str(i * 10) for i in range(100)]]
+        for chunkSize in [1, 2, 3, 5, 7, 16, 100, 1000]:
+            fieldNames, chunks = self.__readColumns(content, chunkSize=chunkSize)
+            self.assertEqual(fieldNames, ["a", "b"])
+            self.assertEqual([sum((chunk[i] for chunk in chunks), []) for i in range(2)], expected)
+            # Every chunk holds complete rows, and about chunkSize characters.
+            self.assertTrue(all(len(chunk[0]) <= max(chunkSize, 6) for chunk in chunks))